@@ -0,0 +1,102 @@
+"""Adaptive repeat count for repeated TimeBenchmark runs.
+
+Instead of a fixed `repeats`, a run keeps measuring until the bootstrap confidence interval of
+the median execution time is narrower than `target_relative_width` times the median, or until
+its share of the benchmark's time budget is used up.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# converged: CI narrower than the target; time_budget: the next repetition would overrun the budget;
+# max_repeats: hit the cap first.
+STOP_REASONS = ("converged", "time_budget", "max_repeats")
+
+
+@dataclass(frozen=True)
+class AdaptiveRepeats:
+    """Stopping rule replacing `TimeBenchmark.repeats` for repeated (non per-ID) runs.
+
+    `time_budget_seconds` is for the whole benchmark; run_time_benchmark splits it evenly over the
+    benchmark's repeated runs (ST_ and every CST_ zoom, per area). Only the measured repetitions
+    count against it, not the warmup.
+    """
+    target_relative_width: float = 0.05
+    confidence: float = 0.95
+    min_repeats: int = 5
+    max_repeats: int = 200
+    time_budget_seconds: float = 120.0
+    resamples: int = 2000
+    seed: int = 0
+
+
+@dataclass
+class AdaptiveState:
+    """Outcome of one adaptive run, filled in by `repetitions`."""
+    ci: Optional[Tuple[float, float]] = None
+    stop_reason: Optional[str] = None
+
+
+def bootstrap_median_ci(
+        values: Sequence[float], confidence: float = 0.95, resamples: int = 2000, seed: int = 0
+) -> Tuple[float, float]:
+    """Percentile bootstrap confidence interval of the median."""
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        raise ValueError("bootstrap_median_ci needs at least one value")
+    rng = np.random.default_rng(seed)
+    medians = np.median(rng.choice(data, size=(resamples, data.size), replace=True), axis=1)
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    low, high = np.percentile(medians, [tail, 100.0 - tail])
+    return float(low), float(high)
+
+
+def relative_width(ci: Tuple[float, float], center: float) -> float:
+    low, high = ci
+    if center == 0:
+        return 0.0 if high == low else float("inf")
+    return (high - low) / abs(center)
+
+
+def validate(adaptive: AdaptiveRepeats) -> None:
+    if adaptive.target_relative_width <= 0:
+        raise ValueError(f"target_relative_width must be positive, got {adaptive.target_relative_width}")
+    if not 0 < adaptive.confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, got {adaptive.confidence}")
+    if not 1 <= adaptive.min_repeats <= adaptive.max_repeats:
+        raise ValueError(
+            f"Need 1 <= min_repeats <= max_repeats, got {adaptive.min_repeats} and {adaptive.max_repeats}"
+        )
+    if adaptive.time_budget_seconds <= 0:
+        raise ValueError(f"time_budget_seconds must be positive, got {adaptive.time_budget_seconds}")
+
+
+def repetitions(adaptive: AdaptiveRepeats, values: List[float], state: AdaptiveState) -> Iterator[int]:
+    """Yield repetition indexes until the stopping rule holds; the caller appends one value to `values` per step.
+
+    There is always at least one repetition. Before each further one, the run stops if the median's CI
+    is narrow enough (after `min_repeats`), if `max_repeats` is reached, or if one more repetition of
+    the average duration so far would exceed the time budget.
+    """
+    started = time.perf_counter()
+    count = 0
+    while True:
+        yield count
+        count += 1
+        if len(values) >= 2:
+            state.ci = bootstrap_median_ci(values, adaptive.confidence, adaptive.resamples, adaptive.seed)
+        if count >= adaptive.min_repeats and state.ci is not None:
+            if relative_width(state.ci, float(np.median(values))) <= adaptive.target_relative_width:
+                state.stop_reason = "converged"
+                return
+        if count >= adaptive.max_repeats:
+            state.stop_reason = "max_repeats"
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed + elapsed / count > adaptive.time_budget_seconds:
+            state.stop_reason = "time_budget"
+            return
@@ -0,0 +1,144 @@
+"""On-disk cache of ST_ (PostGIS) baseline runs.
+
+An entry is keyed by a hash of the SQL text, the parameters/sample IDs, the run
+settings and a data-version fingerprint of every table the SQL reads (relation
+identity, size and pg_stat_user_tables modification counters), so it is reused
+only while neither the query nor the data has changed. The tables come from the
+query plan (see relations_read), so comma joins and inlined SQL functions count too.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarking.plans import relation_names
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z0-9_]+\.[A-Za-z0-9_]+)", re.IGNORECASE)
+# Tables handed to CST_ functions, e.g. 'prototype2.trajectory_supercover_cs'::regclass.
+REGCLASS_PATTERN = re.compile(r"'([A-Za-z0-9_]+\.[A-Za-z0-9_]+)'::regclass", re.IGNORECASE)
+DEFAULT_CACHE_DIR = Path("benchmarking/.baseline_cache")
+# Part of every key; bump it when the cached RunOutcome gains fields, so old pickles are not reused.
+CACHE_FORMAT = 5
+
+
+def tables_in(sql: str) -> List[str]:
+    """Schema-qualified tables named in the SQL text; only the first table of a comma list is found."""
+    return sorted(set(TABLE_PATTERN.findall(sql)) | set(REGCLASS_PATTERN.findall(sql)))
+
+
+def relations_read(cur, sql: str, params: Sequence[Any]) -> List[str]:
+    """Tables the query reads: every scanned relation of its plan, plus the tables named in the SQL text.
+
+    Tables read only inside non-inlined (e.g. plpgsql) functions are invisible to EXPLAIN; they are
+    covered when the query names them, e.g. as a 'schema.table'::regclass argument.
+    """
+    cur.execute("EXPLAIN (VERBOSE, FORMAT JSON) " + sql, params)
+    payload = cur.fetchone()[0]
+    explain = payload[0] if isinstance(payload, list) else json.loads(payload)[0]
+    return sorted(set(relation_names(explain)) | set(tables_in(sql)))
+
+
+def data_fingerprint(cur, tables: Sequence[str]) -> List[Dict[str, Any]]:
+    """Per-table version info; any insert/update/delete, truncate or rewrite changes it."""
+    fingerprint = []
+    for table in tables:
+        cur.execute(
+            """
+            SELECT c.oid::bigint,
+                   c.relfilenode::bigint,
+                   pg_total_relation_size(c.oid),
+                   s.n_tup_ins,
+                   s.n_tup_upd,
+                   s.n_tup_del
+            FROM pg_class AS c
+            LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+            WHERE c.oid = to_regclass(%s)
+            """,
+            (table,),
+        )
+        row = cur.fetchone()
+        fingerprint.append({"table": table, "version": list(row) if row else None})
+    return fingerprint
+
+
+class BaselineCache:
+    def __init__(
+            self,
+            directory: Path = DEFAULT_CACHE_DIR,
+            max_bytes: int = 512 * 1024 * 1024,
+            max_age_seconds: float = 30 * 24 * 3600,
+            refresh: bool = False,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        # refresh: ignore existing entries (but still store the new runs).
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, cur, sql: str, params: Sequence[Any], settings: Dict[str, Any], tables: Sequence[str]) -> str:
+        """`tables` are the relations the query reads, normally relations_read() of one parameter set."""
+        payload = {
+            "format": CACHE_FORMAT,
+            "sql": sql,
+            "params": list(params),
+            "settings": settings,
+            "data": data_fingerprint(cur, tables),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        if self.refresh or not path.exists():
+            self.misses += 1
+            return None
+        if time.time() - path.stat().st_mtime > self.max_age_seconds:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        try:
+            with path.open("rb") as fh:
+                value = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        path.touch()
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(key).with_suffix(".tmp")
+        with tmp_path.open("wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self._path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop entries older than max_age_seconds, then least recently used ones until under max_bytes."""
+        if not self.directory.exists():
+            return
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            stat = path.stat()
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
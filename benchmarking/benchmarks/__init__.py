@@ -1,11 +1,21 @@
 from .intersects_area_benchmark import BENCHMARK as intersects_area_benchmark
+from .intersects_area_benchmark import CACHE_STATE_BENCHMARKS as intersects_area_cache_state_benchmarks
+from .intersects_area_benchmark import ADAPTIVE_BENCHMARK as intersects_area_adaptive_benchmark
 from .intersects_traj_benchmark_bresenham import BENCHMARK as intersects_traj_benchmark_bresenham
 from .intersects_traj_benchmark_supercover import BENCHMARK as intersects_traj_benchmark_supercover
+from .intersects_traj_benchmark_supercover import BATCH_BENCHMARK as intersects_traj_benchmark_supercover_batched
 from .hausdorff_distance_benchmark import BENCHMARK as hausdorff_distance_benchmark
 from .intersects_with_stop_spatially_and_temporally import BENCHMARK as intersects_with_stop_spatially_and_temporally_benchmark
 from .via_query_benchmark import CROSSING_VIA_BENCHMARKS
 from .linestring_containment_benchmark import LINESTRING_CONTAINMENT_BENCHMARKS
 from .area_mmsi_coverage_benchmark import AREA_MMSI_COVERAGE_BENCHMARKS
+from .cascade_benchmark import AREA_CASCADE_BENCHMARK, CROSSING_VIA_CASCADE_BENCHMARKS
+from .interval_cellstring_benchmark import INTERVAL_CELLSTRING_BENCHMARKS
+from .spatiotemporal_cell_index_benchmark import BENCHMARK as spatiotemporal_cell_index_benchmark
+from .partitioned_benchmark import PARTITIONED_BENCHMARKS
+from .area_mmsi_coverage_rollup_benchmark import AREA_MMSI_COVERAGE_ROLLUP_BENCHMARKS, AREA_MMSI_COVERAGE_ROLLUP_TIME_BENCHMARK
+from .area_mmsi_coverage_topk_benchmark import AREA_MMSI_COVERAGE_TOPK_BENCHMARKS
+from .load_benchmark import LOAD_BENCHMARKS
 
 RUN_PLAN = [
     *CROSSING_VIA_BENCHMARKS
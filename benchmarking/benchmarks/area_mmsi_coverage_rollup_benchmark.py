@@ -0,0 +1,64 @@
+from benchmarking.core import TimeBenchmark, ValueBenchmark
+
+# Needs cellstring_specific_queries/mmsi_coverage_rollup.sql.
+ZOOM_LEVELS = ["z13", "z17", "z21"]
+
+SQL_TEMPLATE = """
+WITH area AS (
+    SELECT
+        cellstring_{zoom} AS cellstring,
+        %s::int AS area_id
+    FROM benchmark.area_cs
+    WHERE area_id = %s
+)
+SELECT
+    area.area_id,
+    coverage.mmsi,
+    coverage.coverage_percent
+FROM area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI_Rollup(
+    {zoom_level},
+    area.cellstring
+) AS coverage
+ORDER BY coverage.coverage_percent DESC;
+"""
+
+# Timed comparison keyed by mmsi: the current function is the reference ("ST_" side) at z13.
+CURRENT_TIMED_SQL = """
+SELECT coverage.mmsi, coverage.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI('prototype2.trajectory_supercover_cs'::regclass, 13, area.cellstring_z13) AS coverage
+WHERE area.area_id = %s;
+"""
+
+ROLLUP_TIMED_SQL = """
+SELECT coverage.mmsi, coverage.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI_Rollup({zoom_level}, area.cellstring_{zoom}) AS coverage
+WHERE area.area_id = %s;
+"""
+
+
+def build_area_coverage_rollup_benchmark(area_id: int) -> ValueBenchmark:
+    return ValueBenchmark(
+        name=f"Rollup MMSI coverage - Area {area_id}",
+        sql=SQL_TEMPLATE,
+        zoom_levels=ZOOM_LEVELS,
+        params=(area_id, area_id),
+        capture_rows=True,
+        row_field_names=["area_id", "mmsi", "coverage_percent"],
+    )
+
+
+AREA_MMSI_COVERAGE_ROLLUP_BENCHMARKS = [build_area_coverage_rollup_benchmark(area_id) for area_id in (2, 3)]
+
+AREA_MMSI_COVERAGE_ROLLUP_TIME_BENCHMARK = TimeBenchmark(
+    name="MMSI coverage of an area (CST_Coverage_ByMMSI vs rollup)",
+    st_sql=CURRENT_TIMED_SQL,
+    cst_sql=ROLLUP_TIMED_SQL,
+    repeats=2,
+    zoom_levels=["z13"],
+    area_ids=[2, 3],
+    use_area_ids=True,
+    timeout_seconds=300,
+)
@@ -0,0 +1,52 @@
+from benchmarking.core import TimeBenchmark, format_zoom
+
+# Needs cellstring_specific_queries/mmsi_coverage_rollup.sql and mmsi_coverage_topk.sql.
+# The ST_ side is the full CST_Coverage_ByMMSI computation, sorted and cut to the top k.
+ZOOM_LEVELS = ["z13", "z17", "z21"]
+TOP_K = 3  # plot_area_mmsi_coverage default
+EEZ_AREA_NAME = "Denmark-EEZ-new"
+
+FULL_SQL_TEMPLATE = """
+SELECT coverage.mmsi, coverage.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI(
+    'prototype2.trajectory_supercover_cs'::regclass,
+    {{zoom_level}},
+    area.cellstring_{{zoom}}
+) AS coverage
+WHERE {area_filter}
+ORDER BY coverage.coverage_percent DESC
+LIMIT {k};
+"""
+
+TOPK_SQL_TEMPLATE = """
+SELECT top.mmsi, top.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI_TopK({{zoom_level}}, area.area_id, {k}) AS top
+WHERE {area_filter};
+"""
+
+AREA_ID_FILTER = "area.area_id = %s"
+AREA_NAME_FILTER = "area.name = %s"
+
+
+def build_topk_benchmark(zoom: str, area_filter: str, label: str, **kwargs) -> TimeBenchmark:
+    # The ST_ side is not zoom-formatted by the runner, so there is one benchmark per zoom.
+    full_sql = FULL_SQL_TEMPLATE.format(area_filter=area_filter, k=TOP_K)
+    return TimeBenchmark(
+        name=f"Top {TOP_K} MMSI coverage of {label} (full vs pruned) - {zoom}",
+        st_sql=format_zoom(full_sql, zoom),
+        cst_sql=TOPK_SQL_TEMPLATE.format(area_filter=area_filter, k=TOP_K),
+        repeats=2,
+        zoom_levels=[zoom],
+        **kwargs,
+    )
+
+
+AREA_MMSI_COVERAGE_TOPK_BENCHMARKS = [
+    build_topk_benchmark(zoom, AREA_ID_FILTER, "areas 2 and 3", area_ids=[2, 3], use_area_ids=True, timeout_seconds=300)
+    for zoom in ZOOM_LEVELS
+] + [
+    build_topk_benchmark(zoom, AREA_NAME_FILTER, "the EEZ", params=(EEZ_AREA_NAME,), timeout_seconds=1800)
+    for zoom in ZOOM_LEVELS
+]
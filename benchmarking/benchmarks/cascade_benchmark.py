@@ -0,0 +1,65 @@
+from benchmarking.benchmarks.intersects_area_benchmark import ST_SQL as AREA_ST_SQL
+from benchmarking.benchmarks.via_query_benchmark import ST_SQL as VIA_ST_SQL
+from benchmarking.core import CascadeBenchmark
+
+TRAJECTORY_TABLE = "prototype2.trajectory_supercover_cs"
+
+# Requires the functions in cellstring_specific_queries/cascade_intersects.sql.
+AREA_STAGE_SQL = f"""
+SELECT candidate.trajectory_id
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Intersects_Candidates(
+    '{TRAJECTORY_TABLE}'::regclass,
+    {{zoom_level}},
+    area.cellstring_{{zoom}},
+    %s::bigint[]
+) AS candidate(trajectory_id)
+WHERE area.area_id = %s;
+"""
+
+VIA_STAGE_SQL = f"""
+WITH candidates AS (
+    SELECT %s::bigint[] AS ids
+),
+crossing_hits AS (
+    SELECT crossing.crossing_id, candidate.trajectory_id
+    FROM benchmark.crossing_cs AS crossing
+    CROSS JOIN candidates
+    CROSS JOIN LATERAL CST_Intersects_Candidates(
+        '{TRAJECTORY_TABLE}'::regclass,
+        {{zoom_level}},
+        crossing.cellstring_{{zoom}},
+        candidates.ids
+    ) AS candidate(trajectory_id)
+    WHERE crossing.crossing_id IN (%s, %s, %s)
+)
+SELECT trajectory_id
+FROM crossing_hits
+GROUP BY trajectory_id
+HAVING COUNT(DISTINCT crossing_id) = 3;
+"""
+
+AREA_CASCADE_BENCHMARK = CascadeBenchmark(
+    name="Find trajectories that intersects an area - z13/z17/z21 cascade",
+    st_sql=AREA_ST_SQL,
+    stage_sql=AREA_STAGE_SQL,
+    repeats=2,
+    use_area_ids=True,
+    timeout_seconds=30,
+)
+
+
+def build_via_cascade_benchmark(label: str, crossings: tuple[int, int, int]) -> CascadeBenchmark:
+    return CascadeBenchmark(
+        name=f"{label} - z13/z17/z21 cascade",
+        st_sql=VIA_ST_SQL,
+        stage_sql=VIA_STAGE_SQL,
+        params=crossings,
+        repeats=5,
+    )
+
+
+CROSSING_VIA_CASCADE_BENCHMARKS = [
+    build_via_cascade_benchmark("Skagen-Storebælt-Bornholm", (1, 2, 4)),
+    build_via_cascade_benchmark("Skagen-Kattegat-Storebælt", (1, 6, 2)),
+]
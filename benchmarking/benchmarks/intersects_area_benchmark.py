@@ -1,3 +1,6 @@
+from dataclasses import replace
+
+from benchmarking.adaptive import AdaptiveRepeats
 from benchmarking.core import TimeBenchmark
 
 ST_SQL = """
@@ -31,3 +34,17 @@ BENCHMARK = TimeBenchmark(
     timeout_seconds=30,
 )
 
+# Repeats until the median's 95% CI is within 5%, spending at most 300 s on the whole benchmark.
+ADAPTIVE_BENCHMARK = replace(
+    BENCHMARK,
+    name=f"{BENCHMARK.name} (adaptive repeats)",
+    adaptive=AdaptiveRepeats(target_relative_width=0.05, time_budget_seconds=300),
+)
+
+
+# The same query measured without warm caches; "cold" needs pg_buffercache_evict or
+# BENCHMARK_DROP_OS_CACHE_COMMAND (see benchmarking/cache_state.py).
+CACHE_STATE_BENCHMARKS = [
+    replace(BENCHMARK, name=f"{BENCHMARK.name} ({cache_state} cache)", cache_state=cache_state)
+    for cache_state in ("first_touch", "cold")
+]
@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 from benchmarking.core import TimeBenchmark
 
 ST_SQL = """
@@ -30,3 +32,8 @@ BENCHMARK = TimeBenchmark(
     zoom_levels=["z13", "z17", "z21"],
 )
 
+BATCH_BENCHMARK = replace(
+    BENCHMARK,
+    name="Find trajectories that intersects another trajectory - Supercover (batched)",
+    batch_ids=True,
+)
@@ -0,0 +1,91 @@
+from benchmarking.core import TimeBenchmark
+
+# Range (int8multirange) cellstrings from cellstring_specific_queries/interval_cellstrings.sql.
+# The ST_ side of these benchmarks is the current cell-array query at z21, so false positives and
+# negatives are the differences between the two representations, not against PostGIS.
+
+TRAJECTORY_TABLE = "prototype2.trajectory_supercover_cs"
+
+ARRAY_COVERAGE_SQL = f"""
+SELECT
+    coverage.mmsi,
+    coverage.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI(
+    '{TRAJECTORY_TABLE}'::regclass,
+    21,
+    area.cellstring_z21
+) AS coverage
+WHERE area.area_id = %s;
+"""
+
+RANGE_COVERAGE_SQL = f"""
+SELECT
+    coverage.mmsi,
+    coverage.coverage_percent
+FROM benchmark.area_ranges AS area
+JOIN benchmark.area_cs AS cs USING (area_id)
+CROSS JOIN LATERAL CST_RangesCoverage_ByMMSI(
+    '{TRAJECTORY_TABLE}'::regclass,
+    {{zoom_level}},
+    area.ranges_{{zoom}},
+    cs.cellstring_z13
+) AS coverage
+WHERE area.area_id = %s;
+"""
+
+ARRAY_STOP_OVERLAP_SQL = """
+SELECT
+    stopB.stop_id,
+    ROUND(
+        (cardinality(CST_Intersection(stopA.cellstring_z21, stopB.cellstring_z21))::numeric
+         / cardinality(stopA.cellstring_z21)) * 100,
+        2
+    ) AS overlap_percent
+FROM
+    prototype2.stop_cs AS stopA,
+    prototype2.stop_cs AS stopB
+WHERE stopA.stop_id = %s
+    AND stopA.stop_id <> stopB.stop_id
+    AND stopA.mmsi <> stopB.mmsi
+    AND CST_Intersects(stopA.cellstring_z21, stopB.cellstring_z21);
+"""
+
+RANGE_STOP_OVERLAP_SQL = """
+SELECT
+    stopB.stop_id,
+    round(
+        100.0 * CST_RangesIntersectionCardinality(stopA.ranges_{zoom}, stopB.ranges_{zoom})
+        / CST_RangesCardinality(stopA.ranges_{zoom}),
+        2
+    ) AS overlap_percent
+FROM
+    prototype2.stop_ranges AS stopA,
+    prototype2.stop_ranges AS stopB
+WHERE stopA.stop_id = %s
+    AND stopA.stop_id <> stopB.stop_id
+    AND stopA.mmsi <> stopB.mmsi
+    AND stopA.ranges_{zoom} && stopB.ranges_{zoom};
+"""
+
+
+# All areas, including Denmark-EEZ-new.
+RANGE_COVERAGE_BENCHMARK = TimeBenchmark(
+    name="MMSI coverage of an area (cell arrays vs ranges)",
+    st_sql=ARRAY_COVERAGE_SQL,
+    cst_sql=RANGE_COVERAGE_SQL,
+    repeats=2,
+    zoom_levels=["z21"],
+    use_area_ids=True,
+    timeout_seconds=300,
+)
+
+RANGE_STOP_OVERLAP_BENCHMARK = TimeBenchmark(
+    name="Stop overlap percentage with other stops (cell arrays vs ranges)",
+    st_sql=ARRAY_STOP_OVERLAP_SQL,
+    cst_sql=RANGE_STOP_OVERLAP_SQL,
+    with_stop_ids=True,
+    zoom_levels=["z21"],
+)
+
+INTERVAL_CELLSTRING_BENCHMARKS = [RANGE_COVERAGE_BENCHMARK, RANGE_STOP_OVERLAP_BENCHMARK]
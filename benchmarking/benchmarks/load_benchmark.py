@@ -0,0 +1,28 @@
+from benchmarking.load import LoadBenchmark, LoadMixEntry
+from benchmarking.benchmarks.intersects_area_benchmark import BENCHMARK as INTERSECTS_AREA_BENCHMARK
+from benchmarking.benchmarks.intersects_traj_benchmark_supercover import BENCHMARK as INTERSECTS_TRAJ_BENCHMARK
+from benchmarking.benchmarks.via_query_benchmark import CROSSING_VIA_BENCHMARKS
+
+# Many analysts at once: mostly trajectory lookups, some area and via queries, CST_ queries only.
+ANALYST_MIX = [
+    LoadMixEntry(INTERSECTS_TRAJ_BENCHMARK, weight=0.6, label="trajectory intersection"),
+    LoadMixEntry(INTERSECTS_AREA_BENCHMARK, weight=0.3, label="area"),
+    LoadMixEntry(CROSSING_VIA_BENCHMARKS[0], weight=0.1, label="via"),
+]
+
+ANALYST_LOAD_BENCHMARK = LoadBenchmark(
+    name="Analyst query mix - 32 clients, closed loop",
+    mix=ANALYST_MIX,
+    concurrency=32,
+    duration_seconds=120,
+)
+
+ANALYST_QPS_BENCHMARK = LoadBenchmark(
+    name="Analyst query mix - 20 qps offered",
+    mix=ANALYST_MIX,
+    concurrency=32,
+    target_qps=20,
+    duration_seconds=120,
+)
+
+LOAD_BENCHMARKS = [ANALYST_LOAD_BENCHMARK, ANALYST_QPS_BENCHMARK]
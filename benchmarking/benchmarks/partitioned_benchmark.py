@@ -0,0 +1,158 @@
+from benchmarking.core import TimeBenchmark
+from benchmarking.benchmarks.intersects_with_stop_spatially_and_temporally import ST_SQL as STOP_OVERLAP_ST_SQL
+
+# Needs db_utils/partition_cellstring_tables.sql. The time window bounds are scalar subqueries
+# (InitPlans), so the executor prunes partitions at startup; ts_start is bounded on both sides
+# with the longest object duration from prototype2.cellstring_partition_bounds.
+
+STOP_OVERLAP_PARTITIONED_CST_SQL = """
+WITH ref AS (
+    SELECT mmsi,
+           stop_id,
+           cellstring_{zoom} as ref_cellstring,
+           ts_start AS ref_start,
+           ts_end   AS ref_end
+    FROM prototype2.stop_cs
+    WHERE stop_id = %s
+)
+
+-- 0. Reference stop (always returned)
+SELECT
+    'REFERENCE STOP' as type,
+    r.mmsi,
+    NULL::bigint AS trajectory_id,
+    r.stop_id,
+    NULL::double precision AS overlap_minutes
+FROM ref r
+
+UNION
+
+-- 1. Trajectory matches
+SELECT DISTINCT
+    'INTERSECTING TRAJECTORY' as type,
+    t.mmsi,
+    t.trajectory_id,
+    NULL::bigint AS stop_id,
+    ROUND(EXTRACT(
+        EPOCH FROM (
+            LEAST(t.ts_end,   r.ref_end)
+          - GREATEST(t.ts_start, r.ref_start)
+        )
+    ) / 60.0, 2) AS overlap_minutes
+FROM ref r
+JOIN prototype2.trajectory_supercover_cs_part t
+  ON t.mmsi <> r.mmsi
+ AND CST_Intersects(t.cellstring_{zoom}, r.ref_cellstring)
+ AND t.ts_end   >= r.ref_start
+ AND t.ts_start <= r.ref_end
+WHERE t.ts_start <= (SELECT ref_end FROM ref)
+  AND t.ts_start >= (SELECT ref_start FROM ref) - (
+      SELECT max_duration FROM prototype2.cellstring_partition_bounds
+      WHERE table_name = 'prototype2.trajectory_supercover_cs_part'
+  )
+
+UNION
+
+-- 2. Stop matches
+SELECT DISTINCT
+    'INTERSECTING STOP' as type,
+    s.mmsi,
+    NULL::bigint AS trajectory_id,
+    s.stop_id,
+    ROUND(EXTRACT(
+        EPOCH FROM (
+            LEAST(s.ts_end,   r.ref_end)
+          - GREATEST(s.ts_start, r.ref_start)
+        )
+    ) / 60.0, 2) AS overlap_minutes
+FROM ref r
+JOIN prototype2.stop_cs_part s
+  ON s.mmsi <> r.mmsi
+ AND CST_Intersects(s.cellstring_{zoom}, r.ref_cellstring)
+ AND s.ts_end   >= r.ref_start
+ AND s.ts_start <= r.ref_end
+WHERE s.ts_start <= (SELECT ref_end FROM ref)
+  AND s.ts_start >= (SELECT ref_start FROM ref) - (
+      SELECT max_duration FROM prototype2.cellstring_partition_bounds
+      WHERE table_name = 'prototype2.stop_cs_part'
+  );
+"""
+
+# "Recent traffic": the last 30 days of trajectory starts.
+RECENT_WINDOW_SQL = """
+window_bounds AS (
+    SELECT max_ts_start - interval '30 days' AS window_start, max_ts_start AS window_end, max_duration
+    FROM prototype2.cellstring_partition_bounds
+    WHERE table_name = 'prototype2.trajectory_supercover_cs_part'
+)"""
+
+RECENT_AREA_ST_SQL = f"""
+WITH {RECENT_WINDOW_SQL}
+SELECT
+    traj.trajectory_id
+FROM
+    prototype2.trajectory_ls AS traj,
+    benchmark.area_poly AS area
+WHERE area.area_id = %s
+    AND traj.ts_end >= (SELECT window_start FROM window_bounds)
+    AND traj.ts_start <= (SELECT window_end FROM window_bounds)
+    AND ST_Intersects(traj.geom, area.geom);
+"""
+
+RECENT_AREA_CST_SQL_TEMPLATE = f"""
+WITH {RECENT_WINDOW_SQL}
+SELECT
+    traj.trajectory_id
+FROM
+    {{table}} AS traj,
+    benchmark.area_cs AS area
+WHERE area.area_id = %s
+    AND traj.ts_end >= (SELECT window_start FROM window_bounds)
+    AND traj.ts_start <= (SELECT window_end FROM window_bounds)
+    {{pruning}}
+    AND CST_Intersects(traj.cellstring_{{{{zoom}}}}, area.cellstring_{{{{zoom}}}});
+"""
+
+PRUNING_PREDICATE = (
+    "AND traj.ts_start >= (SELECT window_start - max_duration FROM window_bounds)"
+)
+
+RECENT_AREA_CST_SQL = RECENT_AREA_CST_SQL_TEMPLATE.format(table="prototype2.trajectory_supercover_cs", pruning="")
+RECENT_AREA_PARTITIONED_CST_SQL = RECENT_AREA_CST_SQL_TEMPLATE.format(
+    table="prototype2.trajectory_supercover_cs_part", pruning=PRUNING_PREDICATE
+)
+
+
+STOP_OVERLAP_PARTITIONED_BENCHMARK = TimeBenchmark(
+    name="Find trajectories and stops that intersect a given stop spatially and temporally (partitioned)",
+    st_sql=STOP_OVERLAP_ST_SQL,
+    cst_sql=STOP_OVERLAP_PARTITIONED_CST_SQL,
+    with_stop_ids=True,
+    zoom_levels=["z13", "z17", "z21"],
+)
+
+RECENT_AREA_BENCHMARK = TimeBenchmark(
+    name="Find trajectories that intersect an area in the last 30 days",
+    st_sql=RECENT_AREA_ST_SQL,
+    cst_sql=RECENT_AREA_CST_SQL,
+    repeats=2,
+    zoom_levels=["z13", "z17", "z21"],
+    use_area_ids=True,
+    timeout_seconds=30,
+)
+
+RECENT_AREA_PARTITIONED_BENCHMARK = TimeBenchmark(
+    name="Find trajectories that intersect an area in the last 30 days (partitioned)",
+    st_sql=RECENT_AREA_ST_SQL,
+    cst_sql=RECENT_AREA_PARTITIONED_CST_SQL,
+    repeats=2,
+    zoom_levels=["z13", "z17", "z21"],
+    use_area_ids=True,
+    timeout_seconds=30,
+)
+
+PARTITIONED_BENCHMARKS = [
+    STOP_OVERLAP_PARTITIONED_BENCHMARK,
+    RECENT_AREA_BENCHMARK,
+    RECENT_AREA_PARTITIONED_BENCHMARK,
+]
@@ -0,0 +1,57 @@
+from benchmarking.core import TimeBenchmark
+
+# Needs cellstring_specific_queries/spatiotemporal_cell_index.sql (postings built for every zoom).
+# Same question as intersects_with_stop_spatially_and_temporally, keyed by "<kind>:<id>" so
+# trajectories and stops can be compared in one result.
+
+ST_SQL = """
+WITH ref AS (
+    SELECT mmsi, geom AS ref_geom, ts_start AS ref_start, ts_end AS ref_end
+    FROM prototype2.stop_poly
+    WHERE stop_id = %s
+)
+SELECT
+    'trajectory:' || t.trajectory_id AS object_key,
+    t.mmsi,
+    ROUND(EXTRACT(EPOCH FROM (LEAST(t.ts_end, r.ref_end) - GREATEST(t.ts_start, r.ref_start))) / 60.0, 2)
+FROM ref r
+JOIN prototype2.trajectory_ls t
+  ON t.mmsi <> r.mmsi
+ AND ST_Intersects(t.geom, r.ref_geom)
+ AND t.ts_end   >= r.ref_start
+ AND t.ts_start <= r.ref_end
+UNION
+SELECT
+    'stop:' || s.stop_id AS object_key,
+    s.mmsi,
+    ROUND(EXTRACT(EPOCH FROM (LEAST(s.ts_end, r.ref_end) - GREATEST(s.ts_start, r.ref_start))) / 60.0, 2)
+FROM ref r
+JOIN prototype2.stop_poly s
+  ON s.mmsi <> r.mmsi
+ AND ST_Intersects(s.geom, r.ref_geom)
+ AND s.ts_end   >= r.ref_start
+ AND s.ts_start <= r.ref_end;
+"""
+
+CST_SQL = """
+SELECT
+    hit.object_kind || ':' || hit.object_id AS object_key,
+    hit.mmsi,
+    hit.overlap_minutes
+FROM prototype2.stop_cs AS ref
+CROSS JOIN LATERAL CST_SpatioTemporal_Intersecting(
+    {zoom_level},
+    ref.cellstring_{zoom},
+    tstzrange(ref.ts_start, ref.ts_end, '[]'),
+    ref.mmsi
+) AS hit
+WHERE ref.stop_id = %s;
+"""
+
+BENCHMARK = TimeBenchmark(
+    name="Find trajectories and stops that intersect a given stop spatially and temporally (cell-time index)",
+    st_sql=ST_SQL,
+    cst_sql=CST_SQL,
+    with_stop_ids=True,
+    zoom_levels=["z13", "z17", "z21"],
+)
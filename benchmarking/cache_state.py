@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from typing import Any, Sequence
+
+import psycopg
+
+from benchmarking.baseline_cache import relations_read
+
+CACHE_STATES = ("warm", "cold", "first_touch")
+DROP_OS_CACHE_ENV = "BENCHMARK_DROP_OS_CACHE_COMMAND"
+
+EVICT_RELATIONS_SQL = """
+WITH tables AS (
+    SELECT tree.relid AS oid
+    FROM unnest(%s::text[]) AS name
+    CROSS JOIN LATERAL pg_partition_tree(to_regclass(name)) AS tree
+), relations AS (
+    SELECT oid FROM tables
+    UNION SELECT indexrelid FROM pg_index WHERE indrelid IN (SELECT oid FROM tables)
+    UNION SELECT reltoastrelid FROM pg_class WHERE oid IN (SELECT oid FROM tables) AND reltoastrelid <> 0
+    UNION SELECT i.indexrelid
+          FROM pg_class AS c
+          JOIN pg_index AS i ON i.indrelid = c.reltoastrelid
+          WHERE c.oid IN (SELECT oid FROM tables)
+)
+SELECT count(*) FILTER (WHERE (pg_buffercache_evict(b.bufferid)).buffer_evicted)
+FROM pg_buffercache AS b
+WHERE b.reldatabase = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND b.relfilenode IN (SELECT pg_relation_filenode(oid) FROM relations)
+"""
+
+
+def supports_buffer_eviction(cur) -> bool:
+    cur.execute("SELECT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'pg_buffercache_evict')")
+    return bool(cur.fetchone()[0])
+
+
+def os_cache_command() -> str | None:
+    return os.getenv(DROP_OS_CACHE_ENV) or None
+
+
+# Must run outside a transaction (the benchmark connections are autocommit).
+def reset_cache(cur, sql: str, params: Sequence[Any]) -> int:
+    tables = relations_read(cur, sql, params)
+    if not tables:
+        raise RuntimeError(f"cache_state='cold' found no relations to evict for query:\n{sql}")
+    evicted = None
+    try:
+        cur.execute(EVICT_RELATIONS_SQL, (tables,))
+        evicted = int(cur.fetchone()[0])
+    except (psycopg.errors.UndefinedFunction, psycopg.errors.UndefinedTable):
+        pass
+    command = os_cache_command()
+    if command:
+        subprocess.run(command, shell=True, check=True)
+    if evicted is None and not command:
+        raise RuntimeError(
+            "cache_state='cold' needs the pg_buffercache extension (1.5+, PostgreSQL 17) "
+            f"or a ${DROP_OS_CACHE_ENV} command"
+        )
+    return evicted or 0
@@ -0,0 +1,101 @@
+"""In-memory inverted cell index (cell ID -> posting list of rows) over a CellStringTable.
+
+Postings are kept in CSR layout: the rows containing cells[i] are
+postings[offsets[i]:offsets[i + 1]], as row positions into the source table.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from benchmarking.cellstring import CellStringTable, isin_sorted
+
+
+def _gather(offsets: np.ndarray, values: np.ndarray, slots: np.ndarray) -> np.ndarray:
+    """Concatenate values[offsets[s]:offsets[s + 1]] for every slot s without a Python loop."""
+    starts = offsets[slots]
+    lengths = offsets[slots + 1] - starts
+    preceding = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - preceding, lengths) + np.arange(int(lengths.sum()))
+    return values[positions]
+
+
+@dataclass
+class CellIndex:
+    table: CellStringTable
+    cells: np.ndarray
+    offsets: np.ndarray
+    postings: np.ndarray
+
+    @classmethod
+    def build(cls, table: CellStringTable) -> "CellIndex":
+        order = np.argsort(table.cells, kind="stable")
+        sorted_cells = table.cells[order]
+        postings = table.row_of_cell()[order]
+        cells, starts = np.unique(sorted_cells, return_index=True)
+        offsets = np.append(starts, sorted_cells.size).astype(np.int64)
+        return cls(table, cells, offsets, postings)
+
+    def posting_lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def rows_sharing_cells(self, probe: np.ndarray) -> np.ndarray:
+        """Row positions whose cellstring shares at least one cell with `probe`."""
+        present = isin_sorted(self.cells, probe)
+        slots = np.searchsorted(self.cells, probe[present])
+        return np.unique(_gather(self.offsets, self.postings, slots))
+
+    def intersecting(self, key: int, exclude_same_group: bool = False) -> np.ndarray:
+        """Keys of all rows sharing a cell with row `key`, excluding itself."""
+        position = self.table.position_of(key)
+        rows = self.rows_sharing_cells(self.table.row(position))
+        rows = rows[rows != position]
+        if exclude_same_group and self.table.groups is not None:
+            rows = rows[self.table.groups[rows] != self.table.groups[position]]
+        return self.table.keys[rows]
+
+    def _encoded_pairs(self, slots: np.ndarray) -> np.ndarray:
+        """Row pairs (encoded as left * n + right) of every posting list in `slots`."""
+        n = self.table.keys.size
+        lengths = self.posting_lengths()[slots]
+        parts = []
+        # Posting lists of equal length are stacked into one matrix so pairs are built per length, not per cell.
+        for length in np.unique(lengths[lengths > 1]):
+            group = slots[lengths == length]
+            rows = self.postings[self.offsets[group][:, None] + np.arange(length)]
+            left, right = np.triu_indices(int(length), k=1)
+            parts.append((rows[:, left] * n + rows[:, right]).ravel())
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def _pair_chunks(self, max_pairs_per_chunk: int) -> Iterator[np.ndarray]:
+        lengths = self.posting_lengths()
+        pair_counts = lengths * (lengths - 1) // 2
+        slots = np.nonzero(pair_counts)[0]
+        cumulative = np.cumsum(pair_counts[slots])
+        chunk_of_slot = cumulative // max(max_pairs_per_chunk, 1)
+        boundaries = np.nonzero(np.diff(chunk_of_slot))[0] + 1
+        for chunk_slots in np.split(slots, boundaries):
+            if chunk_slots.size:
+                yield self._encoded_pairs(chunk_slots)
+
+    def self_join(
+            self, exclude_same_group: bool = False, max_pairs_per_chunk: int = 5_000_000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """All unordered key pairs sharing at least one cell, found by scanning posting lists."""
+        n = self.table.keys.size
+        encoded: Optional[np.ndarray] = None
+        for chunk in self._pair_chunks(max_pairs_per_chunk):
+            encoded = chunk if encoded is None else np.union1d(encoded, chunk)
+        if encoded is None:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        # Posting lists are sorted by row, so left < right within every encoded pair.
+        left, right = np.divmod(encoded, n)
+        if exclude_same_group and self.table.groups is not None:
+            keep = self.table.groups[left] != self.table.groups[right]
+            left, right = left[keep], right[keep]
+        return self.table.keys[left], self.table.keys[right]
@@ -0,0 +1,115 @@
+"""Compare the in-memory inverted cell index against the GIN (gin__int_ops) path.
+
+For every zoom it times, per sampled trajectory, "all trajectories sharing a cell
+with X" through CellIndex postings and through the CST_Intersects SQL (which
+probes the GIN index created as in utils/indexing_zoom_13.sql), then the full
+trajectory self-join from intersects_traj_with_traj_cartesian.sql.
+
+    python -m benchmarking.cell_index_benchmark [sample_size] [self_join_timeout_seconds]
+"""
+import sys
+import time
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarking.benchmarks.intersects_traj_benchmark_supercover import CST_SQL
+from benchmarking.cell_index import CellIndex
+from benchmarking.connect import connect_to_db
+from benchmarking.core import fetch_all_with_wall_ms, median_or_zero
+from benchmarking.inprocess_benchmark import TABLE, ZOOM_LEVELS, load_table, sample_trajectory_ids
+
+SELF_JOIN_SQL = f"""
+SELECT
+    trajA.trajectory_id,
+    trajB.trajectory_id
+FROM
+    {TABLE} AS trajA,
+    {TABLE} AS trajB
+WHERE trajA.trajectory_id < trajB.trajectory_id
+    AND trajA.mmsi <> trajB.mmsi
+    AND CST_Intersects(trajA.cellstring_{{zoom}}, trajB.cellstring_{{zoom}});
+"""
+
+
+def _gin_indexes(cur, zoom: str) -> List[str]:
+    schema, table = TABLE.split(".")
+    cur.execute(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s "
+        "AND indexdef ILIKE '%%USING gin%%' AND indexdef ILIKE %s",
+        (schema, table, f"%cellstring_{zoom}%"),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _sorted_pairs(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    pairs = np.column_stack((np.minimum(left, right), np.maximum(left, right))).astype(np.int64)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))].reshape(-1, 2)
+
+
+def run(sample_size: int, self_join_timeout_seconds: int) -> None:
+    conn = connect_to_db()
+    try:
+        trajectory_ids = sample_trajectory_ids(conn, sample_size)
+        with conn.cursor() as cur:
+            for zoom in ZOOM_LEVELS:
+                gin_indexes = _gin_indexes(cur, zoom)
+                if not gin_indexes:
+                    print(f"Warning: no GIN index on cellstring_{zoom}; the SQL path will scan the table.")
+
+                table = load_table(conn, zoom)
+                start = time.perf_counter()
+                index = CellIndex.build(table)
+                build_ms = (time.perf_counter() - start) * 1000.0
+                print(
+                    f"\nCST_{zoom}: index build_ms={round(build_ms, 3)}, "
+                    f"cells={index.cells.size}, postings={index.postings.size}, gin_indexes={gin_indexes}"
+                )
+
+                sql = CST_SQL.format(zoom=zoom)
+                gin_times: List[float] = []
+                index_times: List[float] = []
+                for traj_id in trajectory_ids:
+                    _, wall_ms = fetch_all_with_wall_ms(cur, sql, (traj_id,))
+                    gin_times.append(wall_ms)
+                    start = time.perf_counter()
+                    index.intersecting(traj_id)
+                    index_times.append((time.perf_counter() - start) * 1000.0)
+                print(
+                    f"  Probe: GIN wall_ms(median)={median_or_zero(gin_times)}, "
+                    f"postings ms(median)={median_or_zero(index_times)}"
+                )
+
+                start = time.perf_counter()
+                left, right = index.self_join(exclude_same_group=True)
+                index_join_ms = (time.perf_counter() - start) * 1000.0
+                try:
+                    rows, gin_join_ms = fetch_all_with_wall_ms(
+                        cur, SELF_JOIN_SQL.format(zoom=zoom), (), self_join_timeout_seconds
+                    )
+                except Exception as exc:
+                    if "canceling statement due to statement timeout" not in str(exc):
+                        raise
+                    gin_join = f"TIMEOUT after {self_join_timeout_seconds}s"
+                else:
+                    gin_join = f"{round(gin_join_ms, 3)} ms ({len(rows)} pairs)"
+                    gin_pairs = np.asarray(rows, dtype=np.int64).reshape(-1, 2)
+                    if not np.array_equal(
+                            _sorted_pairs(gin_pairs[:, 0], gin_pairs[:, 1]), _sorted_pairs(left, right)
+                    ):
+                        raise RuntimeError(
+                            f"CST_{zoom}: postings self-join ({left.size} pairs) and GIN self-join "
+                            f"({len(rows)} pairs) returned different pair sets"
+                        )
+                print(f"  Self-join: GIN {gin_join}, postings {round(index_join_ms, 3)} ms ({left.size} pairs)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 600,
+    )
@@ -0,0 +1,199 @@
+"""Client-side CellString operations mirroring the CST_* SQL API.
+
+A cellstring is held as a sorted, duplicate-free NumPy int64 array, so every set
+operation is a vectorized merge (intersect1d/union1d/setdiff1d) or a searchsorted
+probe instead of a database round-trip.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+def as_cellstring(cells: Iterable[int] | np.ndarray | None) -> np.ndarray:
+    if cells is None:
+        return EMPTY
+    array = np.asarray(cells if isinstance(cells, np.ndarray) else list(cells), dtype=np.int64)
+    return np.unique(array)
+
+
+def isin_sorted(haystack: np.ndarray, needles: np.ndarray) -> np.ndarray:
+    """Boolean mask over `needles` telling which values occur in the sorted `haystack`."""
+    if haystack.size == 0:
+        return np.zeros(needles.size, dtype=bool)
+    idx = np.searchsorted(haystack, needles)
+    idx[idx == haystack.size] = haystack.size - 1
+    return haystack[idx] == needles
+
+
+def cst_intersects(a: np.ndarray, b: np.ndarray) -> bool:
+    if a.size == 0 or b.size == 0 or a[-1] < b[0] or b[-1] < a[0]:
+        return False
+    small, large = (a, b) if a.size <= b.size else (b, a)
+    return bool(isin_sorted(large, small).any())
+
+
+def cst_intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def cst_union(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.union1d(a, b)
+
+
+def cst_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+def cst_contains(a: np.ndarray, b: np.ndarray) -> bool:
+    if b.size == 0:
+        return True
+    if b.size > a.size or b[0] < a[0] or b[-1] > a[-1]:
+        return False
+    return bool(isin_sorted(a, b).all())
+
+
+def cst_intersection_cardinality(a: np.ndarray, b: np.ndarray) -> int:
+    small, large = (a, b) if a.size <= b.size else (b, a)
+    return int(isin_sorted(large, small).sum())
+
+
+def cst_coverage(cells: np.ndarray, area: np.ndarray) -> float:
+    """Percentage of `area` covered by `cells`, rounded like CST_Coverage."""
+    if area.size == 0:
+        return 0.0
+    return round(100.0 * cst_intersection_cardinality(cells, area) / area.size, 2)
+
+
+def cst_union_agg(cellstrings: Iterable[np.ndarray]) -> np.ndarray:
+    parts = [cells for cells in cellstrings if cells.size]
+    if not parts:
+        return EMPTY
+    return np.unique(np.concatenate(parts))
+
+
+@dataclass
+class CellStringTable:
+    """Many cellstrings in CSR layout: row i holds cells[offsets[i]:offsets[i + 1]]."""
+
+    keys: np.ndarray
+    offsets: np.ndarray
+    cells: np.ndarray
+    groups: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.keys.size)
+
+    def row(self, position: int) -> np.ndarray:
+        return self.cells[self.offsets[position]:self.offsets[position + 1]]
+
+    def position_of(self, key: int) -> int:
+        position = int(np.searchsorted(self.keys, key))
+        if position >= self.keys.size or self.keys[position] != key:
+            raise KeyError(key)
+        return position
+
+    def get(self, key: int) -> np.ndarray:
+        return self.row(self.position_of(key))
+
+    def row_lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def row_of_cell(self) -> np.ndarray:
+        """Row position for every entry of `cells`."""
+        return np.repeat(np.arange(self.keys.size, dtype=np.int64), self.row_lengths())
+
+    def intersects_all(self, probe: np.ndarray) -> np.ndarray:
+        """Boolean mask over rows: CST_Intersects(row, probe) for every row at once."""
+        hits = isin_sorted(probe, self.cells)
+        counts = np.bincount(self.row_of_cell(), weights=hits, minlength=self.keys.size)
+        return counts > 0
+
+    def intersection_cardinalities(self, probe: np.ndarray) -> np.ndarray:
+        hits = isin_sorted(probe, self.cells)
+        return np.bincount(self.row_of_cell(), weights=hits, minlength=self.keys.size).astype(np.int64)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"keys": self.keys, "offsets": self.offsets, "cells": self.cells}
+        if self.groups is not None:
+            payload["groups"] = self.groups
+        np.savez(path, **payload)
+
+    @classmethod
+    def load(cls, path: Path) -> "CellStringTable":
+        with np.load(path) as data:
+            groups = data["groups"] if "groups" in data.files else None
+            return cls(data["keys"], data["offsets"], data["cells"], groups)
+
+    @classmethod
+    def from_mapping(cls, rows: Dict[int, np.ndarray], groups: Optional[Dict[int, int]] = None) -> "CellStringTable":
+        keys = np.array(sorted(rows), dtype=np.int64)
+        lengths = np.array([rows[int(key)].size for key in keys], dtype=np.int64)
+        offsets = np.zeros(keys.size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        cells = np.concatenate([rows[int(key)] for key in keys]) if keys.size else EMPTY
+        group_array = None
+        if groups is not None:
+            group_array = np.array([groups[int(key)] for key in keys], dtype=np.int64)
+        return cls(keys, offsets, cells.astype(np.int64, copy=False), group_array)
+
+
+def fetch_cellstring_table(
+        conn,
+        table: str,
+        zoom: str,
+        key_column: str = "trajectory_id",
+        group_column: Optional[str] = "mmsi",
+        keys: Optional[Sequence[int]] = None,
+) -> CellStringTable:
+    """Export `cellstring_{zoom}` of `table` into a CellStringTable."""
+    for identifier in (key_column, group_column or "", zoom):
+        if not re.fullmatch(r"[A-Za-z0-9_]*", identifier):
+            raise ValueError(f"Invalid identifier: {identifier}")
+    if not re.fullmatch(r"[A-Za-z0-9_.]+", table):
+        raise ValueError(f"Invalid table name: {table}")
+
+    group_select = f", {group_column}" if group_column else ""
+    sql = f"SELECT {key_column}, cellstring_{zoom}{group_select} FROM {table}"
+    params: tuple = ()
+    if keys is not None:
+        sql += f" WHERE {key_column} = ANY(%s)"
+        params = (list(keys),)
+
+    rows: Dict[int, np.ndarray] = {}
+    groups: Dict[int, int] = {}
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        for record in cur:
+            key = int(record[0])
+            rows[key] = as_cellstring(record[1])
+            if group_column:
+                groups[key] = int(record[2])
+    return CellStringTable.from_mapping(rows, groups if group_column else None)
+
+
+def coverage_by_group(table: CellStringTable, area: np.ndarray) -> Dict[int, float]:
+    """In-process CST_Coverage_ByMMSI: union per group of the cells inside `area`, as % of `area`."""
+    if table.groups is None:
+        raise ValueError("CellStringTable was exported without a group column")
+    if area.size == 0:
+        return {}
+    inside = isin_sorted(area, table.cells)
+    cell_groups = table.groups[table.row_of_cell()][inside]
+    covered = table.cells[inside]
+    if covered.size == 0:
+        return {}
+    pairs = np.unique(np.stack([cell_groups, covered]), axis=1)
+    group_ids, counts = np.unique(pairs[0], return_counts=True)
+    return {int(group): round(100.0 * int(count) / area.size, 2) for group, count in zip(group_ids, counts)}
+
+
+def rows_intersecting(table: CellStringTable, probe: np.ndarray) -> List[int]:
+    return [int(key) for key in table.keys[table.intersects_all(probe)]]
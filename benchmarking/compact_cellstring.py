@@ -0,0 +1,175 @@
+"""Compact, run-length encoded cellstrings with set operations on the runs.
+
+Consecutive cell IDs (neighbouring cells along the curve the IDs follow) are
+collapsed into half-open runs [start, end). In memory a CompactCellString is two
+sorted int64 arrays of run starts and ends; on disk it is a varint byte string of
+the run count followed by (gap to previous run end, run length - 1) pairs, so
+sorted IDs with many short gaps take one or two bytes per run instead of eight
+per cell. intersects/intersection/union work on the runs and never expand them
+back into individual cells.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+
+from benchmarking.cellstring import as_cellstring
+
+_EMPTY = np.empty(0, dtype=np.int64)
+_VARINT_MAX_BYTES = 10
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    """LEB128 encoding of non-negative integers, vectorized over 7-bit groups."""
+    values = values.astype(np.uint64, copy=False)
+    if values.size == 0:
+        return b""
+    groups = np.empty((values.size, _VARINT_MAX_BYTES), dtype=np.uint8)
+    remaining = values.copy()
+    for position in range(_VARINT_MAX_BYTES):
+        groups[:, position] = (remaining & np.uint64(0x7F)).astype(np.uint8)
+        remaining >>= np.uint64(7)
+    # Number of bytes per value: one, plus one per additional non-empty 7-bit group.
+    significant = np.maximum(1, _VARINT_MAX_BYTES - np.argmax(groups[:, ::-1] != 0, axis=1))
+    significant[values == 0] = 1
+    used = np.arange(_VARINT_MAX_BYTES) < significant[:, None]
+    continuation = np.arange(_VARINT_MAX_BYTES) < (significant - 1)[:, None]
+    groups[continuation] |= 0x80
+    return groups[used].tobytes()
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return _EMPTY
+    last = (raw & 0x80) == 0
+    value_of_byte = np.concatenate(([0], np.cumsum(last)[:-1]))
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    shift = (np.arange(raw.size) - starts[value_of_byte]) * 7
+    payload = (raw & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.add.reduceat(payload, starts).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class CompactCellString:
+    """Sorted, disjoint, non-adjacent runs: cells starts[i] .. ends[i] - 1."""
+
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @classmethod
+    def encode(cls, cells: Iterable[int] | np.ndarray | None) -> "CompactCellString":
+        cells = as_cellstring(cells)
+        if cells.size == 0:
+            return cls(_EMPTY, _EMPTY)
+        breaks = np.flatnonzero(np.diff(cells) != 1) + 1
+        run_starts = np.concatenate(([0], breaks))
+        run_ends = np.concatenate((breaks, [cells.size]))
+        return cls(cells[run_starts], cells[run_ends - 1] + 1)
+
+    def decode(self) -> np.ndarray:
+        lengths = self.ends - self.starts
+        if lengths.size == 0:
+            return _EMPTY
+        offsets = np.repeat(self.starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+
+    def __len__(self) -> int:
+        return int(self.starts.size)
+
+    @property
+    def cardinality(self) -> int:
+        return int((self.ends - self.starts).sum())
+
+    def to_bytes(self) -> bytes:
+        if self.starts.size == 0:
+            return _encode_varints(np.zeros(1, dtype=np.int64))
+        previous_ends = np.concatenate(([0], self.ends[:-1]))
+        fields = np.empty(2 * self.starts.size + 1, dtype=np.int64)
+        fields[0] = self.starts.size
+        fields[1::2] = self.starts - previous_ends
+        fields[2::2] = self.ends - self.starts - 1
+        return _encode_varints(fields)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactCellString":
+        fields = _decode_varints(data)
+        count = int(fields[0]) if fields.size else 0
+        if count == 0:
+            return cls(_EMPTY, _EMPTY)
+        gaps = fields[1:2 * count + 1:2]
+        lengths = fields[2:2 * count + 1:2] + 1
+        # start_i = end_{i-1} + gap_i, end_i = start_i + length_i
+        ends = np.cumsum(gaps + lengths)
+        return cls(ends - lengths, ends)
+
+
+def _overlapping_pairs(a: CompactCellString, b: CompactCellString):
+    """Index pairs (i, j) of overlapping runs a[i] and b[j], in ascending order."""
+    first = np.searchsorted(b.ends, a.starts, side="right")
+    last = np.searchsorted(b.starts, a.ends, side="left")
+    counts = np.maximum(last - first, 0)
+    left = np.repeat(np.arange(a.starts.size), counts)
+    if left.size == 0:
+        return left, left
+    run_offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    right = np.arange(left.size) - np.repeat(run_offsets, counts) + np.repeat(first, counts)
+    return left, right
+
+
+def compact_intersects(a: CompactCellString, b: CompactCellString) -> bool:
+    if len(a) == 0 or len(b) == 0 or a.ends[-1] <= b.starts[0] or b.ends[-1] <= a.starts[0]:
+        return False
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    idx = np.searchsorted(large.ends, small.starts, side="right")
+    inside = idx < large.starts.size
+    return bool((large.starts[idx[inside]] < small.ends[inside]).any())
+
+
+def compact_intersection(a: CompactCellString, b: CompactCellString) -> CompactCellString:
+    left, right = _overlapping_pairs(a, b)
+    if left.size == 0:
+        return CompactCellString(_EMPTY, _EMPTY)
+    return CompactCellString(
+        np.maximum(a.starts[left], b.starts[right]),
+        np.minimum(a.ends[left], b.ends[right]),
+    )
+
+
+def compact_intersection_cardinality(a: CompactCellString, b: CompactCellString) -> int:
+    return compact_intersection(a, b).cardinality
+
+
+def compact_union(a: CompactCellString, b: CompactCellString) -> CompactCellString:
+    return compact_union_agg([a, b])
+
+
+def compact_union_agg(cellstrings: Iterable[CompactCellString]) -> CompactCellString:
+    parts: List[CompactCellString] = [cells for cells in cellstrings if len(cells)]
+    if not parts:
+        return CompactCellString(_EMPTY, _EMPTY)
+    starts = np.concatenate([part.starts for part in parts])
+    ends = np.concatenate([part.ends for part in parts])
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # A run opens a new merged run unless it overlaps or touches everything before it.
+    new_run = np.concatenate(([True], starts[1:] > reach[:-1]))
+    run_starts = np.flatnonzero(new_run)
+    return CompactCellString(starts[run_starts], np.maximum.reduceat(ends, run_starts))
+
+
+def compact_difference(a: CompactCellString, b: CompactCellString) -> CompactCellString:
+    if len(a) == 0 or len(b) == 0:
+        return a
+    # a \ b = a ∩ (gaps between the runs of b, bounded by a's extent)
+    gap_starts = np.concatenate(([a.starts[0]], b.ends))
+    gap_ends = np.concatenate((b.starts, [a.ends[-1]]))
+    keep = gap_starts < gap_ends
+    return compact_intersection(a, CompactCellString(gap_starts[keep], gap_ends[keep]))
+
+
+def compact_contains(a: CompactCellString, b: CompactCellString) -> bool:
+    return compact_intersection_cardinality(a, b) == b.cardinality
@@ -0,0 +1,111 @@
+"""Storage and speed of run-length encoded cellstrings against the plain arrays.
+
+For trajectory_cs, trajectory_supercover_cs and stop_cs at every zoom it reports
+the on-disk size of the array column (sum of pg_column_size), the size of the
+same cellstrings as CompactCellString varint bytes, and the median time of
+intersects / intersection / union over random row pairs on NumPy arrays versus
+directly on the runs. Run results are decoded back to cell arrays outside the
+timed operation (the decode time is reported separately) and checked against the
+array results.
+
+    python -m benchmarking.compact_cellstring_benchmark [pairs]
+"""
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarking.cellstring import cst_intersection, cst_intersects, cst_union, fetch_cellstring_table
+from benchmarking.compact_cellstring import (
+    CompactCellString,
+    compact_intersection,
+    compact_intersects,
+    compact_union,
+)
+from benchmarking.connect import connect_to_db
+from benchmarking.core import median_or_zero
+
+ZOOM_LEVELS = ["z13", "z17", "z21"]
+# table -> key column
+TABLES = {
+    "prototype2.trajectory_cs": "trajectory_id",
+    "prototype2.trajectory_supercover_cs": "trajectory_id",
+    "prototype2.stop_cs": "stop_id",
+}
+OPERATIONS: Dict[str, Tuple[Callable, Callable]] = {
+    "intersects": (cst_intersects, compact_intersects),
+    "intersection": (cst_intersection, compact_intersection),
+    "union": (cst_union, compact_union),
+}
+
+
+def _column_bytes(cur, table: str, zoom: str) -> int:
+    cur.execute(f"SELECT COALESCE(SUM(pg_column_size(cellstring_{zoom})), 0) FROM {table}")
+    return int(cur.fetchone()[0])
+
+
+def _time_ms(operation: Callable, a, b) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = operation(a, b)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def run(pair_count: int, seed: int = 42) -> None:
+    rng = np.random.default_rng(seed)
+    conn = connect_to_db()
+    try:
+        for table_name, key_column in TABLES.items():
+            for zoom in ZOOM_LEVELS:
+                with conn.cursor() as cur:
+                    array_bytes = _column_bytes(cur, table_name, zoom)
+                table = fetch_cellstring_table(conn, table_name, zoom, key_column=key_column, group_column=None)
+                if len(table) == 0:
+                    print(f"\n{table_name} {zoom}: empty, skipped")
+                    continue
+
+                start = time.perf_counter()
+                compact = [CompactCellString.encode(table.row(position)) for position in range(len(table))]
+                encode_ms = (time.perf_counter() - start) * 1000.0
+                compact_bytes = sum(len(cells.to_bytes()) for cells in compact)
+                runs = sum(len(cells) for cells in compact)
+
+                print(
+                    f"\n{table_name} {zoom}: rows={len(table)}, cells={table.cells.size}, runs={runs} "
+                    f"({round(table.cells.size / max(runs, 1), 2)} cells/run), encode_ms={round(encode_ms, 3)}"
+                )
+                print(
+                    f"  Storage: array column={array_bytes} B, compact={compact_bytes} B "
+                    f"(ratio {round(array_bytes / max(compact_bytes, 1), 2)}x)"
+                )
+
+                pairs = rng.integers(0, len(table), size=(pair_count, 2))
+                for name, (array_operation, compact_operation) in OPERATIONS.items():
+                    array_times: List[float] = []
+                    compact_times: List[float] = []
+                    decode_times: List[float] = []
+                    mismatches = 0
+                    for left, right in pairs:
+                        expected, array_ms = _time_ms(array_operation, table.row(left), table.row(right))
+                        found, compact_ms = _time_ms(compact_operation, compact[left], compact[right])
+                        array_times.append(array_ms)
+                        compact_times.append(compact_ms)
+                        if isinstance(found, CompactCellString):
+                            start = time.perf_counter()
+                            found = found.decode()
+                            decode_times.append((time.perf_counter() - start) * 1000.0)
+                        if not np.array_equal(np.asarray(expected), np.asarray(found)):
+                            mismatches += 1
+                    decode = f", decode ms(median)={median_or_zero(decode_times)}" if decode_times else ""
+                    print(
+                        f"  {name}: array ms(median)={median_or_zero(array_times)}, "
+                        f"compact ms(median)={median_or_zero(compact_times)}{decode}, mismatches={mismatches}"
+                    )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -1,6 +1,9 @@
 import psycopg
 import sys
 import os
+from contextlib import contextmanager
+from queue import Queue
+from typing import Iterator, List
 
 
 def connect_to_db() -> psycopg.Connection:
@@ -13,4 +16,56 @@ def connect_to_db() -> psycopg.Connection:
     # Ensure DISCARD ALL is allowed and prevent psycopg3 from using prepared statements.
     conn.autocommit = True
     conn.prepare_threshold = None  # disable server-side prepared statements
-    return conn
\ No newline at end of file
+    return conn
+
+
+async def connect_to_db_async() -> psycopg.AsyncConnection:
+    """Async counterpart of connect_to_db(), configured the same way."""
+    db_url = os.getenv('DATABASE_URL')
+
+    if not db_url:
+        sys.exit("DATABASE_URL not defined in .env file")
+
+    conn = await psycopg.AsyncConnection.connect(db_url, autocommit=True)
+    conn.prepare_threshold = None  # disable server-side prepared statements
+    return conn
+
+
+class ConnectionPool:
+    """Fixed-size pool of benchmark connections, each configured like connect_to_db()."""
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.size = size
+        self._connections: List[psycopg.Connection] = []
+        self._idle: Queue = Queue()
+        try:
+            for _ in range(size):
+                conn = connect_to_db()
+                self._connections.append(conn)
+                self._idle.put(conn)
+        except Exception:
+            self.close()
+            raise
+
+    @contextmanager
+    def cursor(self) -> Iterator[psycopg.Cursor]:
+        # Blocks until a connection is free, so at most `size` queries are in flight.
+        conn = self._idle.get()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+        finally:
+            self._idle.put(conn)
+
+    def each_cursor(self) -> Iterator[psycopg.Cursor]:
+        # Only while no pooled query is in flight.
+        for conn in self._connections:
+            with conn.cursor() as cur:
+                yield cur
+
+    def close(self) -> None:
+        for conn in self._connections:
+            conn.close()
+        self._connections.clear()
@@ -1,12 +1,96 @@
 from __future__ import annotations
 
 import json
+import re
 import time
 from collections import defaultdict
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
 from statistics import median
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg
+
+from benchmarking.adaptive import (
+    AdaptiveRepeats,
+    AdaptiveState,
+    bootstrap_median_ci,
+    repetitions,
+    validate as validate_adaptive,
+)
+from benchmarking.baseline_cache import BaselineCache, relations_read, tables_in
+from benchmarking.cache_state import CACHE_STATES, reset_cache
+from benchmarking.connect import ConnectionPool, connect_to_db
+from benchmarking.plans import IO_FIELDS, CapturedPlan, capture_plan, parse_auto_explain, plan_sample, relation_names
+
+# serial: one cursor, one sample at a time (default).
+# parallel: per-ID samples are spread over a pool of `parallel_workers` connections.
+# serial_isolated: one sample at a time on a dedicated connection opened for the run, so the main
+#                  connection's session state and concurrent load do not affect latency.
+EXECUTION_MODES = ("serial", "parallel", "serial_isolated")
+
+# two_pass: rows and wall time from one execution, Execution Time from a second EXPLAIN ANALYZE run (default).
+# single_pass: rows, wall time and server-side execution time from the same execution, via auto_explain.
+TIMING_MODES = ("two_pass", "single_pass")
+
+# auto_explain is configured per session (DISCARD ALL resets it). log_level = notice sends the
+# plan to the client instead of the server log, so no log file access is needed.
+AUTO_EXPLAIN_SETTINGS = (
+    "LOAD 'auto_explain'",
+    "SET auto_explain.log_min_duration = 0",
+    "SET auto_explain.log_analyze = on",
+    "SET auto_explain.log_buffers = on",
+    "SET auto_explain.log_timing = on",
+    "SET auto_explain.log_nested_statements = off",
+    "SET auto_explain.log_format = 'json'",
+    "SET auto_explain.log_level = 'notice'",
+)
+AUTO_EXPLAIN_DURATION_PATTERN = re.compile(r"duration:\s*([0-9.]+)\s*ms")
+
+# TOAST heap and TOAST index blocks touched in the current transaction, over the tables a query reads
+# (partitioned tables expanded to their partitions, which own the TOAST tables).
+# EXPLAIN BUFFERS does not separate TOAST from the main relation, the xact stats counters do.
+TOAST_BLOCKS_SQL = """
+WITH tables AS (
+    SELECT tree.relid AS oid
+    FROM unnest(%s::text[]) AS name
+    CROSS JOIN LATERAL pg_partition_tree(to_regclass(name)) AS tree
+)
+SELECT
+    COALESCE(sum(pg_stat_get_xact_blocks_hit(rel.oid)), 0)::float8,
+    COALESCE(sum(pg_stat_get_xact_blocks_fetched(rel.oid) - pg_stat_get_xact_blocks_hit(rel.oid)), 0)::float8
+FROM pg_class AS tab
+JOIN pg_class AS rel
+  ON rel.oid = tab.reltoastrelid
+  OR rel.oid IN (SELECT indexrelid FROM pg_index WHERE indrelid = tab.reltoastrelid)
+WHERE tab.oid IN (SELECT oid FROM tables)
+  AND tab.reltoastrelid <> 0
+"""
+
+# Batch mode runs a whole ID sample as one statement. The per-ID query becomes a LATERAL subquery over
+# the ID array; the clock_timestamp() laterals before and after it depend on the previous lateral, so
+# the nested loop evaluates them in order for every ID and their difference is the per-ID time.
+BATCH_SQL_TEMPLATE = """
+SELECT
+    ids.sample_id,
+    EXTRACT(EPOCH FROM (finished.at - started.at)) * 1000.0 AS exec_ms,
+    result.sample_rows
+FROM unnest(%s::bigint[]) WITH ORDINALITY AS ids(sample_id, ord)
+CROSS JOIN LATERAL (
+    SELECT clock_timestamp() AS at WHERE ids.sample_id IS NOT NULL OFFSET 0
+) AS started
+CROSS JOIN LATERAL (
+    SELECT COALESCE(json_agg(per_id), '[]'::json) AS sample_rows
+    FROM ({sample_sql}) AS per_id
+    WHERE started.at IS NOT NULL
+) AS result
+CROSS JOIN LATERAL (
+    SELECT clock_timestamp() AS at WHERE result.sample_rows IS NOT NULL OFFSET 0
+) AS finished
+ORDER BY ids.ord;
+"""
 
 
 @dataclass(frozen=True)
@@ -22,6 +106,13 @@ class TimeBenchmark:
     area_ids: List[int] = field(default_factory=list)
     use_area_ids: bool = False
     timeout_seconds: int = 120
+    execution_mode: str = "serial"
+    parallel_workers: int = 4
+    timing_mode: str = "two_pass"
+    batch_ids: bool = False
+    stream_itersize: Optional[int] = None
+    cache_state: str = "warm"  # warm / first_touch / cold, see the README
+    adaptive: Optional[AdaptiveRepeats] = None  # replaces `repeats`, see benchmarking/adaptive.py
 
 
 @dataclass(frozen=True)
@@ -34,6 +125,25 @@ class ValueBenchmark:
     params: Tuple[Any, ...] = tuple()
     capture_rows: bool = False
     row_field_names: Optional[List[str]] = None
+    stream_itersize: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class CascadeBenchmark:
+    """Filter-and-refine benchmark: `stage_sql` runs once per stage, each stage refining the previous one's survivors.
+
+    The first placeholder of `stage_sql` is the candidate id array (NULL for the first stage);
+    `{zoom}` / `{zoom_level}` are filled per stage. The last stage is compared against `st_sql`.
+    """
+    name: str
+    st_sql: str
+    stage_sql: str
+    params: Tuple[Any, ...] = tuple()
+    repeats: int = 5
+    stages: List[str] = field(default_factory=lambda: ["z13", "z17", "z21"])
+    area_ids: List[int] = field(default_factory=list)
+    use_area_ids: bool = False
+    timeout_seconds: int = 120
 
 
 @dataclass
@@ -43,6 +153,23 @@ class RunOutcome:
     rows: List[Tuple]
     timed_out: bool = False
     samples: List[Dict[str, Any]] = field(default_factory=list)
+    # Per-ID runs keep only sorted key arrays (first column) instead of rows: the distinct keys of the
+    # whole run, and one array per entry of `samples` for per-sample false positive/negative counts.
+    keys: Optional[np.ndarray] = None
+    sample_keys: List[np.ndarray] = field(default_factory=list)
+    # Distinct plan shapes by hash (see benchmarking/plans.py). Per-ID samples carry their plan hash and
+    # per-node actuals; repeated runs keep one entry per measured execution in `plan_samples`.
+    plans: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    plan_samples: List[Dict[str, Any]] = field(default_factory=list)
+    # Median per IO_FIELDS entry (buffer blocks, TOAST blocks, rows removed by filter) over the executions.
+    io_med: Dict[str, float] = field(default_factory=dict)
+    cache_state: str = "warm"
+    # Repeated runs: every measured exec_ms; with an adaptive repeat count also the bootstrap CI of
+    # their median and why repeating stopped (see benchmarking/adaptive.py). Runs aggregated over
+    # areas merge the areas' samples, with the CI over the merged samples and each area's stop reason.
+    exec_ms_samples: List[float] = field(default_factory=list)
+    exec_ms_ci: Optional[Tuple[float, float]] = None
+    stop_reason: Optional[str] = None
 
 
 @dataclass
@@ -56,6 +183,17 @@ class TimeBenchmarkResult:
     match_counts: Dict[str, int] = field(default_factory=dict)
 
 
+@dataclass
+class CascadeBenchmarkResult:
+    name: str
+    st: RunOutcome
+    stage_results: Dict[str, RunOutcome]
+    candidate_counts: Dict[str, int]
+    false_positives: int
+    false_negatives: int
+    per_area_results: Dict[int, Dict[str, RunOutcome]] = field(default_factory=dict)
+
+
 @dataclass
 class ValueBenchmarkResult:
     name: str
@@ -71,37 +209,141 @@ def _discard_and_set(cur, statement_timeout_seconds: int | None = None) -> None:
         cur.execute(f"SET statement_timeout = '{statement_timeout_seconds}s'")
 
 
-def _explain_analyze_ms(
+def _explain_analyze(
         cur, sql: str, params: Sequence[Any], statement_timeout_seconds: int | None = None
-) -> Tuple[float, float]:
+) -> CapturedPlan:
     _discard_and_set(cur, statement_timeout_seconds)
-    cur.execute("EXPLAIN (ANALYZE, BUFFERS, TIMING ON, FORMAT JSON) " + sql, params)
-    payload = cur.fetchone()[0]
-    data = payload[0] if isinstance(payload, list) else json.loads(payload)[0]
-    return float(data.get("Planning Time", 0.0)), float(data.get("Execution Time", 0.0))
+    # One transaction, so the xact stats counters read afterwards cover exactly this execution.
+    with cur.connection.transaction():
+        # VERBOSE only adds the schema of every scanned relation (and output lists) to the plan.
+        cur.execute("EXPLAIN (ANALYZE, VERBOSE, BUFFERS, TIMING ON, FORMAT JSON) " + sql, params)
+        payload = cur.fetchone()[0]
+        data = payload[0] if isinstance(payload, list) else json.loads(payload)[0]
+        tables = sorted(set(relation_names(data)) | set(tables_in(sql)))
+        cur.execute(TOAST_BLOCKS_SQL, (tables,))
+        toast_hit, toast_read = cur.fetchone()
+    plan = capture_plan(data)
+    return replace(plan, io={**plan.io, "toast_hit": float(toast_hit), "toast_read": float(toast_read)})
 
 
-def _fetch_all_with_wall_ms(
-        cur, sql: str, params: Sequence[Any], statement_timeout_seconds: int | None = None
+def _iter_rows(cur, sql: str, params: Any, stream_itersize: int | None = None) -> Iterator[Tuple]:
+    """Yield the result rows; with `stream_itersize` they come from a named server-side cursor in chunks."""
+    if stream_itersize is None:
+        cur.execute(sql, params)
+        yield from cur.fetchall()
+        return
+    conn = cur.connection
+    with conn.transaction():
+        # Cursors are planned for fast start by default; plan them like the plain query instead.
+        cur.execute("SET LOCAL cursor_tuple_fraction = 1.0")
+        with conn.cursor(name="benchmark_stream") as stream_cur:
+            stream_cur.itersize = stream_itersize
+            stream_cur.execute(sql.strip().rstrip(";"), params)
+            yield from stream_cur
+
+
+def _collect_rows(cur, sql: str, params: Sequence[Any], stream_itersize: int | None = None) -> List[Tuple]:
+    if stream_itersize is None:
+        cur.execute(sql, params)
+        return cur.fetchall()
+    # Only the first column is used for false positive/negative accounting, so keep just the distinct keys.
+    keys = {row[0] for row in _iter_rows(cur, sql, params, stream_itersize)}
+    return [(key,) for key in keys]
+
+
+def fetch_all_with_wall_ms(
+        cur,
+        sql: str,
+        params: Sequence[Any],
+        statement_timeout_seconds: int | None = None,
+        stream_itersize: int | None = None,
 ) -> Tuple[List[Tuple], float]:
     _discard_and_set(cur, statement_timeout_seconds)
     start = time.perf_counter()
-    cur.execute(sql, params)
-    rows = cur.fetchall()
+    rows = _collect_rows(cur, sql, params, stream_itersize)
     return rows, (time.perf_counter() - start) * 1000.0
 
 
-def _warmup(cur, sql: str, params: Sequence[Any], statement_timeout_seconds: int | None = None) -> None:
+def _fetch_all_with_server_ms(
+        cur,
+        sql: str,
+        params: Sequence[Any],
+        statement_timeout_seconds: int | None = None,
+        stream_itersize: int | None = None,
+) -> Tuple[List[Tuple], float, float, Optional[CapturedPlan]]:
+    _discard_and_set(cur, statement_timeout_seconds)
+    for statement in AUTO_EXPLAIN_SETTINGS:
+        cur.execute(statement)
+
+    notices: List[str] = []
+
+    def capture(diagnostic) -> None:
+        notices.append(diagnostic.message_primary or "")
+
+    cur.connection.add_notice_handler(capture)
+    try:
+        start = time.perf_counter()
+        rows = _collect_rows(cur, sql, params, stream_itersize)
+        wall_ms = (time.perf_counter() - start) * 1000.0
+    finally:
+        cur.connection.remove_notice_handler(capture)
+
+    exec_ms = 0.0
+    plan: Optional[CapturedPlan] = None
+    for message in notices:
+        match = AUTO_EXPLAIN_DURATION_PATTERN.search(message)
+        if match:
+            exec_ms = float(match.group(1))
+            explain = parse_auto_explain(message)
+            plan = capture_plan(explain) if explain is not None else None
+    return rows, wall_ms, exec_ms, plan
+
+
+def _supports_single_pass(cur) -> bool:
+    # Run the whole setup: without session_preload_libraries a non-superuser can LOAD the module
+    # but may still be refused the SET auto_explain.* statements.
+    try:
+        for statement in AUTO_EXPLAIN_SETTINGS:
+            cur.execute(statement)
+        return True
+    except psycopg.Error as exc:
+        print(f"auto_explain is not available ({exc}); falling back to two_pass timing.")
+        return False
+    finally:
+        _discard_and_set(cur)
+
+
+def _warmup(
+        cur,
+        sql: str,
+        params: Sequence[Any],
+        statement_timeout_seconds: int | None = None,
+        stream_itersize: int | None = None,
+) -> None:
     _discard_and_set(cur, statement_timeout_seconds)
-    cur.execute(sql, params)
-    cur.fetchall()
+    for _ in _iter_rows(cur, sql, params, stream_itersize):
+        pass
+
+
+def format_zoom(sql: str, zoom: str) -> str:
+    """Fill `{zoom}` ("z21") and `{zoom_level}` (21) in a per-zoom SQL template."""
+    return sql.format(zoom=zoom, zoom_level=int(zoom.replace("z", "")))
 
 
-def _median_or_zero(values: Iterable[float]) -> float:
+def median_or_zero(values: Iterable[float]) -> float:
     values = list(values)
     return round(median(values), 3) if values else 0.0
 
 
+def _median_io(counts: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    counts = [entry for entry in counts if entry]
+    return {
+        name: median_or_zero(entry[name] for entry in counts if name in entry)
+        for name in IO_FIELDS
+        if any(name in entry for entry in counts)
+    }
+
+
 def _normalize_row_value(value: Any) -> Any:
     if isinstance(value, Decimal):
         return float(value)
@@ -120,17 +362,180 @@ def _row_to_mapping(row: Sequence[Any], field_names: Optional[List[str]]) -> Dic
     return mapping
 
 
-def _aggregate_runs(runs: List[RunOutcome], rows: List[Tuple]) -> RunOutcome:
+def _aggregate_runs(runs: List[RunOutcome], rows: List[Tuple], adaptive: AdaptiveRepeats | None = None) -> RunOutcome:
+    exec_ms_samples = [value for run in runs for value in run.exec_ms_samples]
+    exec_ms_ci = None
+    stop_reason = None
+    if adaptive is not None and runs:
+        if len(exec_ms_samples) >= 2:
+            exec_ms_ci = bootstrap_median_ci(exec_ms_samples, adaptive.confidence, adaptive.resamples, adaptive.seed)
+        stop_reason = ", ".join(sorted({run.stop_reason for run in runs if run.stop_reason})) or None
     return RunOutcome(
-        exec_ms_med=_median_or_zero(r.exec_ms_med for r in runs),
-        wall_ms_med=_median_or_zero(r.wall_ms_med for r in runs),
+        exec_ms_med=median_or_zero(r.exec_ms_med for r in runs),
+        wall_ms_med=median_or_zero(r.wall_ms_med for r in runs),
         rows=rows,
         samples=[sample for run in runs for sample in run.samples],
+        plans={plan_hash: shape for run in runs for plan_hash, shape in run.plans.items()},
+        plan_samples=[sample for run in runs for sample in run.plan_samples],
+        io_med=_median_io(r.io_med for r in runs),
+        cache_state=runs[0].cache_state if runs else "warm",
+        exec_ms_samples=exec_ms_samples,
+        exec_ms_ci=exec_ms_ci,
+        stop_reason=stop_reason,
     )
 
 
-def _keyset(rows: Iterable[Tuple]) -> set:
-    return {r[0] for r in rows}
+def _key_array(keys: Iterable[Any]) -> np.ndarray:
+    """Sorted distinct keys, as int64 when possible so set differences stay vectorized."""
+    keys = list(keys)
+    # Only exact integers take the int64 path; casting floats, Decimals or numeric strings would merge distinct keys.
+    if all(isinstance(key, (int, np.integer)) and not isinstance(key, bool) for key in keys):
+        try:
+            return np.unique(np.asarray(keys, dtype=np.int64))
+        except OverflowError:
+            pass
+    return np.unique(np.asarray([repr(key) for key in keys]))
+
+
+def _run_keys(run: RunOutcome) -> np.ndarray:
+    if run.keys is not None:
+        return run.keys
+    return _key_array(row[0] for row in run.rows)
+
+
+def _count_missing(keys: np.ndarray, reference: np.ndarray) -> int:
+    """|keys \\ reference| for two sorted distinct key arrays."""
+    if keys.size == 0 or reference.size == 0:
+        return int(keys.size)
+    return int(np.setdiff1d(keys, reference, assume_unique=True).size)
+
+
+def _merge_key_arrays(arrays: List[np.ndarray]) -> np.ndarray:
+    nonempty = [array for array in arrays if array.size]
+    if not nonempty:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(nonempty))
+
+
+def _annotate_sample_accuracy(st_out: RunOutcome, cst_out: RunOutcome) -> None:
+    """Add per-sample false positive/negative counts to the CST_ samples, matched by position."""
+    if not (len(st_out.sample_keys) == len(cst_out.sample_keys) == len(cst_out.samples)) or not cst_out.samples:
+        return
+    for sample, st_keys, cst_keys in zip(cst_out.samples, st_out.sample_keys, cst_out.sample_keys):
+        sample["false_positives"] = _count_missing(cst_keys, st_keys)
+        sample["false_negatives"] = _count_missing(st_keys, cst_keys)
+        sample["match_count"] = int(cst_keys.size)
+
+
+# Key array, wall ms, exec ms and the captured plan (None when the timing mode yields no plan).
+SampleMeasurement = Tuple[np.ndarray, float, float, Optional[CapturedPlan]]
+
+
+def _measure_sample(
+        cur,
+        sql: str,
+        params: Sequence[Any],
+        timeout_seconds: int | None,
+        timing_mode: str = "two_pass",
+        stream_itersize: int | None = None,
+        cache_state: str = "warm",
+) -> SampleMeasurement:
+    """Measure one per-ID sample; rows are reduced to their key array right away."""
+    if cache_state == "cold":
+        reset_cache(cur, sql, params)
+    if timing_mode == "single_pass":
+        rows, wall_ms, exec_ms, plan = _fetch_all_with_server_ms(cur, sql, params, timeout_seconds, stream_itersize)
+    elif cache_state == "first_touch":
+        # The EXPLAIN ANALYZE run gets the first touch, so exec_ms is the first-execution time.
+        plan = _explain_analyze(cur, sql, params, timeout_seconds)
+        rows, wall_ms = fetch_all_with_wall_ms(cur, sql, params, timeout_seconds, stream_itersize)
+        exec_ms = plan.execution_ms
+    else:
+        rows, wall_ms = fetch_all_with_wall_ms(cur, sql, params, timeout_seconds, stream_itersize)
+        if cache_state == "cold":
+            reset_cache(cur, sql, params)
+        plan = _explain_analyze(cur, sql, params)
+        exec_ms = plan.execution_ms
+    return _key_array(row[0] for row in rows), wall_ms, exec_ms, plan
+
+
+def _repetition_range(
+        repeats: int, adaptive: AdaptiveRepeats | None, exec_times: List[float], state: AdaptiveState
+) -> Iterable[int]:
+    if adaptive is None:
+        return range(repeats)
+    return repetitions(adaptive, exec_times, state)
+
+
+def _to_batch_sql(sql: str) -> str:
+    # The sample ID is always the first placeholder of a per-ID query.
+    sample_sql = sql.strip().rstrip(";").replace("%s", "ids.sample_id", 1)
+    return BATCH_SQL_TEMPLATE.format(sample_sql=sample_sql)
+
+
+def _measure_batch(
+        cur,
+        sql: str,
+        sample_ids: List[int],
+        params: Sequence[Any],
+        timeout_seconds: int | None,
+        cache_state: str = "warm",
+) -> List[SampleMeasurement]:
+    """Run all sample IDs in one round-trip; wall time is amortized evenly over the IDs (no per-ID plans)."""
+    batch_sql = _to_batch_sql(sql)
+    batch_timeout = timeout_seconds * len(sample_ids) if timeout_seconds is not None else None
+    if cache_state == "warm":
+        _warmup(cur, batch_sql, ([sample_ids[0]],) + tuple(params), timeout_seconds)
+    elif cache_state == "cold":
+        reset_cache(cur, batch_sql, (list(sample_ids),) + tuple(params))
+    batch_rows, wall_ms = fetch_all_with_wall_ms(cur, batch_sql, (list(sample_ids),) + tuple(params), batch_timeout)
+    wall_per_id = wall_ms / len(sample_ids)
+    return [
+        (_key_array(next(iter(row.values())) for row in sample_rows), wall_per_id, float(exec_ms), None)
+        for _, exec_ms, sample_rows in batch_rows
+    ]
+
+
+def _measure_samples(
+        cur,
+        sql: str,
+        param_sets: List[Tuple[Any, ...]],
+        timeout_seconds: int | None,
+        execution_mode: str,
+        pool: ConnectionPool | None,
+        timing_mode: str = "two_pass",
+        stream_itersize: int | None = None,
+        cache_state: str = "warm",
+) -> List[SampleMeasurement]:
+    """Measure every parameter set and return the results in input order."""
+    if execution_mode == "parallel" and pool is not None:
+        if cache_state == "warm":
+            # The main cursor's warmup does not reach the pooled backends; warm each like the serial path.
+            for worker_cur in pool.each_cursor():
+                _warmup(worker_cur, sql, param_sets[0], timeout_seconds, stream_itersize)
+
+        def measure_on_pool(current_params: Tuple[Any, ...]) -> SampleMeasurement:
+            with pool.cursor() as worker_cur:
+                return _measure_sample(worker_cur, sql, current_params, timeout_seconds, timing_mode, stream_itersize, cache_state)
+
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            return list(executor.map(measure_on_pool, param_sets))
+
+    if execution_mode == "serial_isolated":
+        # Opened once, so no sample's wall time includes connection startup or a cold relcache.
+        conn = connect_to_db()
+        try:
+            with conn.cursor() as isolated_cur:
+                if cache_state == "warm":
+                    _warmup(isolated_cur, sql, param_sets[0], timeout_seconds, stream_itersize)
+                return [
+                    _measure_sample(isolated_cur, sql, current_params, timeout_seconds, timing_mode, stream_itersize, cache_state)
+                    for current_params in param_sets
+                ]
+        finally:
+            conn.close()
+
+    return [_measure_sample(cur, sql, current_params, timeout_seconds, timing_mode, stream_itersize, cache_state) for current_params in param_sets]
 
 
 def _execute_random_or_repeated_queries(
@@ -143,6 +548,13 @@ def _execute_random_or_repeated_queries(
         trajectory_ids: List[int] | None = None,
         stop_ids: List[int] | None = None,
         sample_label: str | None = None,
+        execution_mode: str = "serial",
+        pool: ConnectionPool | None = None,
+        timing_mode: str = "two_pass",
+        batch_ids: bool = False,
+        stream_itersize: int | None = None,
+        cache_state: str = "warm",
+        adaptive: AdaptiveRepeats | None = None,
 ) -> RunOutcome:
     if trajectory_ids is not None and not trajectory_ids:
         return RunOutcome(0.0, 0.0, [])
@@ -151,49 +563,110 @@ def _execute_random_or_repeated_queries(
     wall_times: List[float] = []
     collected_rows: List[Tuple] = []
     sample_records: List[Dict[str, Any]] = []
+    plans: Dict[str, List[Dict[str, Any]]] = {}
+    plan_samples: List[Dict[str, Any]] = []
+    io_counts: List[Dict[str, float]] = []
+    adaptive_state = AdaptiveState()
+
+    def record_plan(plan: Optional[CapturedPlan]) -> Dict[str, Any]:
+        if plan is None:
+            return {}
+        plans.setdefault(plan.plan_hash, plan.shape)
+        io_counts.append(plan.io)
+        return plan_sample(plan)
 
     try:
-        if trajectory_ids is not None:
-            first_params = (trajectory_ids[0],) + params
-            _warmup(cur, sql, first_params, timeout_seconds)
-
-            for trajectory_id in trajectory_ids:
-                current_params = (trajectory_id,) + params
-                rows, wall_ms = _fetch_all_with_wall_ms(cur, sql, current_params, timeout_seconds)
-                _, exec_ms = _explain_analyze_ms(cur, sql, current_params)
+        if trajectory_ids is not None or stop_ids is not None:
+            id_field, sample_ids = (
+                ("trajectory_id", trajectory_ids) if trajectory_ids is not None else ("stop_id", stop_ids)
+            )
+            if batch_ids:
+                measured = _measure_batch(cur, sql, sample_ids, params, timeout_seconds, cache_state)
+            else:
+                if cache_state == "warm":
+                    first_params = (sample_ids[0],) + params
+                    _warmup(cur, sql, first_params, timeout_seconds, stream_itersize)
+
+                param_sets = [(sample_id,) + params for sample_id in sample_ids]
+                measured = _measure_samples(
+                    cur, sql, param_sets, timeout_seconds, execution_mode, pool, timing_mode, stream_itersize, cache_state
+                )
+            sample_keys: List[np.ndarray] = []
+            for sample_id, (keys, wall_ms, exec_ms, plan) in zip(sample_ids, measured):
                 exec_times.append(exec_ms)
                 wall_times.append(wall_ms)
-                collected_rows.extend(rows)
-                sample = {"trajectory_id": trajectory_id, "exec_ms": exec_ms}
+                sample_keys.append(keys)
+                sample = {id_field: sample_id, "exec_ms": exec_ms}
                 if sample_label:
                     sample["label"] = sample_label
+                sample.update(record_plan(plan))
                 sample_records.append(sample)
-        elif stop_ids is not None:
-            first_params = (stop_ids[0],) + params
-            _warmup(cur, sql, first_params, timeout_seconds)
-
-            for stop_id in stop_ids:
-                current_params = (stop_id,) + params
-                rows, wall_ms = _fetch_all_with_wall_ms(cur, sql, current_params, timeout_seconds)
-                _, exec_ms = _explain_analyze_ms(cur, sql, current_params)
-                exec_times.append(exec_ms)
+
+            _discard_and_set(cur)
+            return RunOutcome(
+                median_or_zero(exec_times),
+                median_or_zero(wall_times),
+                [],
+                samples=sample_records,
+                keys=_merge_key_arrays(sample_keys),
+                sample_keys=sample_keys,
+                plans=plans,
+                io_med=_median_io(io_counts),
+                cache_state=cache_state,
+            )
+        elif timing_mode == "single_pass":
+            if cache_state == "warm":
+                _warmup(cur, sql, params, timeout_seconds, stream_itersize)
+            if cache_state == "first_touch":
+                repetition_range: Iterable[int] = range(1)
+            else:
+                repetition_range = _repetition_range(repeats, adaptive, exec_times, adaptive_state)
+            for _ in repetition_range:
+                if cache_state == "cold":
+                    reset_cache(cur, sql, params)
+                collected_rows, wall_ms, exec_ms, plan = _fetch_all_with_server_ms(
+                    cur, sql, params, timeout_seconds, stream_itersize
+                )
                 wall_times.append(wall_ms)
-                collected_rows.extend(rows)
-                sample = {"stop_id": stop_id, "exec_ms": exec_ms}
-                if sample_label:
-                    sample["label"] = sample_label
-                sample_records.append(sample)
+                exec_times.append(exec_ms)
+                if plan is not None:
+                    plan_samples.append({"exec_ms": exec_ms, **record_plan(plan)})
+        elif cache_state == "first_touch":
+            # Only one execution is a first touch; it goes to EXPLAIN ANALYZE, so wall_ms is a second touch.
+            plan = _explain_analyze(cur, sql, params, timeout_seconds)
+            exec_times.append(plan.execution_ms)
+            plan_samples.append({"exec_ms": plan.execution_ms, **record_plan(plan)})
+            collected_rows, wall_ms = fetch_all_with_wall_ms(cur, sql, params, timeout_seconds, stream_itersize)
+            wall_times.append(wall_ms)
         else:
-            _warmup(cur, sql, params, timeout_seconds)
-            rows, wall_ms = _fetch_all_with_wall_ms(cur, sql, params, timeout_seconds)
+            if cache_state == "warm":
+                _warmup(cur, sql, params, timeout_seconds, stream_itersize)
+            else:
+                reset_cache(cur, sql, params)
+            rows, wall_ms = fetch_all_with_wall_ms(cur, sql, params, timeout_seconds, stream_itersize)
             wall_times.append(wall_ms)
             collected_rows = rows
-            for _ in range(repeats):
-                _, exec_ms = _explain_analyze_ms(cur, sql, params)
-                exec_times.append(exec_ms)
+            for _ in _repetition_range(repeats, adaptive, exec_times, adaptive_state):
+                if cache_state == "cold":
+                    reset_cache(cur, sql, params)
+                plan = _explain_analyze(cur, sql, params)
+                exec_times.append(plan.execution_ms)
+                plan_samples.append({"exec_ms": plan.execution_ms, **record_plan(plan)})
 
         _discard_and_set(cur)
-        return RunOutcome(_median_or_zero(exec_times), _median_or_zero(wall_times), collected_rows, samples=sample_records)
+        return RunOutcome(
+            median_or_zero(exec_times),
+            median_or_zero(wall_times),
+            collected_rows,
+            samples=sample_records,
+            plans=plans,
+            plan_samples=plan_samples,
+            io_med=_median_io(io_counts),
+            cache_state=cache_state,
+            exec_ms_samples=exec_times,
+            exec_ms_ci=adaptive_state.ci,
+            stop_reason=adaptive_state.stop_reason,
+        )
     except Exception as exc:
         if timeout_seconds is None:
             raise
@@ -208,125 +681,204 @@ def _execute_random_or_repeated_queries(
         raise
 
 
-def run_time_benchmark(connection, bench: TimeBenchmark, trajectory_ids: List[int] | None = None, stop_ids: List[int] | None = None) -> TimeBenchmarkResult:
+def _run_baseline(
+        cur, sql: str, params: Sequence[Any], *, baseline_cache: BaselineCache | None = None, **kwargs: Any
+) -> RunOutcome:
+    """Run an ST_ baseline, reusing a cached run while the SQL, parameters, settings and data are unchanged."""
+    if baseline_cache is None:
+        return _execute_random_or_repeated_queries(cur, sql, params, **kwargs)
+    sample_ids = kwargs.get("trajectory_ids") if kwargs.get("trajectory_ids") is not None else kwargs.get("stop_ids")
+    if sample_ids is not None and not sample_ids:
+        return _execute_random_or_repeated_queries(cur, sql, params, **kwargs)
+    # Per-ID queries take the sample ID as their first parameter; one ID is enough to plan them.
+    plan_params = (sample_ids[0],) + tuple(params) if sample_ids else params
+    settings = {name: value for name, value in kwargs.items() if name != "pool"}
+    key = baseline_cache.key(cur, sql, params, settings, relations_read(cur, sql, plan_params))
+    cached = baseline_cache.get(key)
+    if cached is not None:
+        return cached
+    run = _execute_random_or_repeated_queries(cur, sql, params, **kwargs)
+    if not run.timed_out:
+        baseline_cache.put(key, run)
+    return run
+
+
+def _per_run_adaptive(bench: TimeBenchmark) -> AdaptiveRepeats | None:
+    """bench.adaptive with its time budget split evenly over the benchmark's repeated runs."""
+    if bench.adaptive is None or bench.with_trajectory_ids or bench.with_stop_ids:
+        return None
+    validate_adaptive(bench.adaptive)
+    runs_per_area = 1 + max(len(bench.zoom_levels), 1)
+    areas = len(bench.area_ids) if bench.use_area_ids and bench.area_ids else 1
+    return replace(bench.adaptive, time_budget_seconds=bench.adaptive.time_budget_seconds / (runs_per_area * areas))
+
+
+def run_time_benchmark(
+        connection,
+        bench: TimeBenchmark,
+        trajectory_ids: List[int] | None = None,
+        stop_ids: List[int] | None = None,
+        baseline_cache: BaselineCache | None = None,
+) -> TimeBenchmarkResult:
+    if bench.execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution_mode {bench.execution_mode!r}, expected one of {EXECUTION_MODES}")
+    if bench.timing_mode not in TIMING_MODES:
+        raise ValueError(f"Unknown timing_mode {bench.timing_mode!r}, expected one of {TIMING_MODES}")
+    if bench.cache_state not in CACHE_STATES:
+        raise ValueError(f"Unknown cache_state {bench.cache_state!r}, expected one of {CACHE_STATES}")
+    if bench.cache_state == "cold" and bench.execution_mode == "parallel":
+        raise ValueError("cache_state='cold' cannot run in parallel: each worker would evict the pages the others read")
+    if bench.batch_ids:
+        if not (bench.with_trajectory_ids or bench.with_stop_ids):
+            raise ValueError("batch_ids needs with_trajectory_ids or with_stop_ids")
+        if bench.execution_mode != "serial" or bench.timing_mode != "two_pass" or bench.stream_itersize is not None:
+            raise ValueError(
+                "batch_ids runs one serial statement; it cannot be combined with "
+                "execution_mode, single_pass timing or stream_itersize"
+            )
     connection.autocommit = True
     connection.prepare_threshold = None
     per_area_results: Dict[int, Dict[str, RunOutcome]] = {}
+    uses_sample_ids = bench.with_trajectory_ids or bench.with_stop_ids
+    pool = (
+        ConnectionPool(bench.parallel_workers)
+        if bench.execution_mode == "parallel" and uses_sample_ids and not bench.batch_ids
+        else None
+    )
 
-    with connection.cursor() as cur:
-        if bench.use_area_ids and bench.area_ids:
-            st_rows: List[Tuple] = []
-            valid_st_runs: List[RunOutcome] = []
-            cst_combined: Dict[str, List[Tuple]] = {zoom: [] for zoom in bench.zoom_levels}
-            cst_valid_runs: Dict[str, List[RunOutcome]] = {zoom: [] for zoom in bench.zoom_levels}
-
-            for area_id in bench.area_ids:
-                area_params = (area_id,) + bench.params
-                st_run = _execute_random_or_repeated_queries(
-                    cur, bench.st_sql, area_params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
-                )
-                per_area_results[area_id] = {"ST_": st_run}
-                if not st_run.timed_out:
-                    st_rows.extend(st_run.rows)
-                    valid_st_runs.append(st_run)
+    try:
+        with connection.cursor() as cur:
+            timing_mode = bench.timing_mode
+            if timing_mode == "single_pass" and not _supports_single_pass(cur):
+                timing_mode = "two_pass"
+            run_options = {
+                "execution_mode": bench.execution_mode,
+                "pool": pool,
+                "timing_mode": timing_mode,
+                "batch_ids": bench.batch_ids,
+                "stream_itersize": bench.stream_itersize,
+                "cache_state": bench.cache_state,
+                "adaptive": _per_run_adaptive(bench),
+            }
 
-                for zoom in bench.zoom_levels:
-                    sql = bench.cst_sql.format(zoom=zoom)
-                    cst_run = _execute_random_or_repeated_queries(
-                        cur, sql, area_params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
+            if bench.use_area_ids and bench.area_ids:
+                st_rows: List[Tuple] = []
+                valid_st_runs: List[RunOutcome] = []
+                cst_combined: Dict[str, List[Tuple]] = {zoom: [] for zoom in bench.zoom_levels}
+                cst_valid_runs: Dict[str, List[RunOutcome]] = {zoom: [] for zoom in bench.zoom_levels}
+
+                for area_id in bench.area_ids:
+                    area_params = (area_id,) + bench.params
+                    st_run = _run_baseline(
+                        cur,
+                        bench.st_sql,
+                        area_params,
+                        repeats=bench.repeats,
+                        timeout_seconds=bench.timeout_seconds,
+                        baseline_cache=baseline_cache,
+                        **run_options,
                     )
-                    per_area_results[area_id][f"CST_{zoom}"] = cst_run
-                    if not cst_run.timed_out:
-                        cst_combined[zoom].extend(cst_run.rows)
-                        cst_valid_runs[zoom].append(cst_run)
-
-            st_out = _aggregate_runs(valid_st_runs, st_rows)
-            cst_results = {
-                zoom: _aggregate_runs(cst_valid_runs[zoom], cst_combined[zoom]) for zoom in bench.zoom_levels
-            }
-        elif bench.with_trajectory_ids:
-            st_out = _execute_random_or_repeated_queries(
-                cur,
-                bench.st_sql,
-                bench.params,
-                timeout_seconds=bench.timeout_seconds,
-                trajectory_ids=trajectory_ids,
-                sample_label="ST_",
-            )
-            cst_results = {}
-            for zoom in bench.zoom_levels:
-                sql = bench.cst_sql.format(zoom=zoom)
-                cst_results[zoom] = _execute_random_or_repeated_queries(
+                    per_area_results[area_id] = {"ST_": st_run}
+                    if not st_run.timed_out:
+                        st_rows.extend(st_run.rows)
+                        valid_st_runs.append(st_run)
+
+                    for zoom in bench.zoom_levels:
+                        sql = format_zoom(bench.cst_sql, zoom)
+                        cst_run = _execute_random_or_repeated_queries(
+                            cur, sql, area_params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds, **run_options
+                        )
+                        per_area_results[area_id][f"CST_{zoom}"] = cst_run
+                        if not cst_run.timed_out:
+                            cst_combined[zoom].extend(cst_run.rows)
+                            cst_valid_runs[zoom].append(cst_run)
+
+                adaptive = run_options["adaptive"]
+                st_out = _aggregate_runs(valid_st_runs, st_rows, adaptive)
+                cst_results = {
+                    zoom: _aggregate_runs(cst_valid_runs[zoom], cst_combined[zoom], adaptive) for zoom in bench.zoom_levels
+                }
+            elif bench.with_trajectory_ids:
+                st_out = _run_baseline(
                     cur,
-                    sql,
+                    bench.st_sql,
                     bench.params,
                     timeout_seconds=bench.timeout_seconds,
                     trajectory_ids=trajectory_ids,
-                    sample_label=f"CST_{zoom}",
+                    sample_label="ST_",
+                    baseline_cache=baseline_cache,
+                    **run_options,
                 )
-        elif bench.with_stop_ids:
-            st_out = _execute_random_or_repeated_queries(
-                cur,
-                bench.st_sql,
-                bench.params,
-                timeout_seconds=bench.timeout_seconds,
-                stop_ids=stop_ids
-            )
-            cst_results = {}
-            for zoom in bench.zoom_levels:
-                sql = bench.cst_sql.format(zoom=zoom)
-                cst_results[zoom] = _execute_random_or_repeated_queries(
+                cst_results = {}
+                for zoom in bench.zoom_levels:
+                    sql = format_zoom(bench.cst_sql, zoom)
+                    cst_results[zoom] = _execute_random_or_repeated_queries(
+                        cur,
+                        sql,
+                        bench.params,
+                        timeout_seconds=bench.timeout_seconds,
+                        trajectory_ids=trajectory_ids,
+                        sample_label=f"CST_{zoom}",
+                        **run_options,
+                    )
+            elif bench.with_stop_ids:
+                st_out = _run_baseline(
                     cur,
-                    sql,
+                    bench.st_sql,
                     bench.params,
                     timeout_seconds=bench.timeout_seconds,
                     stop_ids=stop_ids,
-                    sample_label=f"CST_{zoom}",
+                    baseline_cache=baseline_cache,
+                    **run_options,
                 )
-        elif bench.with_stop_ids:
-            st_out = _execute_random_or_repeated_queries(
-                cur,
-                bench.st_sql,
-                bench.params,
-                timeout_seconds=bench.timeout_seconds,
-                stop_ids=stop_ids
-            )
-            cst_results = {}
-            for zoom in bench.zoom_levels:
-                sql = bench.cst_sql.format(zoom=zoom)
-                cst_results[zoom] = _execute_random_or_repeated_queries(
-                    cur,
-                    sql,
-                    bench.params,
-                    timeout_seconds=bench.timeout_seconds,
-                    stop_ids=stop_ids
-                )
-        else:
-            st_out = _execute_random_or_repeated_queries(
-                cur, bench.st_sql, bench.params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
-            )
-            cst_results = {}
-            if bench.zoom_levels:
+                cst_results = {}
                 for zoom in bench.zoom_levels:
-                    sql = bench.cst_sql.format(zoom=zoom)
+                    sql = format_zoom(bench.cst_sql, zoom)
                     cst_results[zoom] = _execute_random_or_repeated_queries(
-                        cur, sql, bench.params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
+                        cur,
+                        sql,
+                        bench.params,
+                        timeout_seconds=bench.timeout_seconds,
+                        stop_ids=stop_ids,
+                        sample_label=f"CST_{zoom}",
+                        **run_options,
                     )
             else:
-                cst_results[""] = _execute_random_or_repeated_queries(
-                    cur, bench.cst_sql, bench.params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
+                st_out = _run_baseline(
+                    cur,
+                    bench.st_sql,
+                    bench.params,
+                    repeats=bench.repeats,
+                    timeout_seconds=bench.timeout_seconds,
+                    baseline_cache=baseline_cache,
+                    **run_options,
                 )
+                cst_results = {}
+                if bench.zoom_levels:
+                    for zoom in bench.zoom_levels:
+                        sql = format_zoom(bench.cst_sql, zoom)
+                        cst_results[zoom] = _execute_random_or_repeated_queries(
+                            cur, sql, bench.params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds, **run_options
+                        )
+                else:
+                    cst_results[""] = _execute_random_or_repeated_queries(
+                        cur, bench.cst_sql, bench.params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds, **run_options
+                    )
+    finally:
+        if pool is not None:
+            pool.close()
 
-    st_keys = _keyset(st_out.rows)
+    st_keys = _run_keys(st_out)
     false_positives: Dict[str, int] = {}
     false_negatives: Dict[str, int] = {}
-    match_counts: Dict[str, int] = {"LineString": len(st_keys)}
+    match_counts: Dict[str, int] = {"LineString": int(st_keys.size)}
 
     for zoom, cst_out in cst_results.items():
-        cst_keys = _keyset(cst_out.rows)
-        false_positives[zoom] = len(cst_keys - st_keys)
-        false_negatives[zoom] = len(st_keys - cst_keys)
-        match_counts[zoom] = len(cst_keys)
+        cst_keys = _run_keys(cst_out)
+        false_positives[zoom] = _count_missing(cst_keys, st_keys)
+        false_negatives[zoom] = _count_missing(st_keys, cst_keys)
+        match_counts[zoom] = int(cst_keys.size)
+        _annotate_sample_accuracy(st_out, cst_out)
 
     baseline_count = match_counts["LineString"]
     false_positives["LineString"] = baseline_count
@@ -343,6 +895,79 @@ def run_time_benchmark(connection, bench: TimeBenchmark, trajectory_ids: List[in
     )
 
 
+def _run_cascade(cur, bench: CascadeBenchmark, params: Tuple[Any, ...]) -> Dict[str, RunOutcome]:
+    stage_results: Dict[str, RunOutcome] = {}
+    candidates: List[int] | None = None
+    for zoom in bench.stages:
+        sql = format_zoom(bench.stage_sql, zoom)
+        run = _execute_random_or_repeated_queries(
+            cur, sql, (candidates,) + params, repeats=bench.repeats, timeout_seconds=bench.timeout_seconds
+        )
+        stage_results[zoom] = run
+        if run.timed_out:
+            break
+        candidates = _run_keys(run).tolist()
+        if not candidates:
+            break
+    return stage_results
+
+
+def run_cascade_benchmark(
+        connection, bench: CascadeBenchmark, baseline_cache: BaselineCache | None = None
+) -> CascadeBenchmarkResult:
+    connection.autocommit = True
+    connection.prepare_threshold = None
+    per_area_results: Dict[int, Dict[str, RunOutcome]] = {}
+    param_sets = [(area_id,) + bench.params for area_id in bench.area_ids] if bench.use_area_ids else [bench.params]
+
+    st_runs: List[RunOutcome] = []
+    stage_runs: Dict[str, List[RunOutcome]] = {zoom: [] for zoom in bench.stages}
+    st_rows: List[Tuple] = []
+    final_rows: List[Tuple] = []
+    candidate_counts: Dict[str, int] = {zoom: 0 for zoom in bench.stages}
+
+    with connection.cursor() as cur:
+        for params in param_sets:
+            st_run = _run_baseline(
+                cur,
+                bench.st_sql,
+                params,
+                repeats=bench.repeats,
+                timeout_seconds=bench.timeout_seconds,
+                baseline_cache=baseline_cache,
+            )
+            stages = _run_cascade(cur, bench, params)
+            if bench.use_area_ids:
+                per_area_results[params[0]] = {"ST_": st_run, **{f"CST_{zoom}": run for zoom, run in stages.items()}}
+            if not st_run.timed_out:
+                st_runs.append(st_run)
+                st_rows.extend(st_run.rows)
+            for zoom in bench.stages:
+                run = stages.get(zoom)
+                # A stage that was skipped because the previous one left no candidates took no time.
+                run = run if run is not None else RunOutcome(0.0, 0.0, [])
+                if not run.timed_out:
+                    stage_runs[zoom].append(run)
+                    candidate_counts[zoom] += int(_run_keys(run).size)
+            last = stages.get(bench.stages[-1])
+            if last is not None and not last.timed_out:
+                final_rows.extend(last.rows)
+
+    st_keys = _key_array(row[0] for row in st_rows)
+    final_keys = _key_array(row[0] for row in final_rows)
+    stage_results = {zoom: _aggregate_runs(runs, []) for zoom, runs in stage_runs.items()}
+    candidate_counts["LineString"] = int(st_keys.size)
+    return CascadeBenchmarkResult(
+        bench.name,
+        _aggregate_runs(st_runs, st_rows),
+        stage_results,
+        candidate_counts,
+        _count_missing(final_keys, st_keys),
+        _count_missing(st_keys, final_keys),
+        per_area_results,
+    )
+
+
 def run_value_benchmark(
         connection,
         bench: ValueBenchmark,
@@ -384,8 +1009,7 @@ def run_value_benchmark(
                         if bench.capture_rows and row:
                             rows_by_zoom[zoom].append(_row_to_mapping(row, bench.row_field_names))
                 else:
-                    cur.execute(sql, bench.params)
-                    for row in cur.fetchall():
+                    for row in _iter_rows(cur, sql, bench.params, bench.stream_itersize):
                         if not row:
                             continue
                         if row[0] is not None:
@@ -407,11 +1031,9 @@ def run_value_benchmark(
                 params = {"stop_ids": stop_ids}
 
             if params is None:
-                cur.execute(bench.sql, bench.params)
-            else:
-                cur.execute(bench.sql, params)
+                params = bench.params
 
-            for row in cur.fetchall():
+            for row in _iter_rows(cur, bench.sql, params, bench.stream_itersize):
                 if not row or len(row) < 2:
                     continue
                 label, value = row[0], row[1]
@@ -429,6 +1051,12 @@ def _print_run(label: str, run: RunOutcome, indent: str = "") -> None:
         print(f"{indent}{label}: (TIMEOUT)")
     else:
         print(f"{indent}{label}: exec_ms(median)={run.exec_ms_med}, wall_ms(median)={run.wall_ms_med}")
+        if run.stop_reason is not None:
+            ci = f"[{run.exec_ms_ci[0]:.3f}, {run.exec_ms_ci[1]:.3f}]" if run.exec_ms_ci else "n/a"
+            print(f"{indent}  exec_ms CI={ci} after {len(run.exec_ms_samples)} repeats ({run.stop_reason})")
+        if run.io_med:
+            blocks = ", ".join(f"{name}={value:g}" for name, value in run.io_med.items())
+            print(f"{indent}  I/O(median): {blocks}")
 
 
 def print_time_result(result: TimeBenchmarkResult) -> None:
@@ -453,6 +1081,20 @@ def print_time_result(result: TimeBenchmarkResult) -> None:
             print("----------------------------")
 
 
+def print_cascade_result(result: CascadeBenchmarkResult) -> None:
+    print(f"\n--- {result.name} ---")
+    _print_run("ST_", result.st)
+    print("----------------------------")
+    for zoom, run in result.stage_results.items():
+        _print_run(f"Stage CST_{zoom}", run)
+        print(f"Candidates after CST_{zoom}: {result.candidate_counts.get(zoom, 0)}")
+    total_exec = round(sum(run.exec_ms_med for run in result.stage_results.values()), 3)
+    print(f"Cascade total exec_ms(median sum)={total_exec}")
+    print(f"False positives (cascade \\ ST_): {result.false_positives}")
+    print(f"False negatives (ST_ \\ cascade): {result.false_negatives}")
+    print("----------------------------")
+
+
 def print_value_result(result: ValueBenchmarkResult) -> None:
     print(f"\n--- {result.name} ---")
     for zoom, value in result.median_values.items():
@@ -0,0 +1,234 @@
+"""Bulk re-encoding of trajectories from prototype2.points into experiment cellstring tables.
+
+Points are streamed with binary COPY, ordered by MMSI, trajectory and time, and
+cut into chunks at trajectory boundaries. A process pool rasterizes each chunk at
+every zoom (benchmarking.rasterize), and the resulting cellstrings are written to
+the target table with binary COPY while later chunks are still being encoded.
+Throughput is reported in points/s and cells/s.
+
+Cell IDs are the Morton code of the tile (benchmarking.quadtree_cellstring), not
+the extension's own ID layout, and there is no contained-supercover encoding; see
+the README.
+
+    python -m benchmarking.encoder supercover experiments.trajectory_supercover_cs [chunk_points] [workers]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarking.connect import connect_to_db
+from benchmarking.quadtree_cellstring import morton_encode
+from benchmarking.rasterize import RASTERIZERS, tile_coordinates
+
+ZOOM_LEVELS = [13, 17, 21]
+
+# Points of every trajectory, matched like utils/get_points_from_traj_or_stop.sql.
+POINTS_SQL = """
+SELECT traj.trajectory_id, traj.mmsi, ST_X(point.geom), ST_Y(point.geom)
+FROM prototype2.trajectory_ls AS traj
+JOIN prototype2.points AS point ON point.mmsi = traj.mmsi
+WHERE ST_M(point.geom) BETWEEN EXTRACT(EPOCH FROM traj.ts_start) AND EXTRACT(EPOCH FROM traj.ts_end)
+{id_filter}
+ORDER BY traj.mmsi, traj.trajectory_id, ST_M(point.geom)
+"""
+
+
+@dataclass
+class PointChunk:
+    trajectory_ids: np.ndarray
+    mmsis: np.ndarray
+    lon: np.ndarray
+    lat: np.ndarray
+
+
+@dataclass
+class EncodedChunk:
+    # trajectory_id -> (mmsi, {zoom: sorted cell ids})
+    cellstrings: Dict[int, Tuple[int, Dict[int, np.ndarray]]]
+    points: int
+    cells: int
+
+
+@dataclass
+class EncodeStats:
+    points: int = 0
+    cells: int = 0
+    trajectories: int = 0
+    chunks: int = 0
+    read_s: float = 0.0
+    write_s: float = 0.0
+    total_s: float = 0.0
+
+    def points_per_second(self) -> float:
+        return self.points / self.total_s if self.total_s else 0.0
+
+    def cells_per_second(self) -> float:
+        return self.cells / self.total_s if self.total_s else 0.0
+
+
+def create_target_table(cur, table: str) -> None:
+    if "." in table:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {table.split('.')[0]}")
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {table} ("
+        "trajectory_id bigint PRIMARY KEY, mmsi bigint NOT NULL, "
+        + ", ".join(f"cellstring_z{zoom} bigint[] NOT NULL" for zoom in ZOOM_LEVELS)
+        + ")"
+    )
+
+
+def read_point_chunks(conn, chunk_points: int, trajectory_ids: Optional[Sequence[int]] = None) -> Iterator[PointChunk]:
+    """Stream points with binary COPY; a chunk holds whole trajectories and about `chunk_points` points."""
+    id_filter = ""
+    if trajectory_ids is not None:
+        id_filter = "AND traj.trajectory_id = ANY(ARRAY[{}]::bigint[])".format(
+            ", ".join(str(int(trajectory_id)) for trajectory_id in trajectory_ids)
+        )
+    sql = POINTS_SQL.format(id_filter=id_filter)
+
+    buffer: List[Tuple[int, int, float, float]] = []
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY ({sql}) TO STDOUT (FORMAT BINARY)") as copy:
+            copy.set_types(["int8", "int8", "float8", "float8"])
+            for row in copy.rows():
+                if len(buffer) >= chunk_points and row[0] != buffer[-1][0]:
+                    yield to_chunk(buffer)
+                    buffer = []
+                buffer.append(row)
+    if buffer:
+        yield to_chunk(buffer)
+
+
+def to_chunk(rows: List[Tuple[int, int, float, float]]) -> PointChunk:
+    trajectory_ids, mmsis, lon, lat = zip(*rows)
+    return PointChunk(
+        np.array(trajectory_ids, dtype=np.int64),
+        np.array(mmsis, dtype=np.int64),
+        np.array(lon, dtype=np.float64),
+        np.array(lat, dtype=np.float64),
+    )
+
+
+def encode_chunk(chunk: PointChunk, encoding: str) -> EncodedChunk:
+    """Rasterize a chunk at every zoom; runs in a worker process."""
+    rasterize = RASTERIZERS[encoding]
+    first = np.concatenate(([True], chunk.trajectory_ids[1:] != chunk.trajectory_ids[:-1]))
+    mmsi_of = dict(zip(chunk.trajectory_ids[first].tolist(), chunk.mmsis[first].tolist()))
+    per_zoom: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    cells = 0
+    for zoom in ZOOM_LEVELS:
+        x, y = tile_coordinates(chunk.lon, chunk.lat, zoom)
+        groups, cell_x, cell_y = rasterize(x, y, chunk.trajectory_ids)
+        # One sort groups the cells by trajectory and orders them by ID inside each trajectory.
+        pairs = np.unique(np.stack([groups, morton_encode(cell_x, cell_y)]), axis=1)
+        per_zoom[zoom] = (pairs[0], pairs[1])
+        cells += pairs.shape[1]
+
+    cellstrings: Dict[int, Tuple[int, Dict[int, np.ndarray]]] = {
+        trajectory_id: (mmsi, {}) for trajectory_id, mmsi in mmsi_of.items()
+    }
+    for zoom, (groups, ids) in per_zoom.items():
+        bounds = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1], [True])))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            cellstrings[int(groups[start])][1][zoom] = ids[start:end]
+    return EncodedChunk(cellstrings, int(chunk.trajectory_ids.size), cells)
+
+
+def copy_encoded_rows(cur, table: str, encoded: EncodedChunk) -> None:
+    columns = ", ".join(f"cellstring_z{zoom}" for zoom in ZOOM_LEVELS)
+    with cur.copy(f"COPY {table} (trajectory_id, mmsi, {columns}) FROM STDIN (FORMAT BINARY)") as copy:
+        copy.set_types(["int8", "int8"] + ["int8[]"] * len(ZOOM_LEVELS))
+        for trajectory_id, (mmsi, by_zoom) in encoded.cellstrings.items():
+            copy.write_row(
+                [trajectory_id, mmsi]
+                + [by_zoom.get(zoom, np.empty(0, dtype=np.int64)).tolist() for zoom in ZOOM_LEVELS]
+            )
+
+
+def write_encoded_chunk(conn, table: str, encoded: EncodedChunk) -> None:
+    with conn.cursor() as cur:
+        with conn.transaction():
+            # Re-encoded trajectories replace their previous rows.
+            cur.execute(f"DELETE FROM {table} WHERE trajectory_id = ANY(%s)", (list(encoded.cellstrings),))
+            copy_encoded_rows(cur, table, encoded)
+
+
+def run_encoder(
+        encoding: str,
+        target_table: str,
+        chunk_points: int = 500_000,
+        workers: int = 4,
+        trajectory_ids: Optional[Sequence[int]] = None,
+) -> EncodeStats:
+    """Re-encode all (or the given) trajectories into `target_table`."""
+    if encoding not in RASTERIZERS:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {sorted(RASTERIZERS)}")
+    stats = EncodeStats()
+    # COPY TO occupies the reading connection until the stream ends, so results go out on a second one.
+    read_conn = connect_to_db()
+    write_conn = connect_to_db()
+    started = time.perf_counter()
+    try:
+        with write_conn.cursor() as cur:
+            create_target_table(cur, target_table)
+
+        pending = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = read_point_chunks(read_conn, chunk_points, trajectory_ids)
+            while True:
+                read_start = time.perf_counter()
+                chunk = next(chunks, None)
+                stats.read_s += time.perf_counter() - read_start
+                if chunk is not None:
+                    pending.append(pool.submit(encode_chunk, chunk, encoding))
+                # Keep at most two chunks per worker in flight; write finished chunks in order.
+                while pending and (chunk is None or len(pending) >= 2 * workers or pending[0].done()):
+                    encoded = pending.pop(0).result()
+                    write_start = time.perf_counter()
+                    write_encoded_chunk(write_conn, target_table, encoded)
+                    stats.write_s += time.perf_counter() - write_start
+                    stats.points += encoded.points
+                    stats.cells += encoded.cells
+                    stats.trajectories += len(encoded.cellstrings)
+                    stats.chunks += 1
+                if chunk is None:
+                    break
+    finally:
+        stats.total_s = time.perf_counter() - started
+        read_conn.close()
+        write_conn.close()
+    return stats
+
+
+def print_stats(encoding: str, target_table: str, stats: EncodeStats) -> None:
+    print(f"\n--- Encoded {stats.trajectories} trajectories ({encoding}) into {target_table} ---")
+    print(
+        f"points={stats.points}, cells={stats.cells}, chunks={stats.chunks}, "
+        f"total_s={round(stats.total_s, 3)}, read_s={round(stats.read_s, 3)}, write_s={round(stats.write_s, 3)}"
+    )
+    print(
+        f"Throughput: {round(stats.points_per_second(), 1)} points/s, "
+        f"{round(stats.cells_per_second(), 1)} cells/s"
+    )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python -m benchmarking.encoder <bresenham|supercover> <target_table> [chunk_points] [workers]")
+    selected_encoding = sys.argv[1]
+    table_name = sys.argv[2]
+    result = run_encoder(
+        selected_encoding,
+        table_name,
+        chunk_points=int(sys.argv[3]) if len(sys.argv) > 3 else 500_000,
+        workers=int(sys.argv[4]) if len(sys.argv) > 4 else 4,
+    )
+    print_stats(selected_encoding, table_name, result)
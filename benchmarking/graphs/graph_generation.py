@@ -1097,6 +1097,67 @@ def plot_intersection_area_exec_times(
     print(f"Wrote Intersection Area Execution Times bar-plot to {output_path}")
 
 
+IO_METRIC_LABELS = {
+    "shared_hit": "Shared hit",
+    "shared_read": "Shared read",
+    "toast_hit": "TOAST hit",
+    "toast_read": "TOAST read",
+    "temp_read": "Temp read",
+}
+
+
+def plot_io_blocks(benchmarks: List[Dict[str, Any]]) -> None:
+    """Median buffer blocks per execution (io_med) for LineString and every zoom, one chart per time benchmark.
+
+    Hits are cache work; reads (shared and TOAST) are what a cold cache pays on top.
+    """
+    plotted = 0
+    for bench in benchmarks:
+        if bench.get("benchmark_type") != "time":
+            continue
+        result = bench.get("result", {})
+        runs = [("LineString", result.get("st", {}))]
+        runs.extend((zoom, run) for zoom, run in result.get("cst_results", {}).items())
+
+        rows: List[Dict[str, Any]] = []
+        for series, run in runs:
+            io_med = run.get("io_med")
+            if not io_med or run.get("timed_out"):
+                continue
+            for metric, label in IO_METRIC_LABELS.items():
+                if metric in io_med:
+                    rows.append({"metric": label, "series": series, "blocks": io_med[metric]})
+        if not rows:
+            continue
+
+        df = pd.DataFrame(rows)
+        fig = px.bar(
+            df,
+            x="metric",
+            y="blocks",
+            color="series",
+            barmode="group",
+            color_discrete_map=SERIES_COLOR_MAP,
+            pattern_shape="series",
+            pattern_shape_map=SERIES_PATTERN_MAP,
+            labels={"blocks": "Blocks per execution (median)", "metric": "", "series": ""},
+            log_y=True,
+            text_auto=".0f",
+            category_orders={"series": ["LineString", *ZOOM_ORDER], "metric": list(IO_METRIC_LABELS.values())},
+        )
+        fig.update_layout(width=1100, height=650)
+        _apply_transparent_theme(fig, with_bar_text=True)
+
+        slug = re.sub(r"[^a-z0-9]+", "_", bench["name"].lower()).strip("_")
+        output_path = _next_output_path(f"io_blocks_{slug}")
+        fig.write_image(output_path)
+        print(f"Saved I/O blocks chart for {bench['name']} to {output_path}")
+        plotted += 1
+
+    if not plotted:
+        print("No I/O accounting (io_med) in the report; skipping I/O plots.")
+
+
 def plot_area_mmsi_coverage(
         benchmarks: List[Dict[str, Any]],
         top_k: int = 3,
@@ -1272,6 +1333,9 @@ def run_all_graphs(
     if wants("intersection_area_exec_times"):
         plot_intersection_area_exec_times(benchmarks)
 
+    if wants("io_blocks"):
+        plot_io_blocks(benchmarks)
+
     if wants("area_mmsi_coverage"):
         for arg in plot_args("area_mmsi_coverage"):
             top_k = int(arg) if arg is not None else 3
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from benchmarking.connect import connect_to_db
+from benchmarking.encoder import (
+    ZOOM_LEVELS,
+    copy_encoded_rows,
+    create_target_table,
+    encode_chunk,
+    to_chunk,
+)
+
+WATERMARK_TABLE = "benchmark.encoder_watermarks"
+# Tables in these schemas hold the extension's cell IDs, which benchmarking.encoder does not produce.
+EXTENSION_SCHEMAS = ("prototype2",)
+
+CREATE_WATERMARK_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+    target_table text PRIMARY KEY,
+    encoding text NOT NULL,
+    watermark_epoch double precision NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+"""
+
+DELTA_POINTS_SQL = """
+WITH affected AS (
+    SELECT DISTINCT traj.trajectory_id, traj.mmsi,
+           EXTRACT(EPOCH FROM traj.ts_start) AS start_epoch,
+           EXTRACT(EPOCH FROM traj.ts_end) AS end_epoch
+    FROM prototype2.points AS point
+    JOIN prototype2.trajectory_ls AS traj
+      ON traj.mmsi = point.mmsi
+     AND ST_M(point.geom) BETWEEN EXTRACT(EPOCH FROM traj.ts_start) AND EXTRACT(EPOCH FROM traj.ts_end)
+    WHERE ST_M(point.geom) > %(since)s AND ST_M(point.geom) <= %(until)s
+)
+SELECT affected.trajectory_id, affected.mmsi, ST_X(delta.geom), ST_Y(delta.geom)
+FROM affected
+CROSS JOIN LATERAL (
+    (
+        SELECT point.geom
+        FROM prototype2.points AS point
+        WHERE point.mmsi = affected.mmsi
+          AND ST_M(point.geom) >= affected.start_epoch
+          AND ST_M(point.geom) <= %(since)s
+        ORDER BY ST_M(point.geom) DESC
+        LIMIT 1
+    )
+    UNION ALL
+    (
+        SELECT point.geom
+        FROM prototype2.points AS point
+        WHERE point.mmsi = affected.mmsi
+          AND ST_M(point.geom) > %(since)s
+          AND ST_M(point.geom) <= LEAST(%(until)s, affected.end_epoch)
+    )
+) AS delta
+ORDER BY affected.mmsi, affected.trajectory_id, ST_M(delta.geom)
+"""
+
+
+@dataclass
+class RefreshStats:
+    watermark_from: float
+    watermark_to: float
+    points: int = 0
+    cells: int = 0
+    trajectories: int = 0
+    seconds: float = 0.0
+
+
+def _merge_sql(target_table: str, staging_table: str) -> str:
+    columns = [f"cellstring_z{zoom}" for zoom in ZOOM_LEVELS]
+    merged = ",\n    ".join(
+        f"{column} = ARRAY(SELECT DISTINCT cell FROM unnest({target_table}.{column} || EXCLUDED.{column}) AS cell "
+        "ORDER BY cell)"
+        for column in columns
+    )
+    return f"""
+INSERT INTO {target_table} (trajectory_id, mmsi, {", ".join(columns)})
+SELECT trajectory_id, mmsi, {", ".join(columns)} FROM {staging_table}
+ON CONFLICT (trajectory_id) DO UPDATE SET
+    {merged};
+"""
+
+
+# Unqualified; the indexes live in the table's schema.
+def _gin_index_names(target_table: str) -> List[str]:
+    name = target_table.split(".")[-1]
+    return [f"{name}_z{zoom}_gin_idx" for zoom in ZOOM_LEVELS]
+
+
+def ensure_indexes(cur, target_table: str) -> None:
+    for zoom, index_name in zip(ZOOM_LEVELS, _gin_index_names(target_table)):
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target_table} USING gin (cellstring_z{zoom})")
+
+
+def check_target_table(target_table: str) -> None:
+    if "." in target_table and target_table.split(".")[0] in EXTENSION_SCHEMAS:
+        raise ValueError(
+            f"{target_table} uses the extension's cell IDs; incremental refresh only maintains "
+            "tables written by benchmarking.encoder"
+        )
+
+
+def get_watermark(cur, target_table: str) -> Optional[float]:
+    cur.execute(CREATE_WATERMARK_TABLE_SQL)
+    cur.execute(f"SELECT watermark_epoch FROM {WATERMARK_TABLE} WHERE target_table = %s", (target_table,))
+    row = cur.fetchone()
+    return float(row[0]) if row else None
+
+
+def set_watermark(cur, target_table: str, encoding: str, watermark_epoch: float) -> None:
+    cur.execute(CREATE_WATERMARK_TABLE_SQL)
+    cur.execute(
+        f"INSERT INTO {WATERMARK_TABLE} (target_table, encoding, watermark_epoch) VALUES (%s, %s, %s) "
+        "ON CONFLICT (target_table) DO UPDATE SET encoding = EXCLUDED.encoding, "
+        "watermark_epoch = EXCLUDED.watermark_epoch, updated_at = now()",
+        (target_table, encoding, watermark_epoch),
+    )
+
+
+def _latest_point_epoch(cur) -> Optional[float]:
+    cur.execute("SELECT max(ST_M(geom)) FROM prototype2.points")
+    row = cur.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+# Marks `target_table` as encoded up to the newest point, e.g. right after a full benchmarking.encoder run.
+def initialize_watermark(conn, target_table: str, encoding: str) -> float:
+    check_target_table(target_table)
+    with conn.cursor() as cur:
+        latest = _latest_point_epoch(cur) or 0.0
+        set_watermark(cur, target_table, encoding, latest)
+    return latest
+
+
+def refresh(conn, target_table: str, encoding: str = "supercover", lateness_seconds: float = 0.0) -> RefreshStats:
+    check_target_table(target_table)
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        watermark = get_watermark(cur, target_table)
+        if watermark is None:
+            raise ValueError(f"No watermark for {target_table}; run a full encode and initialize it first")
+        create_target_table(cur, target_table)
+        ensure_indexes(cur, target_table)
+        # Points are read up to a fixed bound, so rows arriving during the refresh wait for the next one.
+        until = _latest_point_epoch(cur)
+    stats = RefreshStats(watermark, watermark)
+    if until is None or until <= watermark:
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    with conn.cursor() as cur:
+        cur.execute(DELTA_POINTS_SQL, {"since": watermark - lateness_seconds, "until": until})
+        rows = cur.fetchall()
+
+    with conn.cursor() as cur:
+        with conn.transaction():
+            if rows:
+                encoded = encode_chunk(to_chunk(rows), encoding)
+                staging_table = "incremental_delta"
+                cur.execute(
+                    f"CREATE TEMP TABLE {staging_table} (LIKE {target_table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                copy_encoded_rows(cur, staging_table, encoded)
+                cur.execute(_merge_sql(target_table, staging_table))
+                stats.points = encoded.points
+                stats.cells = encoded.cells
+                stats.trajectories = len(encoded.cellstrings)
+            set_watermark(cur, target_table, encoding, until)
+
+        # Fold the GIN pending-list entries of this delta into the indexes now, not at the next vacuum.
+        schema = target_table.split(".")[0] if "." in target_table else "public"
+        for index_name in _gin_index_names(target_table):
+            cur.execute("SELECT gin_clean_pending_list(to_regclass(%s))", (f"{schema}.{index_name}",))
+
+    stats.watermark_to = until
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def print_refresh(target_table: str, stats: RefreshStats) -> None:
+    print(f"\n--- Incremental refresh of {target_table} ---")
+    print(
+        f"watermark {stats.watermark_from} -> {stats.watermark_to}: points={stats.points}, "
+        f"cells={stats.cells}, trajectories={stats.trajectories}, seconds={round(stats.seconds, 3)}"
+    )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        sys.exit(
+            "Usage: python -m benchmarking.incremental <target_table> [bresenham|supercover] [--init] [--lateness=SECONDS]"
+        )
+    table_name = args[0]
+    selected_encoding = args[1] if len(args) > 1 else "supercover"
+    lateness = next((float(arg.split("=", 1)[1]) for arg in sys.argv[1:] if arg.startswith("--lateness=")), 0.0)
+    connection = connect_to_db()
+    try:
+        if "--init" in sys.argv:
+            print(f"Watermark of {table_name} set to {initialize_watermark(connection, table_name, selected_encoding)}")
+        else:
+            print_refresh(table_name, refresh(connection, table_name, selected_encoding, lateness))
+    finally:
+        connection.close()
@@ -0,0 +1,98 @@
+"""Compare the in-process NumPy CellString engine against the extension and PostGIS.
+
+Runs the "trajectories intersecting trajectory X" workload from
+intersects_traj_benchmark_supercover for a seeded, length-stratified sample of
+trajectories (stored in benchmark.benchmark_samples like main.py's samples):
+ST_ (PostGIS) and CST_ (extension) on the server, and the same CST_Intersects
+scan in-process over exported cellstring arrays. In-process results are checked
+against the extension's rows.
+
+    python -m benchmarking.inprocess_benchmark [sample_size]
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from benchmarking.benchmarks.intersects_traj_benchmark_supercover import CST_SQL, ST_SQL
+from benchmarking.cellstring import CellStringTable, fetch_cellstring_table
+from benchmarking.connect import connect_to_db
+from benchmarking.core import fetch_all_with_wall_ms, median_or_zero
+from benchmarking.sampling import load_or_create_sample
+
+ZOOM_LEVELS = ["z13", "z17", "z21"]
+TABLE = "prototype2.trajectory_supercover_cs"
+EXPORT_DIR = Path("benchmarking/cellstring_exports")
+SAMPLE_SEED = 42
+MIN_TRAJECTORY_LENGTH_M = 500
+
+
+def load_table(conn, zoom: str) -> CellStringTable:
+    export_path = EXPORT_DIR / f"{TABLE.replace('.', '_')}_{zoom}.npz"
+    if export_path.exists():
+        return CellStringTable.load(export_path)
+    table = fetch_cellstring_table(conn, TABLE, zoom)
+    table.save(export_path)
+    return table
+
+
+def sample_trajectory_ids(conn, sample_size: int) -> List[int]:
+    return load_or_create_sample(
+        conn,
+        f"trajectories_len_seed{SAMPLE_SEED}_{sample_size}",
+        "trajectory",
+        sample_size,
+        SAMPLE_SEED,
+        "length",
+        min_length_m=MIN_TRAJECTORY_LENGTH_M,
+    )
+
+
+def inprocess_intersecting(table: CellStringTable, trajectory_id: int) -> List[int]:
+    position = table.position_of(trajectory_id)
+    mask = table.intersects_all(table.row(position))
+    mask[position] = False
+    return [int(key) for key in table.keys[mask]]
+
+
+def run(sample_size: int) -> None:
+    conn = connect_to_db()
+    try:
+        trajectory_ids = sample_trajectory_ids(conn, sample_size)
+        with conn.cursor() as cur:
+
+            st_times = [fetch_all_with_wall_ms(cur, ST_SQL, (traj_id,))[1] for traj_id in trajectory_ids]
+            print(f"ST_ (PostGIS): wall_ms(median)={median_or_zero(st_times)}")
+
+            for zoom in ZOOM_LEVELS:
+                table = load_table(conn, zoom)
+                sql = CST_SQL.format(zoom=zoom)
+                sql_times: List[float] = []
+                inprocess_times: List[float] = []
+                mismatches: Dict[int, int] = {}
+                for traj_id in trajectory_ids:
+                    rows, wall_ms = fetch_all_with_wall_ms(cur, sql, (traj_id,))
+                    sql_times.append(wall_ms)
+
+                    start = time.perf_counter()
+                    found = inprocess_intersecting(table, traj_id)
+                    inprocess_times.append((time.perf_counter() - start) * 1000.0)
+
+                    difference = {row[0] for row in rows} ^ set(found)
+                    if difference:
+                        mismatches[traj_id] = len(difference)
+
+                print(
+                    f"CST_{zoom}: extension wall_ms(median)={median_or_zero(sql_times)}, "
+                    f"in-process ms(median)={median_or_zero(inprocess_times)}, "
+                    f"mismatching samples={len(mismatches)}"
+                )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
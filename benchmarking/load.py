@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import psycopg
+
+from benchmarking.connect import connect_to_db_async
+from benchmarking.core import TimeBenchmark, format_zoom
+
+# ok / error / timeout (statement_timeout hit) / dropped (open loop only: arrived but never started
+# before the end of the run because every client was busy).
+LOAD_STATUSES = ("ok", "error", "timeout", "dropped")
+
+
+@dataclass(frozen=True)
+class LoadMixEntry:
+    benchmark: TimeBenchmark
+    weight: float = 1.0
+    include_st: bool = False
+    label: Optional[str] = None  # query type in the report, defaults to the benchmark name
+
+
+@dataclass(frozen=True)
+class LoadBenchmark:
+    name: str
+    mix: List[LoadMixEntry]
+    concurrency: int = 16
+    target_qps: Optional[float] = None
+    duration_seconds: float = 60.0
+    warmup_seconds: float = 5.0
+    timeout_seconds: int = 30
+    seed: int = 42
+
+
+@dataclass(frozen=True)
+class _LoadQuery:
+    query_type: str
+    zoom: str
+    sql: str
+    param_sets: List[Tuple[Any, ...]]
+    weight: float
+
+
+@dataclass(frozen=True)
+class _LoadRecord:
+    query_type: str
+    zoom: str
+    status: str
+    latency_ms: Optional[float]
+
+
+@dataclass
+class LoadBenchmarkResult:
+    name: str
+    concurrency: int
+    target_qps: Optional[float]
+    duration_seconds: float
+    overall: Dict[str, Any]
+    by_query: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    by_zoom: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def _param_sets(
+        bench: TimeBenchmark,
+        trajectory_ids: List[int],
+        stop_ids: List[int],
+        area_ids: List[int],
+) -> List[Tuple[Any, ...]]:
+    if bench.with_trajectory_ids:
+        ids = trajectory_ids
+    elif bench.with_stop_ids:
+        ids = stop_ids
+    elif bench.use_area_ids:
+        ids = bench.area_ids or area_ids
+    else:
+        return [bench.params]
+    if not ids:
+        raise ValueError(f"No IDs available for {bench.name!r}")
+    return [(object_id,) + bench.params for object_id in ids]
+
+
+def _build_queries(
+        bench: LoadBenchmark,
+        trajectory_ids: List[int],
+        stop_ids: List[int],
+        area_ids: List[int],
+) -> List[_LoadQuery]:
+    queries: List[_LoadQuery] = []
+    for entry in bench.mix:
+        source = entry.benchmark
+        query_type = entry.label or source.name
+        param_sets = _param_sets(source, trajectory_ids, stop_ids, area_ids)
+        variants = [(f"CST_{zoom}", format_zoom(source.cst_sql, zoom)) for zoom in source.zoom_levels]
+        if not variants:
+            variants = [("CST_", source.cst_sql)]
+        if entry.include_st:
+            variants.append(("ST_", source.st_sql))
+        for zoom, sql in variants:
+            queries.append(_LoadQuery(query_type, zoom, sql, param_sets, entry.weight / len(variants)))
+    return queries
+
+
+async def _open_client(timeout_seconds: int) -> psycopg.AsyncConnection:
+    conn = await connect_to_db_async()
+    async with conn.cursor() as cur:
+        await cur.execute("SET jit = off")
+        await cur.execute(f"SET statement_timeout = '{timeout_seconds}s'")
+    return conn
+
+
+async def _execute(conn: psycopg.AsyncConnection, query: _LoadQuery, params: Tuple[Any, ...]) -> str:
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(query.sql, params)
+            if cur.description is not None:
+                await cur.fetchall()
+    except psycopg.errors.QueryCanceled:
+        return "timeout"
+    except psycopg.Error:
+        return "error"
+    return "ok"
+
+
+async def _reconnect_if_broken(conns: List[psycopg.AsyncConnection], slot: int, timeout_seconds: int) -> None:
+    # The slot keeps the broken connection until the new one is open, so _run_load closes whichever is current.
+    if conns[slot].broken:
+        await conns[slot].close()
+        conns[slot] = await _open_client(timeout_seconds)
+
+
+async def _closed_loop_client(
+        conns: List[psycopg.AsyncConnection],
+        slot: int,
+        bench: LoadBenchmark,
+        pick: Callable[[], Tuple[_LoadQuery, Tuple[Any, ...]]],
+        records: List[_LoadRecord],
+        measure_from: float,
+        measure_until: float,
+) -> None:
+    while (started := time.perf_counter()) < measure_until:
+        query, params = pick()
+        status = await _execute(conns[slot], query, params)
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        if started >= measure_from:
+            records.append(_LoadRecord(query.query_type, query.zoom, status, latency_ms))
+        await _reconnect_if_broken(conns, slot, bench.timeout_seconds)
+
+
+async def _arrivals(
+        queue: asyncio.Queue,
+        bench: LoadBenchmark,
+        pick: Callable[[], Tuple[_LoadQuery, Tuple[Any, ...]]],
+        rng: random.Random,
+        measure_until: float,
+) -> None:
+    arrives_at = time.perf_counter()
+    while arrives_at < measure_until:
+        delay = arrives_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        queue.put_nowait((arrives_at,) + pick())
+        arrives_at += rng.expovariate(bench.target_qps)
+    for _ in range(bench.concurrency):
+        queue.put_nowait(None)
+
+
+async def _open_loop_client(
+        conns: List[psycopg.AsyncConnection],
+        slot: int,
+        bench: LoadBenchmark,
+        queue: asyncio.Queue,
+        records: List[_LoadRecord],
+        measure_from: float,
+        measure_until: float,
+) -> None:
+    while (item := await queue.get()) is not None:
+        arrived_at, query, params = item
+        if time.perf_counter() >= measure_until:
+            if arrived_at >= measure_from:
+                records.append(_LoadRecord(query.query_type, query.zoom, "dropped", None))
+            continue
+        status = await _execute(conns[slot], query, params)
+        latency_ms = (time.perf_counter() - arrived_at) * 1000.0
+        if arrived_at >= measure_from:
+            records.append(_LoadRecord(query.query_type, query.zoom, status, latency_ms))
+        await _reconnect_if_broken(conns, slot, bench.timeout_seconds)
+
+
+async def _run_load(bench: LoadBenchmark, queries: List[_LoadQuery]) -> List[_LoadRecord]:
+    rng = random.Random(bench.seed)
+    weights = [query.weight for query in queries]
+
+    def pick() -> Tuple[_LoadQuery, Tuple[Any, ...]]:
+        query = rng.choices(queries, weights)[0]
+        return query, rng.choice(query.param_sets)
+
+    opened = await asyncio.gather(
+        *(_open_client(bench.timeout_seconds) for _ in range(bench.concurrency)), return_exceptions=True
+    )
+    # One connection per client slot; a client that reconnects replaces its slot's entry.
+    conns = [conn for conn in opened if not isinstance(conn, BaseException)]
+    records: List[_LoadRecord] = []
+    try:
+        failed = next((error for error in opened if isinstance(error, BaseException)), None)
+        if failed is not None:
+            raise failed
+        measure_from = time.perf_counter() + bench.warmup_seconds
+        measure_until = measure_from + bench.duration_seconds
+        slots = range(len(conns))
+        if bench.target_qps is None:
+            await asyncio.gather(
+                *(_closed_loop_client(conns, slot, bench, pick, records, measure_from, measure_until) for slot in slots)
+            )
+        else:
+            queue: asyncio.Queue = asyncio.Queue()
+            workers = [
+                _open_loop_client(conns, slot, bench, queue, records, measure_from, measure_until) for slot in slots
+            ]
+            await asyncio.gather(*workers, _arrivals(queue, bench, pick, rng, measure_until))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns), return_exceptions=True)
+    return records
+
+
+def _summarize(records: List[_LoadRecord], duration_seconds: float) -> Dict[str, Any]:
+    counts = {status: 0 for status in LOAD_STATUSES}
+    for record in records:
+        counts[record.status] += 1
+    latencies = np.array([record.latency_ms for record in records if record.status == "ok"], dtype=np.float64)
+    # Errors and timeouts are often the slowest requests, so percentiles over ok requests alone look too good.
+    completed = np.array([record.latency_ms for record in records if record.status != "dropped"], dtype=np.float64)
+    total = len(records)
+    summary: Dict[str, Any] = {
+        "requests": total,
+        **counts,
+        "throughput_qps": round(counts["ok"] / duration_seconds, 3) if duration_seconds > 0 else 0.0,
+        "error_rate": round(counts["error"] / total, 4) if total else 0.0,
+        "timeout_rate": round(counts["timeout"] / total, 4) if total else 0.0,
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary.update(
+            {
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "mean_ms": round(float(latencies.mean()), 3),
+                "max_ms": round(float(latencies.max()), 3),
+            }
+        )
+    if completed.size:
+        p50, p95, p99 = np.percentile(completed, [50, 95, 99])
+        summary.update(
+            {
+                "p50_all_ms": round(float(p50), 3),
+                "p95_all_ms": round(float(p95), 3),
+                "p99_all_ms": round(float(p99), 3),
+            }
+        )
+    return summary
+
+
+def run_load_benchmark(
+        bench: LoadBenchmark,
+        trajectory_ids: List[int] | None = None,
+        stop_ids: List[int] | None = None,
+        area_ids: List[int] | None = None,
+) -> LoadBenchmarkResult:
+    if bench.concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {bench.concurrency}")
+    if bench.target_qps is not None and bench.target_qps <= 0:
+        raise ValueError(f"target_qps must be positive, got {bench.target_qps}")
+    queries = _build_queries(bench, trajectory_ids or [], stop_ids or [], area_ids or [])
+    if not queries:
+        raise ValueError(f"Load benchmark {bench.name!r} has an empty mix")
+
+    records = asyncio.run(_run_load(bench, queries))
+
+    by_query_records: Dict[str, Dict[str, List[_LoadRecord]]] = defaultdict(lambda: defaultdict(list))
+    by_zoom_records: Dict[str, List[_LoadRecord]] = defaultdict(list)
+    for record in records:
+        by_query_records[record.query_type][record.zoom].append(record)
+        by_zoom_records[record.zoom].append(record)
+
+    return LoadBenchmarkResult(
+        bench.name,
+        bench.concurrency,
+        bench.target_qps,
+        bench.duration_seconds,
+        _summarize(records, bench.duration_seconds),
+        {
+            query_type: {zoom: _summarize(zoom_records, bench.duration_seconds) for zoom, zoom_records in zooms.items()}
+            for query_type, zooms in by_query_records.items()
+        },
+        {zoom: _summarize(zoom_records, bench.duration_seconds) for zoom, zoom_records in by_zoom_records.items()},
+    )
+
+
+def _print_summary(label: str, summary: Dict[str, Any]) -> None:
+    latency = (
+        f"p50={summary['p50_ms']} p95={summary['p95_ms']} p99={summary['p99_ms']} ms"
+        if "p50_ms" in summary
+        else "no successful requests"
+    )
+    if "p50_all_ms" in summary:
+        latency += (
+            f" (incl. errors/timeouts p50={summary['p50_all_ms']} p95={summary['p95_all_ms']} "
+            f"p99={summary['p99_all_ms']} ms)"
+        )
+    print(
+        f"{label}: {summary['throughput_qps']} qps, {latency}, "
+        f"errors={summary['error']} timeouts={summary['timeout']} dropped={summary['dropped']} "
+        f"of {summary['requests']}"
+    )
+
+
+def print_load_result(result: LoadBenchmarkResult) -> None:
+    offered = f"{result.target_qps} qps offered" if result.target_qps is not None else "closed loop"
+    print(f"\n--- {result.name} ({result.concurrency} clients, {offered}, {result.duration_seconds}s) ---")
+    _print_summary("All queries", result.overall)
+    print("----------------------------")
+    for query_type, zooms in result.by_query.items():
+        print(f"{query_type}:")
+        for zoom in sorted(zooms):
+            _print_summary(f"  {zoom}", zooms[zoom])
+    print("----------------------------")
+    for zoom in sorted(result.by_zoom):
+        _print_summary(zoom, result.by_zoom[zoom])
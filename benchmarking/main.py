@@ -2,14 +2,20 @@ import json
 import os
 import re
 import sys
-from dataclasses import replace
+from dataclasses import asdict, replace
 from datetime import datetime, timezone
 from pathlib import Path
 from statistics import median
 from typing import Dict, List
 from dotenv import load_dotenv
+from benchmarking.baseline_cache import BaselineCache
 from benchmarking.connect import connect_to_db
+from benchmarking.load import LoadBenchmark, LoadBenchmarkResult, print_load_result, run_load_benchmark
+from benchmarking.metrics import load_metrics, missing_metrics, refresh_metrics
+from benchmarking.sampling import load_or_create_sample
 from benchmarking.core import (
+    CascadeBenchmark,
+    CascadeBenchmarkResult,
     RunOutcome,
     TimeBenchmark,
     TimeBenchmarkResult,
@@ -18,7 +24,9 @@ from benchmarking.core import (
     run_time_benchmark,
     print_time_result,
     run_value_benchmark,
-    print_value_result
+    print_value_result,
+    run_cascade_benchmark,
+    print_cascade_result,
 )
 from benchmarking.benchmarks import RUN_PLAN
 
@@ -37,20 +45,6 @@ def _get_area_ids(conn, selected_ids=None):
         return all_area_ids
 
 
-def _fetch_random_ids(cur, column_name, table_name, sample_size):
-    if sample_size <= 0:
-        return []
-    if not re.fullmatch(r"[A-Za-z0-9_]+", column_name):
-        raise ValueError(f"Invalid column name: {column_name}")
-    if not re.fullmatch(r"[A-Za-z0-9_.]+", table_name):
-        raise ValueError(f"Invalid table name: {table_name}")
-    cur.execute(
-        f"SELECT {column_name} FROM {table_name} ORDER BY random() LIMIT %s",
-        (sample_size,)
-    )
-    return [row[0] for row in cur.fetchall()]
-
-
 def _build_length_stats(stat_entries):
     stats = []
     for label, lengths in stat_entries:
@@ -110,8 +104,12 @@ def _collect_tables(*sql_statements):
 def _collect_tables_from_benchmark(benchmark):
     if isinstance(benchmark, TimeBenchmark):
         return _collect_tables(benchmark.st_sql, benchmark.cst_sql)
+    if isinstance(benchmark, CascadeBenchmark):
+        return _collect_tables(benchmark.st_sql, benchmark.stage_sql)
     if isinstance(benchmark, ValueBenchmark):
         return _collect_tables(benchmark.sql)
+    if isinstance(benchmark, LoadBenchmark):
+        return sorted({table for entry in benchmark.mix for table in _collect_tables_from_benchmark(entry.benchmark)})
     if hasattr(benchmark, 'sql'):
         return _collect_tables(benchmark.sql)
     return []
@@ -125,6 +123,18 @@ def _serialize_run_outcome(run: RunOutcome) -> dict:
     }
     if run.samples:
         payload["samples"] = run.samples
+    if run.exec_ms_samples:
+        payload["repeat_count"] = len(run.exec_ms_samples)
+        payload["exec_ms_samples"] = run.exec_ms_samples
+    if run.stop_reason is not None:
+        payload["exec_ms_ci"] = list(run.exec_ms_ci) if run.exec_ms_ci else None
+        payload["stop_reason"] = run.stop_reason
+    if run.io_med:
+        payload["io_med"] = run.io_med
+    if run.plans:
+        payload["plans"] = run.plans
+    if run.plan_samples:
+        payload["plan_samples"] = run.plan_samples
     return payload
 
 
@@ -142,6 +152,20 @@ def _serialize_time_result(result: TimeBenchmarkResult) -> dict:
     }
 
 
+def _serialize_cascade_result(result: CascadeBenchmarkResult) -> dict:
+    return {
+        "st": _serialize_run_outcome(result.st),
+        "stage_results": {zoom: _serialize_run_outcome(outcome) for zoom, outcome in result.stage_results.items()},
+        "candidate_counts": result.candidate_counts,
+        "false_positives": result.false_positives,
+        "false_negatives": result.false_negatives,
+        "per_area_results": {
+            str(area_id): {label: _serialize_run_outcome(run) for label, run in runs.items()}
+            for area_id, runs in result.per_area_results.items()
+        },
+    }
+
+
 def _serialize_value_result(result: ValueBenchmarkResult) -> dict:
     payload = {"median_values": result.median_values}
     if result.rows_by_zoom:
@@ -149,6 +173,17 @@ def _serialize_value_result(result: ValueBenchmarkResult) -> dict:
     return payload
 
 
+def _serialize_load_result(result: LoadBenchmarkResult) -> dict:
+    return {
+        "concurrency": result.concurrency,
+        "target_qps": result.target_qps,
+        "duration_seconds": result.duration_seconds,
+        "overall": result.overall,
+        "by_query": result.by_query,
+        "by_zoom": result.by_zoom,
+    }
+
+
 def _write_json_report(payload: dict, run_started_at: datetime) -> Path:
     output_dir = Path("benchmarking/benchmark_results")
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -160,19 +195,24 @@ def _write_json_report(payload: dict, run_started_at: datetime) -> Path:
     return output_path
 
 
-def main():
+def main(refresh_baseline: bool = False, use_baseline_cache: bool = True, refresh_all_metrics: bool = False):
     load_dotenv()
-    trajectory_source_table = "prototype2.trajectory_cs"
-    stop_source_table = "prototype2.stop_cs"
     trajectory_sample_size = 400
     stop_sample_size = 400
     min_trajectory_length_m = 500
+    # Samples are persisted under their name; change the name (or seed) to draw a new one.
+    sample_seed = 42
+    trajectory_sample_name = f"trajectories_len_seed{sample_seed}_{trajectory_sample_size}"
+    stop_sample_name = f"stops_area_seed{sample_seed}_{stop_sample_size}"
+    trajectory_stratify_by = "length"
+    stop_stratify_by = "area"
 
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         sys.exit("DATABASE_URL not defined in .env file")
 
     run_started_at = datetime.now(timezone.utc)
+    baseline_cache = BaselineCache(refresh=refresh_baseline) if use_baseline_cache else None
 
     if not RUN_PLAN:
         print("No benchmarks defined in RUN_PLAN. Exiting.")
@@ -194,80 +234,57 @@ def main():
 
         benchmark_outputs = []
 
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT cs.trajectory_id
-                FROM prototype2.trajectory_cs AS cs
-                JOIN prototype2.trajectory_ls AS ls
-                    ON ls.trajectory_id = cs.trajectory_id
-                WHERE ST_Length(ST_Transform(ls.geom, 3857)) > %s
-                ORDER BY random()
-                LIMIT %s
-                """,
-                (min_trajectory_length_m, trajectory_sample_size),
-            )
-            trajectory_ids = [row[0] for row in cur.fetchall()]
-            stop_ids = _fetch_random_ids(
-                cur,
-                "stop_id",
-                stop_source_table,
-                stop_sample_size,
-            )
-
-            if trajectory_ids:
-                cur.execute(
-                    "SELECT trajectory_id, "
-                    "ST_Length(ST_Transform(geom, 3857)) AS length_m, "
-                    "ST_Area(ST_Envelope(ST_Transform(geom, 3857))) AS mbr_area_m2 "
-                    "FROM prototype2.trajectory_ls WHERE trajectory_id = ANY(%s)",
-                    (trajectory_ids,)
-                )
-                for traj_id, length, mbr_area in cur.fetchall():
-                    if length is not None:
-                        traj_linestring_lengths.append(length)
-                        linestring_lengths_by_id[int(traj_id)] = float(length)
-                    if mbr_area is not None:
-                        linestring_mbr_areas_by_id[int(traj_id)] = float(mbr_area)
-
-                for zoom in ZOOM_LEVELS:
-                    cur.execute(
-                        f"SELECT trajectory_id, Cardinality(cellstring_{zoom}) "
-                        f"FROM {trajectory_source_table} WHERE trajectory_id = ANY(%s)",
-                        (trajectory_ids,)
-                    )
-                    for traj_id, count in cur.fetchall():
-                        if count is None:
-                            continue
-                        traj_cellstring_lengths[zoom].append(count)
-                        cellstring_lengths[zoom][int(traj_id)] = int(count)
-            if stop_ids:
-                cur.execute(
-                    "SELECT stop_id, ST_Area(ST_Transform(geom, 3857)) AS area_m2 "
-                    "FROM prototype2.stop_poly WHERE stop_id = ANY(%s)",
-                    (stop_ids,)
-                )
-                for stop_id, area in cur.fetchall():
-                    if area is None:
-                        continue
-                    stop_poly_area_size.append(area)
-                    stop_polygon_areas_by_id[int(stop_id)] = float(area)
-
-                for zoom in ZOOM_LEVELS:
-                    cur.execute(
-                        f"SELECT stop_id, Cardinality(cellstring_{zoom}) "
-                        f"FROM {stop_source_table} WHERE stop_id = ANY(%s)",
-                        (stop_ids,)
-                    )
-                    for stop_id, count in cur.fetchall():
-                        if count is None:
-                            continue
-                        stop_cellstring_lengths[zoom].append(count)
-                        stop_cellstring_cardinalities[zoom][int(stop_id)] = int(count)
+        trajectory_ids = load_or_create_sample(
+            conn,
+            trajectory_sample_name,
+            "trajectory",
+            trajectory_sample_size,
+            sample_seed,
+            trajectory_stratify_by,
+            min_length_m=min_trajectory_length_m,
+        )
+        stop_ids = load_or_create_sample(
+            conn,
+            stop_sample_name,
+            "stop",
+            stop_sample_size,
+            sample_seed,
+            stop_stratify_by,
+        )
+
+        # Metadata comes from the materialized metrics table. By default only sampled objects without a
+        # row are computed; --refresh-metrics adds every missing object and drops rows of deleted ones.
+        if refresh_all_metrics:
+            refresh_metrics(conn)
+        else:
+            for kind, ids in (("trajectory", trajectory_ids), ("stop", stop_ids)):
+                missing = missing_metrics(conn, kind, ids)
+                if missing:
+                    refresh_metrics(conn, kinds=(kind,), ids=missing)
+        metrics = load_metrics(conn, trajectory_ids, stop_ids)
+        trajectory_metrics = metrics["trajectory"]
+        stop_metrics = metrics["stop"]
+
+        for traj_id in trajectory_ids:
+            if traj_id in trajectory_metrics.length_m:
+                traj_linestring_lengths.append(trajectory_metrics.length_m[traj_id])
+        linestring_lengths_by_id.update(trajectory_metrics.length_m)
+        linestring_mbr_areas_by_id.update(trajectory_metrics.mbr_area_m2)
+        for zoom, counts in trajectory_metrics.cardinalities.get("bresenham", {}).items():
+            traj_cellstring_lengths[zoom] = [counts[traj_id] for traj_id in trajectory_ids if traj_id in counts]
+            cellstring_lengths[zoom] = dict(counts)
+
+        for stop_id in stop_ids:
+            if stop_id in stop_metrics.polygon_area_m2:
+                stop_poly_area_size.append(stop_metrics.polygon_area_m2[stop_id])
+        stop_polygon_areas_by_id.update(stop_metrics.polygon_area_m2)
+        for zoom, counts in stop_metrics.cardinalities.get("bresenham", {}).items():
+            stop_cellstring_lengths[zoom] = [counts[stop_id] for stop_id in stop_ids if stop_id in counts]
+            stop_cellstring_cardinalities[zoom] = dict(counts)
 
         for benchmark in RUN_PLAN:
             bench_instance = benchmark
-            if isinstance(bench_instance, TimeBenchmark) and bench_instance.use_area_ids and not bench_instance.area_ids:
+            if isinstance(bench_instance, (TimeBenchmark, CascadeBenchmark)) and bench_instance.use_area_ids and not bench_instance.area_ids:
                 all_area_ids = _get_area_ids(conn)
                 bench_instance = replace(bench_instance, area_ids=all_area_ids)
 
@@ -276,20 +293,38 @@ def main():
 
             if isinstance(bench_instance, TimeBenchmark):
                 if bench_instance.with_trajectory_ids:
-                    result = run_time_benchmark(conn, bench_instance, trajectory_ids=trajectory_ids)
+                    result = run_time_benchmark(
+                        conn, bench_instance, trajectory_ids=trajectory_ids, baseline_cache=baseline_cache
+                    )
                 elif bench_instance.with_stop_ids:
-                    result = run_time_benchmark(conn, bench_instance, stop_ids=stop_ids)
+                    result = run_time_benchmark(conn, bench_instance, stop_ids=stop_ids, baseline_cache=baseline_cache)
                 else:
-                    result = run_time_benchmark(conn, bench_instance)
+                    result = run_time_benchmark(conn, bench_instance, baseline_cache=baseline_cache)
                 print_time_result(result)
                 benchmark_outputs.append(
                     {
                         "name": bench_instance.name,
                         "benchmark_type": "time",
+                        "execution_mode": bench_instance.execution_mode,
+                        "timing_mode": bench_instance.timing_mode,
+                        "cache_state": bench_instance.cache_state,
+                        "adaptive": asdict(bench_instance.adaptive) if bench_instance.adaptive else None,
+                        "batch_ids": bench_instance.batch_ids,
                         "tables_used": tables_used,
                         "result": _serialize_time_result(result),
                     }
                 )
+            elif isinstance(bench_instance, CascadeBenchmark):
+                result = run_cascade_benchmark(conn, bench_instance, baseline_cache=baseline_cache)
+                print_cascade_result(result)
+                benchmark_outputs.append(
+                    {
+                        "name": bench_instance.name,
+                        "benchmark_type": "cascade",
+                        "tables_used": tables_used,
+                        "result": _serialize_cascade_result(result),
+                    }
+                )
             elif isinstance(bench_instance, ValueBenchmark):
                 result = run_value_benchmark(conn, bench_instance, trajectory_ids, stop_ids)
                 print_value_result(result)
@@ -301,6 +336,26 @@ def main():
                         "result": _serialize_value_result(result),
                     }
                 )
+            elif isinstance(bench_instance, LoadBenchmark):
+                result = run_load_benchmark(bench_instance, trajectory_ids, stop_ids, _get_area_ids(conn))
+                print_load_result(result)
+                benchmark_outputs.append(
+                    {
+                        "name": bench_instance.name,
+                        "benchmark_type": "load",
+                        "mix": [
+                            {
+                                "query_type": entry.label or entry.benchmark.name,
+                                "benchmark": entry.benchmark.name,
+                                "weight": entry.weight,
+                                "include_st": entry.include_st,
+                            }
+                            for entry in bench_instance.mix
+                        ],
+                        "tables_used": tables_used,
+                        "result": _serialize_load_result(result),
+                    }
+                )
 
         traj_stats_payload = []
         stop_stats_payload = []
@@ -336,11 +391,25 @@ def main():
                 "trajectory_ids": trajectory_ids,
                 "stop_count": len(stop_ids),
                 "stop_ids": stop_ids,
+                "samples": {
+                    "trajectory": {
+                        "name": trajectory_sample_name,
+                        "seed": sample_seed,
+                        "stratify_by": trajectory_stratify_by,
+                    },
+                    "stop": {"name": stop_sample_name, "seed": sample_seed, "stratify_by": stop_stratify_by},
+                },
                 "zoom_levels": ZOOM_LEVELS,
                 "trajectory_stats": traj_stats_summary,
                 "stop_stats": stop_stats_summary,
                 "tested_types": tested_types,
                 "tables_used": all_tables_used,
+                "baseline_cache": {
+                    "enabled": baseline_cache is not None,
+                    "refreshed": refresh_baseline,
+                    "hits": baseline_cache.hits if baseline_cache else 0,
+                    "misses": baseline_cache.misses if baseline_cache else 0,
+                },
                 "trajectory_linestring_lengths_m": {
                     str(traj_id): length for traj_id, length in linestring_lengths_by_id.items()
                 },
@@ -349,6 +418,14 @@ def main():
                     for zoom, counts in cellstring_lengths.items()
                     if counts
                 },
+                "trajectory_supercover_cardinalities": {
+                    zoom: {str(traj_id): count for traj_id, count in counts.items()}
+                    for zoom, counts in trajectory_metrics.cardinalities.get("supercover", {}).items()
+                    if counts
+                },
+                "trajectory_num_points": {
+                    str(traj_id): count for traj_id, count in trajectory_metrics.num_points.items()
+                },
                 "trajectory_linestring_mbr_area_m2": {
                     str(traj_id): area for traj_id, area in linestring_mbr_areas_by_id.items()
                 },
@@ -369,4 +446,9 @@ def main():
         conn.close()
 
 if __name__ == "__main__":
-    main()
+    args = sys.argv[1:]
+    main(
+        refresh_baseline="--refresh-baseline" in args,
+        use_baseline_cache="--no-baseline-cache" not in args,
+        refresh_all_metrics="--refresh-metrics" in args,
+    )
@@ -0,0 +1,181 @@
+"""Materialized per-object metrics (benchmark.object_metrics) for trajectories and stops.
+
+Lengths, areas, point counts and the cellstring cardinality per zoom of every
+encoding are computed once and refreshed incrementally (only objects without a
+metrics row, or explicitly given ids), so a benchmark run reads all metadata for
+its samples in one bulk query.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+METRICS_TABLE = "benchmark.object_metrics"
+ZOOM_LEVELS = ["z13", "z17", "z21"]
+
+# Cardinality column prefix -> cellstring table per object kind.
+CARDINALITY_SOURCES = {
+    "trajectory": {
+        "bresenham": "prototype2.trajectory_cs",
+        "supercover": "prototype2.trajectory_supercover_cs",
+        "contained_supercover": "prototype2.trajectory_contained_supercover_cs",
+    },
+    "stop": {
+        "bresenham": "prototype2.stop_cs",
+    },
+}
+CARDINALITY_COLUMNS = [
+    f"{encoding}_{zoom}" for encoding in ("bresenham", "supercover", "contained_supercover") for zoom in ZOOM_LEVELS
+]
+
+CREATE_METRICS_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+    kind text NOT NULL,
+    object_id bigint NOT NULL,
+    length_m double precision,
+    mbr_area_m2 double precision,
+    polygon_area_m2 double precision,
+    num_points int,
+    {", ".join(f"{column} int" for column in CARDINALITY_COLUMNS)},
+    refreshed_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (kind, object_id)
+);
+"""
+
+GEOMETRY_SOURCES = {
+    "trajectory": ("prototype2.trajectory_ls", "trajectory_id"),
+    "stop": ("prototype2.stop_poly", "stop_id"),
+}
+
+
+def _refresh_sql(kind: str) -> str:
+    geometry_table, id_column = GEOMETRY_SOURCES[kind]
+    joins = []
+    cardinalities = []
+    for column in CARDINALITY_COLUMNS:
+        encoding, zoom = column.rsplit("_", 1)
+        table = CARDINALITY_SOURCES[kind].get(encoding)
+        if table is None:
+            cardinalities.append("NULL::int")
+            continue
+        alias = f"cs_{encoding}"
+        join = f"LEFT JOIN {table} AS {alias} ON {alias}.{id_column} = src.{id_column}"
+        if join not in joins:
+            joins.append(join)
+        cardinalities.append(f"Cardinality({alias}.cellstring_{zoom})")
+
+    if kind == "trajectory":
+        length = "ST_Length(ST_Transform(src.geom, 3857))"
+        polygon_area = "NULL::double precision"
+    else:
+        length = "NULL::double precision"
+        polygon_area = "ST_Area(ST_Transform(src.geom, 3857))"
+
+    newline = "\n"
+    return f"""
+INSERT INTO {METRICS_TABLE} (
+    kind, object_id, length_m, mbr_area_m2, polygon_area_m2, num_points, {", ".join(CARDINALITY_COLUMNS)}
+)
+SELECT
+    '{kind}',
+    src.{id_column},
+    {length},
+    ST_Area(ST_Envelope(ST_Transform(src.geom, 3857))),
+    {polygon_area},
+    ST_NPoints(src.geom),
+    {f",{newline}    ".join(cardinalities)}
+FROM {geometry_table} AS src
+{newline.join(joins)}
+WHERE CASE
+    WHEN %(ids)s::bigint[] IS NULL THEN NOT EXISTS (
+        SELECT 1 FROM {METRICS_TABLE} AS m WHERE m.kind = '{kind}' AND m.object_id = src.{id_column}
+    )
+    ELSE src.{id_column} = ANY(%(ids)s::bigint[])
+END
+ON CONFLICT (kind, object_id) DO UPDATE SET
+    length_m = EXCLUDED.length_m,
+    mbr_area_m2 = EXCLUDED.mbr_area_m2,
+    polygon_area_m2 = EXCLUDED.polygon_area_m2,
+    num_points = EXCLUDED.num_points,
+    {f",{newline}    ".join(f"{column} = EXCLUDED.{column}" for column in CARDINALITY_COLUMNS)},
+    refreshed_at = now();
+"""
+
+
+def refresh_metrics(conn, kinds: Sequence[str] = ("trajectory", "stop"), ids: Optional[Sequence[int]] = None) -> Dict[str, int]:
+    """Add metrics for objects that have none yet (ids=None) or recompute the given ids; drop rows of deleted objects."""
+    refreshed: Dict[str, int] = {}
+    with conn.cursor() as cur:
+        cur.execute(CREATE_METRICS_TABLE_SQL)
+        for kind in kinds:
+            geometry_table, id_column = GEOMETRY_SOURCES[kind]
+            cur.execute(_refresh_sql(kind), {"ids": list(ids) if ids is not None else None})
+            refreshed[kind] = cur.rowcount
+            if ids is None:
+                cur.execute(
+                    f"DELETE FROM {METRICS_TABLE} AS m WHERE m.kind = %s "
+                    f"AND NOT EXISTS (SELECT 1 FROM {geometry_table} AS src WHERE src.{id_column} = m.object_id)",
+                    (kind,),
+                )
+    return refreshed
+
+
+def missing_metrics(conn, kind: str, ids: Sequence[int]) -> List[int]:
+    """The given ids that have no metrics row yet (all of them if the table does not exist)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (METRICS_TABLE,))
+        if not cur.fetchone()[0]:
+            return list(ids)
+        cur.execute(
+            f"""
+            SELECT ids.object_id
+            FROM unnest(%s::bigint[]) AS ids(object_id)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {METRICS_TABLE} AS m WHERE m.kind = %s AND m.object_id = ids.object_id
+            )
+            """,
+            (list(ids), kind),
+        )
+        return [int(row[0]) for row in cur.fetchall()]
+
+
+@dataclass
+class ObjectMetrics:
+    length_m: Dict[int, float] = field(default_factory=dict)
+    mbr_area_m2: Dict[int, float] = field(default_factory=dict)
+    polygon_area_m2: Dict[int, float] = field(default_factory=dict)
+    num_points: Dict[int, int] = field(default_factory=dict)
+    # "bresenham" / "supercover" / "contained_supercover" -> zoom -> object id -> cardinality
+    cardinalities: Dict[str, Dict[str, Dict[int, int]]] = field(default_factory=dict)
+
+
+def load_metrics(conn, trajectory_ids: List[int], stop_ids: List[int]) -> Dict[str, ObjectMetrics]:
+    """Metrics of the sampled trajectories and stops, read in one query."""
+    loaded = {"trajectory": ObjectMetrics(), "stop": ObjectMetrics()}
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT kind, object_id, length_m, mbr_area_m2, polygon_area_m2, num_points, {", ".join(CARDINALITY_COLUMNS)}
+            FROM {METRICS_TABLE}
+            WHERE (kind = 'trajectory' AND object_id = ANY(%s))
+               OR (kind = 'stop' AND object_id = ANY(%s))
+            """,
+            (list(trajectory_ids), list(stop_ids)),
+        )
+        for kind, object_id, length_m, mbr_area_m2, polygon_area_m2, num_points, *counts in cur.fetchall():
+            metrics = loaded[kind]
+            object_id = int(object_id)
+            if length_m is not None:
+                metrics.length_m[object_id] = float(length_m)
+            if mbr_area_m2 is not None:
+                metrics.mbr_area_m2[object_id] = float(mbr_area_m2)
+            if polygon_area_m2 is not None:
+                metrics.polygon_area_m2[object_id] = float(polygon_area_m2)
+            if num_points is not None:
+                metrics.num_points[object_id] = int(num_points)
+            for column, count in zip(CARDINALITY_COLUMNS, counts):
+                if count is None:
+                    continue
+                encoding, zoom = column.rsplit("_", 1)
+                metrics.cardinalities.setdefault(encoding, {}).setdefault(zoom, {})[object_id] = int(count)
+    return loaded
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from benchmarking.plans import index_names, root_buffers, scans
+
+# Buffer changes below this many blocks are noise, whatever the ratio.
+MIN_BLOCK_DELTA = 100
+
+
+@dataclass(frozen=True)
+class RunPlanProfile:
+    dominant_hash: Optional[str]
+    hash_counts: Dict[str, int]
+    shape: List[Dict[str, Any]]
+    shared_blocks_med: float
+    shared_read_med: float
+
+
+def _plan_entries(run: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for sample in run.get("samples", []):
+        if "plan_hash" in sample:
+            yield sample
+    yield from run.get("plan_samples", [])
+
+
+def profile_run(run: Dict[str, Any]) -> Optional[RunPlanProfile]:
+    entries = list(_plan_entries(run))
+    if not entries:
+        return None
+    counts = Counter(entry["plan_hash"] for entry in entries)
+    dominant = counts.most_common(1)[0][0]
+    buffers = [root_buffers(entry.get("plan_actuals", [])) for entry in entries]
+    return RunPlanProfile(
+        dominant,
+        dict(counts),
+        run.get("plans", {}).get(dominant, []),
+        median(b.get("shared_hit", 0) + b.get("shared_read", 0) for b in buffers),
+        median(b.get("shared_read", 0) for b in buffers),
+    )
+
+
+def _runs(benchmark: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    result = benchmark.get("result", {})
+    if "st" in result:
+        yield "ST_", result["st"]
+    for zoom, run in result.get("cst_results", {}).items():
+        yield (f"CST_{zoom}" if zoom else "CST_"), run
+    for zoom, run in result.get("stage_results", {}).items():
+        yield f"Stage CST_{zoom}", run
+    for area_id, runs in result.get("per_area_results", {}).items():
+        for label, run in runs.items():
+            yield f"Area {area_id} {label}", run
+
+
+def _relative_change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return new / old - 1.0
+
+
+def diff_profiles(old: RunPlanProfile, new: RunPlanProfile, buffer_threshold: float) -> List[str]:
+    findings: List[str] = []
+    if old.dominant_hash != new.dominant_hash:
+        findings.append(f"plan changed {old.dominant_hash} -> {new.dominant_hash}")
+        old_scans, new_scans = set(scans(old.shape)), set(scans(new.shape))
+        old_indexes, new_indexes = set(index_names(old.shape)), set(index_names(new.shape))
+        findings.extend(f"  - {scan}" for scan in sorted(old_scans - new_scans))
+        findings.extend(f"  + {scan}" for scan in sorted(new_scans - old_scans))
+        findings.extend(f"  index no longer used: {name}" for name in sorted(old_indexes - new_indexes))
+        findings.extend(f"  index newly used: {name}" for name in sorted(new_indexes - old_indexes))
+    for label, old_value, new_value in (
+        ("shared hit+read blocks", old.shared_blocks_med, new.shared_blocks_med),
+        ("shared read blocks", old.shared_read_med, new.shared_read_med),
+    ):
+        change = _relative_change(old_value, new_value)
+        if abs(change) > buffer_threshold and abs(new_value - old_value) >= MIN_BLOCK_DELTA:
+            findings.append(f"{label} (median) {old_value:g} -> {new_value:g} ({change:+.0%})")
+    return findings
+
+
+# {benchmark name: {run label: findings}} for every run with plans in both reports that changed.
+def diff_reports(
+        old_report: Dict[str, Any], new_report: Dict[str, Any], buffer_threshold: float = 0.5, include_st: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    old_benchmarks = {bench["name"]: bench for bench in old_report.get("benchmarks", [])}
+    changes: Dict[str, Dict[str, List[str]]] = {}
+    for new_bench in new_report.get("benchmarks", []):
+        old_bench = old_benchmarks.get(new_bench["name"])
+        if old_bench is None:
+            continue
+        old_runs = dict(_runs(old_bench))
+        for label, new_run in _runs(new_bench):
+            if not include_st and "CST_" not in label:
+                continue
+            old_run = old_runs.get(label)
+            if old_run is None:
+                continue
+            old_profile, new_profile = profile_run(old_run), profile_run(new_run)
+            if old_profile is None or new_profile is None:
+                continue
+            findings = diff_profiles(old_profile, new_profile, buffer_threshold)
+            if findings:
+                changes.setdefault(new_bench["name"], {})[label] = findings
+    return changes
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Flag plan and buffer-profile changes of the same queries between two run_*.json reports."
+    )
+    parser.add_argument("old_report", type=Path)
+    parser.add_argument("new_report", type=Path)
+    parser.add_argument("--buffer-threshold", type=float, default=0.5, help="relative change that is flagged")
+    parser.add_argument("--include-st", action="store_true", help="also compare the ST_ baselines")
+    args = parser.parse_args(argv)
+
+    with args.old_report.open(encoding="utf-8") as fh:
+        old_report = json.load(fh)
+    with args.new_report.open(encoding="utf-8") as fh:
+        new_report = json.load(fh)
+
+    changes = diff_reports(old_report, new_report, args.buffer_threshold, args.include_st)
+    if not changes:
+        print("No plan or buffer changes.")
+        return 0
+    for name, runs in changes.items():
+        print(f"\n--- {name} ---")
+        for label, findings in runs.items():
+            print(f"{label}:")
+            for finding in findings:
+                print(f"  {finding}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# EXPLAIN JSON key -> name in the report.
+SHAPE_FIELDS = {
+    "Node Type": "node_type",
+    "Parent Relationship": "parent",
+    "Subplan Name": "subplan",
+    "Join Type": "join_type",
+    "Strategy": "strategy",
+    "Relation Name": "relation",
+    "Index Name": "index",
+    "CTE Name": "cte",
+    "Function Name": "function",
+}
+ACTUAL_FIELDS = {
+    "Actual Rows": "rows",
+    "Actual Loops": "loops",
+    "Shared Hit Blocks": "shared_hit",
+    "Shared Read Blocks": "shared_read",
+    "Shared Dirtied Blocks": "shared_dirtied",
+    "Temp Read Blocks": "temp_read",
+    "Temp Written Blocks": "temp_written",
+    "Rows Removed by Filter": "rows_removed_by_filter",
+    "Rows Removed by Index Recheck": "rows_removed_by_recheck",
+}
+# Per-execution I/O accounting: root-node buffer counts (they include all child nodes), rows removed
+# by filters over all nodes, and TOAST blocks (added by the runner from pg_stat_get_xact_blocks_*).
+ROOT_BUFFER_FIELDS = ("shared_hit", "shared_read", "shared_dirtied", "temp_read", "temp_written")
+IO_FIELDS = ROOT_BUFFER_FIELDS + ("rows_removed_by_filter", "toast_hit", "toast_read")
+SCAN_NODE_TYPES = ("Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Index Scan", "Bitmap Heap Scan")
+
+
+@dataclass(frozen=True)
+class CapturedPlan:
+    plan_hash: str
+    shape: List[Dict[str, Any]]
+    actuals: List[Dict[str, float]]
+    planning_ms: float
+    execution_ms: float
+    io: Dict[str, float]
+
+
+def _walk(node: Dict[str, Any], depth: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+
+# `explain` is one EXPLAIN JSON document (the object holding "Plan"); only the shape is hashed.
+def capture_plan(explain: Dict[str, Any]) -> CapturedPlan:
+    shape: List[Dict[str, Any]] = []
+    actuals: List[Dict[str, float]] = []
+    for depth, node in _walk(explain["Plan"]):
+        shape.append({"depth": depth, **{name: node[key] for key, name in SHAPE_FIELDS.items() if key in node}})
+        actuals.append({name: node[key] for key, name in ACTUAL_FIELDS.items() if key in node})
+    digest = hashlib.sha1(json.dumps(shape, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return CapturedPlan(
+        digest,
+        shape,
+        actuals,
+        float(explain.get("Planning Time", 0.0)),
+        float(explain.get("Execution Time", 0.0)),
+        io_counts(actuals),
+    )
+
+
+def io_counts(actuals: List[Dict[str, float]]) -> Dict[str, float]:
+    root = actuals[0] if actuals else {}
+    counts = {name: float(root.get(name, 0)) for name in ROOT_BUFFER_FIELDS}
+    # "Rows Removed by Filter" is a per-loop average.
+    counts["rows_removed_by_filter"] = float(
+        sum(node.get("rows_removed_by_filter", 0) * node.get("loops", 1) for node in actuals)
+    )
+    return counts
+
+
+# auto_explain notices look like "duration: ... ms  plan:\n{...}".
+def parse_auto_explain(message: str) -> Optional[Dict[str, Any]]:
+    start = message.find("{")
+    if start < 0:
+        return None
+    try:
+        data = json.loads(message[start:])
+    except json.JSONDecodeError:
+        return None
+    # auto_explain wraps the plan like EXPLAIN does, with "Query Text" next to "Plan".
+    return data if "Plan" in data else None
+
+
+def plan_sample(plan: CapturedPlan) -> Dict[str, Any]:
+    return {"plan_hash": plan.plan_hash, "plan_actuals": plan.actuals, "io": plan.io}
+
+
+# Schema-qualified only when the plan is VERBOSE.
+def relation_names(explain: Dict[str, Any]) -> List[str]:
+    names = set()
+    for _, node in _walk(explain["Plan"]):
+        if "Relation Name" in node:
+            schema = node.get("Schema")
+            names.add(f"{schema}.{node['Relation Name']}" if schema else node["Relation Name"])
+    return sorted(names)
+
+
+def index_names(shape: List[Dict[str, Any]]) -> List[str]:
+    return sorted({node["index"] for node in shape if "index" in node})
+
+
+def scans(shape: List[Dict[str, Any]]) -> List[str]:
+    described = set()
+    for node in shape:
+        if node.get("node_type") in SCAN_NODE_TYPES:
+            target = node.get("index") or node.get("relation") or "?"
+            described.add(f"{node['node_type']} on {target}")
+    return sorted(described)
+
+
+# EXPLAIN reports the root node's buffer counts including all child nodes.
+def root_buffers(actuals: List[Dict[str, float]]) -> Dict[str, float]:
+    if not actuals:
+        return {}
+    return {name: value for name, value in actuals[0].items() if name.startswith(("shared_", "temp_"))}
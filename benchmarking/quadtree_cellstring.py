@@ -0,0 +1,179 @@
+"""Multi-resolution, quadtree-compacted cellstrings.
+
+A compacted cellstring holds cells of mixed zoom: every complete block of four
+sibling cells is replaced by their parent, recursively, so a filled area is a
+handful of coarse cells plus a fringe of fine ones, and one column replaces the
+three full-resolution cellstring_z13/z17/z21 columns.
+
+Cells are addressed by their tile (x, y) at a zoom, as returned by cst_tilexy,
+and ordered by Morton (Z-order) code. A cell at zoom z with Morton code m covers
+the contiguous z21 Morton range [m << 2(21 - z), (m + 1) << 2(21 - z)), so every
+operation runs on those ranges with the CompactCellString run operations, without
+expanding coarse cells. A stored cell is one int64: (morton << 5) | zoom.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from benchmarking.compact_cellstring import (
+    CompactCellString,
+    compact_contains,
+    compact_difference,
+    compact_intersection_cardinality,
+    compact_intersects,
+)
+
+MAX_ZOOM = 21
+_ZOOM_BITS = 5
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Insert a zero bit above every bit of a 32-bit value."""
+    v = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+def _compact_bits(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.uint64) & np.uint64(0x5555555555555555)
+    v = (v | (v >> np.uint64(1))) & np.uint64(0x3333333333333333)
+    v = (v | (v >> np.uint64(2))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v >> np.uint64(4))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v >> np.uint64(8))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v >> np.uint64(16))) & np.uint64(0x00000000FFFFFFFF)
+    return v
+
+
+def morton_encode(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return (_spread_bits(x) | (_spread_bits(y) << np.uint64(1))).astype(np.int64)
+
+
+def morton_decode(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    codes = codes.astype(np.uint64)
+    return _compact_bits(codes).astype(np.int64), _compact_bits(codes >> np.uint64(1)).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class QuadtreeCellString:
+    """Disjoint mixed-zoom cells ordered by their position on the z21 Morton curve."""
+
+    codes: np.ndarray
+    zooms: np.ndarray
+
+    @classmethod
+    def from_tiles(cls, x: Sequence[int], y: Sequence[int], zoom: int = MAX_ZOOM, min_zoom: int = 0) -> "QuadtreeCellString":
+        """Compact the tiles (x, y) of one zoom: complete sibling blocks become their parent, down to `min_zoom`."""
+        codes = np.unique(morton_encode(np.asarray(x), np.asarray(y)))
+        kept_codes = []
+        kept_zooms = []
+        level = zoom
+        while level > min_zoom and codes.size:
+            parents, counts = np.unique(codes >> 2, return_counts=True)
+            full = parents[counts == 4]
+            partial = ~np.isin(codes >> 2, full)
+            kept_codes.append(codes[partial])
+            kept_zooms.append(np.full(int(partial.sum()), level, dtype=np.int8))
+            codes = full
+            level -= 1
+        kept_codes.append(codes)
+        kept_zooms.append(np.full(codes.size, level, dtype=np.int8))
+        return cls._sorted(np.concatenate(kept_codes), np.concatenate(kept_zooms))
+
+    @classmethod
+    def _sorted(cls, codes: np.ndarray, zooms: np.ndarray) -> "QuadtreeCellString":
+        order = np.argsort(codes << (2 * (MAX_ZOOM - zooms.astype(np.int64))), kind="stable")
+        return cls(codes[order].astype(np.int64), zooms[order].astype(np.int8))
+
+    @classmethod
+    def from_ranges(cls, ranges: CompactCellString) -> "QuadtreeCellString":
+        """Split z21 Morton runs into the fewest aligned quadtree cells."""
+        starts = ranges.starts.copy()
+        ends = ranges.ends
+        codes = []
+        zooms = []
+        active = starts < ends
+        while active.any():
+            start = starts[active]
+            remaining = ends[active] - start
+            # Largest level k with start aligned to 4**k and 4**k <= remaining.
+            level = np.zeros(start.size, dtype=np.int64)
+            for k in range(1, MAX_ZOOM + 1):
+                size = np.int64(1) << (2 * k)
+                fits = ((start & (size - 1)) == 0) & (remaining >= size)
+                if not fits.any():
+                    break
+                level[fits] = k
+            codes.append(start >> (2 * level))
+            zooms.append((MAX_ZOOM - level).astype(np.int8))
+            starts[active] = start + (np.int64(1) << (2 * level))
+            active = starts < ends
+        if not codes:
+            return cls(_EMPTY, np.empty(0, dtype=np.int8))
+        return cls._sorted(np.concatenate(codes), np.concatenate(zooms))
+
+    def __len__(self) -> int:
+        return int(self.codes.size)
+
+    def to_ranges(self) -> CompactCellString:
+        shift = 2 * (MAX_ZOOM - self.zooms.astype(np.int64))
+        starts = self.codes << shift
+        ends = (self.codes + 1) << shift
+        if starts.size == 0:
+            return CompactCellString(starts, ends)
+        # Merge touching cells into runs.
+        new_run = np.concatenate(([True], starts[1:] != ends[:-1]))
+        run_starts = np.flatnonzero(new_run)
+        run_ends = np.concatenate((run_starts[1:], [starts.size])) - 1
+        return CompactCellString(starts[run_starts], ends[run_ends])
+
+    def tiles_at(self, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(x, y) of the cells at `zoom` touched by this cellstring, as in the cellstring_z{zoom} columns."""
+        shift = 2 * (zoom - self.zooms.astype(np.int64))
+        finer = shift < 0
+        first = np.where(finer, self.codes >> np.maximum(-shift, 0), self.codes << np.maximum(shift, 0))
+        counts = np.where(finer, 1, np.int64(1) << np.maximum(shift, 0))
+        offsets = np.cumsum(counts) - counts
+        codes = np.repeat(first, counts) + (np.arange(int(counts.sum())) - np.repeat(offsets, counts))
+        return morton_decode(np.unique(codes))
+
+    @property
+    def cardinality(self) -> int:
+        """Number of z21 cells covered."""
+        return int((np.int64(1) << (2 * (MAX_ZOOM - self.zooms.astype(np.int64)))).sum())
+
+    def pack(self) -> np.ndarray:
+        return (self.codes << _ZOOM_BITS) | self.zooms.astype(np.int64)
+
+    @classmethod
+    def unpack(cls, packed: np.ndarray) -> "QuadtreeCellString":
+        packed = np.asarray(packed, dtype=np.int64)
+        return cls._sorted(packed >> _ZOOM_BITS, (packed & ((1 << _ZOOM_BITS) - 1)).astype(np.int8))
+
+
+def qt_intersects(a: QuadtreeCellString, b: QuadtreeCellString) -> bool:
+    return compact_intersects(a.to_ranges(), b.to_ranges())
+
+
+def qt_contains(a: QuadtreeCellString, b: QuadtreeCellString) -> bool:
+    return compact_contains(a.to_ranges(), b.to_ranges())
+
+
+def qt_difference(a: QuadtreeCellString, b: QuadtreeCellString) -> QuadtreeCellString:
+    return QuadtreeCellString.from_ranges(compact_difference(a.to_ranges(), b.to_ranges()))
+
+
+def qt_coverage(cells: QuadtreeCellString, area: QuadtreeCellString) -> float:
+    """Percentage of `area` (counted in z21 cells) covered by `cells`, rounded like CST_Coverage."""
+    area_ranges = area.to_ranges()
+    if area_ranges.cardinality == 0:
+        return 0.0
+    covered = compact_intersection_cardinality(cells.to_ranges(), area_ranges)
+    return round(100.0 * covered / area_ranges.cardinality, 2)
@@ -0,0 +1,140 @@
+"""Convert cellstrings to quadtree-compacted form and compare storage and area-query speed.
+
+The converter reads cellstring_z21 of a table, resolves every cell to its tile
+with cst_tilexy, compacts it (QuadtreeCellString) and writes the packed mixed-zoom
+cells into `<table>_qt`. The benchmark reports, per table, the size of the three
+full-resolution columns against the single compacted column, then times the
+coverage of every area in benchmark.area_cs by each trajectory: on the z21
+arrays (CellStringTable) and on the compacted form. Coverage values are compared.
+
+    python -m benchmarking.quadtree_cellstring_benchmark [trajectory_limit]
+"""
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarking.cellstring import CellStringTable, as_cellstring
+from benchmarking.connect import connect_to_db
+from benchmarking.core import median_or_zero
+from benchmarking.quadtree_cellstring import QuadtreeCellString, qt_coverage
+
+# table -> key column
+TABLES = {
+    "prototype2.trajectory_supercover_cs": "trajectory_id",
+    "prototype2.stop_cs": "stop_id",
+    "benchmark.area_cs": "area_id",
+}
+INSERT_BATCH_SIZE = 1000
+
+
+def fetch_quadtree_cellstrings(conn, table: str, key_column: str, limit: Optional[int] = None):
+    """Compacted cellstring_z21 per key, plus the z21 arrays they came from."""
+    keys_sql = f"SELECT {key_column}, cellstring_z21 FROM {table} ORDER BY {key_column}"
+    if limit is not None:
+        keys_sql += f" LIMIT {int(limit)}"
+    compacted: Dict[int, QuadtreeCellString] = {}
+    arrays: Dict[int, np.ndarray] = {}
+    with conn.cursor() as cur:
+        # cst_tilexy returns (x, y); json_agg keeps the column order, so they are read by position.
+        cur.execute(
+            f"""
+            SELECT src.key, src.cells, json_agg(xy)
+            FROM ({keys_sql}) AS src(key, cells)
+            CROSS JOIN LATERAL unnest(src.cells) AS cell
+            CROSS JOIN LATERAL cst_tilexy(cell, 21) AS xy
+            GROUP BY src.key, src.cells
+            """
+        )
+        for key, cells, tiles in cur:
+            tile_array = np.array([list(tile.values())[:2] for tile in tiles], dtype=np.int64)
+            compacted[int(key)] = QuadtreeCellString.from_tiles(tile_array[:, 0], tile_array[:, 1])
+            arrays[int(key)] = as_cellstring(cells)
+    return compacted, arrays
+
+
+def write_quadtree_table(conn, table: str, key_column: str, compacted: Dict[int, QuadtreeCellString]) -> str:
+    target = f"{table}_qt"
+    rows = [(key, cells.pack().tolist()) for key, cells in sorted(compacted.items())]
+    with conn.cursor() as cur:
+        with conn.transaction():
+            cur.execute(f"DROP TABLE IF EXISTS {target}")
+            cur.execute(f"CREATE TABLE {target} ({key_column} bigint PRIMARY KEY, cellstring_qt bigint[] NOT NULL)")
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                cur.executemany(
+                    f"INSERT INTO {target} ({key_column}, cellstring_qt) VALUES (%s, %s)",
+                    rows[start:start + INSERT_BATCH_SIZE],
+                )
+    return target
+
+
+def _storage_bytes(cur, table: str, columns: List[str]) -> int:
+    cur.execute(f"SELECT COALESCE(SUM({' + '.join(f'pg_column_size({c})' for c in columns)}), 0) FROM {table}")
+    return int(cur.fetchone()[0])
+
+
+def run(trajectory_limit: Optional[int]) -> None:
+    conn = connect_to_db()
+    try:
+        loaded = {}
+        for table, key_column in TABLES.items():
+            limit = trajectory_limit if table.startswith("prototype2.trajectory") else None
+            start = time.perf_counter()
+            compacted, arrays = fetch_quadtree_cellstrings(conn, table, key_column, limit)
+            convert_ms = (time.perf_counter() - start) * 1000.0
+            target = write_quadtree_table(conn, table, key_column, compacted)
+            loaded[table] = (compacted, arrays)
+
+            with conn.cursor() as cur:
+                full_bytes = _storage_bytes(cur, table, ["cellstring_z13", "cellstring_z17", "cellstring_z21"])
+                compact_bytes = _storage_bytes(cur, target, ["cellstring_qt"])
+            z21_cells = sum(cells.size for cells in arrays.values())
+            compact_cells = sum(len(cells) for cells in compacted.values())
+            print(
+                f"\n{table}: rows={len(compacted)}, z21 cells={z21_cells}, compacted cells={compact_cells}, "
+                f"convert_ms={round(convert_ms, 3)}"
+            )
+            print(
+                f"  Storage: z13+z17+z21 columns={full_bytes} B, compacted column={compact_bytes} B "
+                f"(ratio {round(full_bytes / max(compact_bytes, 1), 2)}x)"
+            )
+
+        trajectories, trajectory_arrays = loaded["prototype2.trajectory_supercover_cs"]
+        areas, area_arrays = loaded["benchmark.area_cs"]
+        trajectory_table = CellStringTable.from_mapping(trajectory_arrays)
+        trajectory_keys = [int(key) for key in trajectory_table.keys]
+        for area_id in sorted(areas):
+            area_array = area_arrays[area_id]
+            start = time.perf_counter()
+            counts = trajectory_table.intersection_cardinalities(area_array)
+            array_coverage = {
+                key: round(100.0 * int(count) / area_array.size, 2) if area_array.size else 0.0
+                for key, count in zip(trajectory_keys, counts)
+            }
+            array_ms = (time.perf_counter() - start) * 1000.0
+
+            area = areas[area_id]
+            per_trajectory_ms: List[float] = []
+            start = time.perf_counter()
+            quadtree_coverage = {}
+            for key in trajectory_keys:
+                single = time.perf_counter()
+                quadtree_coverage[key] = qt_coverage(trajectories[key], area)
+                per_trajectory_ms.append((time.perf_counter() - single) * 1000.0)
+            quadtree_ms = (time.perf_counter() - start) * 1000.0
+
+            mismatches = sum(1 for key in trajectory_keys if array_coverage[key] != quadtree_coverage[key])
+            print(
+                f"Area {area_id}: cells z21={area_array.size}, compacted={len(area)}; "
+                f"coverage of all trajectories: arrays {round(array_ms, 3)} ms, compacted {round(quadtree_ms, 3)} ms "
+                f"(median {median_or_zero(per_trajectory_ms)} ms per trajectory), mismatches={mismatches}"
+            )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else None)
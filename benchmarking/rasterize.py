@@ -0,0 +1,114 @@
+"""Vectorized rasterization of trajectories to map tiles.
+
+Points are projected to fractional Web Mercator tile coordinates at a zoom, and
+every segment between consecutive points of the same trajectory is rasterized
+for all segments at once:
+
+- bresenham: integer endpoints, one cell per step along the major axis (8-connected).
+- supercover: every cell the segment passes through, found from its crossings of the
+  vertical and horizontal grid lines (4-connected).
+
+Cells are (x, y) tiles; turning them into cell IDs is left to the caller.
+"""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+ENCODINGS = ("bresenham", "supercover")
+_MAX_LATITUDE = 85.05112878
+
+
+def tile_coordinates(lon: np.ndarray, lat: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fractional tile coordinates (x, y) of WGS84 lon/lat at `zoom`."""
+    scale = float(1 << zoom)
+    lat_rad = np.radians(np.clip(lat, -_MAX_LATITUDE, _MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * scale
+    limit = np.nextafter(scale, 0)
+    return np.clip(x, 0, limit), np.clip(y, 0, limit)
+
+
+def _segments(groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start indices of segments (i, i + 1) within a group, and indices of single-point groups."""
+    same_group = groups[1:] == groups[:-1]
+    starts = np.flatnonzero(same_group)
+    first = np.concatenate(([True], ~same_group))
+    last = np.concatenate((~same_group, [True]))
+    singles = np.flatnonzero(first & last)
+    return starts, singles
+
+
+def bresenham(x: np.ndarray, y: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Cells (group, x, y) of the Bresenham lines between consecutive points of each group."""
+    ix = np.floor(x).astype(np.int64)
+    iy = np.floor(y).astype(np.int64)
+    starts, singles = _segments(groups)
+    dx = ix[starts + 1] - ix[starts]
+    dy = iy[starts + 1] - iy[starts]
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    counts = steps + 1
+    segment = np.repeat(np.arange(starts.size), counts)
+    step = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    denominator = np.maximum(steps[segment], 1)
+    # Round half up along the minor axis (np.rint would round half to even), so a segment yields the
+    # same cells whichever direction it is traversed in.
+    cell_x = ix[starts][segment] + np.floor(step * dx[segment] / denominator + 0.5).astype(np.int64)
+    cell_y = iy[starts][segment] + np.floor(step * dy[segment] / denominator + 0.5).astype(np.int64)
+    return (
+        np.concatenate((groups[starts][segment], groups[singles])),
+        np.concatenate((cell_x, ix[singles])),
+        np.concatenate((cell_y, iy[singles])),
+    )
+
+
+def _crossings(start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Grid-line crossings along one axis: (segment, parameter t, step direction)."""
+    first_cell = np.floor(start).astype(np.int64)
+    last_cell = np.floor(end).astype(np.int64)
+    counts = np.abs(last_cell - first_cell)
+    direction = np.sign(last_cell - first_cell)
+    segment = np.repeat(np.arange(start.size), counts)
+    k = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    # Moving up, the k-th crossed line is first_cell + 1 + k; moving down it is first_cell - k.
+    line = np.where(direction[segment] > 0, first_cell[segment] + 1 + k, first_cell[segment] - k)
+    delta = end[segment] - start[segment]
+    t = (line - start[segment]) / np.where(delta == 0, 1.0, delta)
+    return segment, t, direction[segment]
+
+
+def supercover(x: np.ndarray, y: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Cells (group, x, y) crossed by the segments between consecutive points of each group."""
+    starts, singles = _segments(groups)
+    x0, y0, x1, y1 = x[starts], y[starts], x[starts + 1], y[starts + 1]
+    x_segment, x_t, x_step = _crossings(x0, x1)
+    y_segment, y_t, y_step = _crossings(y0, y1)
+
+    # Every segment starts in its first cell; each crossing moves one cell along x or y, in order of t.
+    segment = np.concatenate((np.arange(starts.size), x_segment, y_segment))
+    t = np.concatenate((np.full(starts.size, -1.0), x_t, y_t))
+    step_x = np.concatenate((np.floor(x0).astype(np.int64), x_step, np.zeros(y_step.size, dtype=np.int64)))
+    step_y = np.concatenate((np.floor(y0).astype(np.int64), np.zeros(x_step.size, dtype=np.int64), y_step))
+    order = np.lexsort((t, segment))
+    segment, step_x, step_y = segment[order], step_x[order], step_y[order]
+
+    # Cumulative sums restarted at each segment's first cell.
+    first = np.concatenate(([True], segment[1:] != segment[:-1]))
+    cell_x = np.cumsum(step_x)
+    cell_y = np.cumsum(step_y)
+    base = np.flatnonzero(first)
+    run = np.cumsum(first) - 1
+    offset_x = np.concatenate(([0], cell_x[base[1:] - 1]))
+    offset_y = np.concatenate(([0], cell_y[base[1:] - 1]))
+    cell_x = cell_x - offset_x[run]
+    cell_y = cell_y - offset_y[run]
+
+    return (
+        np.concatenate((groups[starts][segment], groups[singles])),
+        np.concatenate((cell_x, np.floor(x[singles]).astype(np.int64))),
+        np.concatenate((cell_y, np.floor(y[singles]).astype(np.int64))),
+    )
+
+
+RASTERIZERS = {"bresenham": bresenham, "supercover": supercover}
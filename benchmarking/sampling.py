@@ -0,0 +1,207 @@
+"""Seeded, stratified benchmark samples persisted in benchmark.benchmark_samples.
+
+A sample is drawn once from a TABLESAMPLE ... REPEATABLE subset of the source
+table (BERNOULLI by default: SYSTEM picks whole pages, so its rows cluster by
+ingest order), widened until every stratum is full, split into equal-count strata by a metric (length, MBR area, area or
+cellstring cardinality) and ordered inside each stratum by a seeded hash. It is
+stored under a name and reused by later runs, so runs can be compared against
+each other and startup no longer sorts the whole table.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from collections import Counter
+from typing import Dict, List, Tuple
+
+SAMPLES_TABLE = "benchmark.benchmark_samples"
+TABLESAMPLE_METHODS = ("BERNOULLI", "SYSTEM")
+
+CREATE_SAMPLES_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SAMPLES_TABLE} (
+    sample_name text NOT NULL,
+    kind text NOT NULL,
+    ordinal int NOT NULL,
+    object_id bigint NOT NULL,
+    stratum int NOT NULL,
+    seed int NOT NULL,
+    stratify_by text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (sample_name, kind, ordinal)
+);
+"""
+
+
+@dataclass(frozen=True)
+class SampleSource:
+    id_column: str
+    base_table: str
+    join_sql: str
+    filter_sql: str
+    metrics: Dict[str, str]
+
+
+# base alias is "src", the joined cellstring table is "cs".
+SAMPLE_SOURCES: Dict[str, SampleSource] = {
+    "trajectory": SampleSource(
+        id_column="trajectory_id",
+        base_table="prototype2.trajectory_ls",
+        join_sql="JOIN prototype2.trajectory_cs AS cs ON cs.trajectory_id = src.trajectory_id",
+        filter_sql="ST_Length(ST_Transform(src.geom, 3857)) > %(min_length_m)s",
+        metrics={
+            "length": "ST_Length(ST_Transform(src.geom, 3857))",
+            "mbr_area": "ST_Area(ST_Envelope(ST_Transform(src.geom, 3857)))",
+            "cardinality": "Cardinality(cs.cellstring_z21)",
+        },
+    ),
+    "stop": SampleSource(
+        id_column="stop_id",
+        base_table="prototype2.stop_poly",
+        join_sql="JOIN prototype2.stop_cs AS cs ON cs.stop_id = src.stop_id",
+        filter_sql="TRUE",
+        metrics={
+            "area": "ST_Area(ST_Transform(src.geom, 3857))",
+            "mbr_area": "ST_Area(ST_Envelope(ST_Transform(src.geom, 3857)))",
+            "cardinality": "Cardinality(cs.cellstring_z21)",
+        },
+    ),
+}
+
+
+def _tablesample_percent(cur, table: str, size: int, oversample: float) -> float:
+    cur.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    reltuples = float(row[0]) if row and row[0] and row[0] > 0 else 0.0
+    if reltuples <= 0:
+        return 100.0
+    return min(100.0, max(0.01, 100.0 * oversample * size / reltuples))
+
+
+def draw_sample(
+        cur,
+        kind: str,
+        size: int,
+        seed: int,
+        stratify_by: str,
+        strata: int = 4,
+        oversample: float = 20.0,
+        min_length_m: float = 500,
+        method: str = "BERNOULLI",
+) -> List[Tuple[int, int]]:
+    """Return (object_id, stratum) pairs: an equal share of `size` from each of `strata` metric buckets.
+
+    The TABLESAMPLE percent is doubled until every stratum is full; raises ValueError if even the
+    whole table cannot fill them.
+    """
+    source = SAMPLE_SOURCES[kind]
+    if stratify_by not in source.metrics:
+        raise ValueError(f"Cannot stratify {kind} samples by {stratify_by!r}, expected one of {sorted(source.metrics)}")
+    if method not in TABLESAMPLE_METHODS:
+        raise ValueError(f"Unknown TABLESAMPLE method {method!r}, expected one of {TABLESAMPLE_METHODS}")
+    if size <= 0:
+        return []
+
+    percent = _tablesample_percent(cur, source.base_table, size, oversample)
+    while True:
+        drawn = _draw_from_tablesample(cur, source, method, percent, size, seed, stratify_by, strata, min_length_m)
+        per_stratum_counts = Counter(stratum for _, stratum in drawn)
+        if len(drawn) == size and all(per_stratum_counts[stratum] >= size // strata for stratum in range(1, strata + 1)):
+            return drawn
+        if percent >= 100.0:
+            raise ValueError(
+                f"Only {len(drawn)} of {size} {kind} ids could be drawn into {strata} strata "
+                f"(per stratum: {dict(sorted(per_stratum_counts.items()))})"
+            )
+        percent = min(100.0, percent * 2)
+
+
+def _draw_from_tablesample(
+        cur,
+        source: SampleSource,
+        method: str,
+        percent: float,
+        size: int,
+        seed: int,
+        stratify_by: str,
+        strata: int,
+        min_length_m: float,
+) -> List[Tuple[int, int]]:
+    per_stratum = math.ceil(size / strata)
+    cur.execute(
+        f"""
+        WITH candidates AS (
+            SELECT src.{source.id_column} AS object_id,
+                   {source.metrics[stratify_by]} AS metric
+            FROM {source.base_table} AS src TABLESAMPLE {method} (%(percent)s) REPEATABLE (%(seed)s)
+            {source.join_sql}
+            WHERE {source.filter_sql}
+        ),
+        bucketed AS (
+            SELECT object_id, ntile(%(strata)s) OVER (ORDER BY metric, object_id) AS stratum
+            FROM candidates
+            WHERE metric IS NOT NULL
+        ),
+        ranked AS (
+            SELECT object_id,
+                   stratum,
+                   row_number() OVER (
+                       PARTITION BY stratum ORDER BY md5(object_id::text || ':' || %(seed)s::text), object_id
+                   ) AS rank_in_stratum
+            FROM bucketed
+        )
+        SELECT object_id, stratum
+        FROM ranked
+        WHERE rank_in_stratum <= %(per_stratum)s
+        ORDER BY rank_in_stratum, stratum
+        LIMIT %(size)s
+        """,
+        {
+            "percent": percent,
+            "seed": seed,
+            "strata": strata,
+            "per_stratum": per_stratum,
+            "size": size,
+            "min_length_m": min_length_m,
+        },
+    )
+    return [(int(object_id), int(stratum)) for object_id, stratum in cur.fetchall()]
+
+
+def load_sample(cur, sample_name: str, kind: str) -> List[int]:
+    cur.execute(
+        f"SELECT object_id FROM {SAMPLES_TABLE} WHERE sample_name = %s AND kind = %s ORDER BY ordinal",
+        (sample_name, kind),
+    )
+    return [int(row[0]) for row in cur.fetchall()]
+
+
+def load_or_create_sample(
+        conn,
+        sample_name: str,
+        kind: str,
+        size: int,
+        seed: int,
+        stratify_by: str,
+        **draw_options,
+) -> List[int]:
+    """IDs of the named sample, drawing and persisting it first if it does not exist yet."""
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SAMPLES_TABLE_SQL)
+        existing = load_sample(cur, sample_name, kind)
+        if existing:
+            if len(existing) != size:
+                print(f"Sample {sample_name!r} ({kind}) has {len(existing)} ids; reusing it instead of drawing {size}.")
+            return existing
+
+        drawn = draw_sample(cur, kind, size, seed, stratify_by, **draw_options)
+        with conn.transaction():
+            cur.executemany(
+                f"INSERT INTO {SAMPLES_TABLE} (sample_name, kind, ordinal, object_id, stratum, seed, stratify_by) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                [
+                    (sample_name, kind, ordinal, object_id, stratum, seed, stratify_by)
+                    for ordinal, (object_id, stratum) in enumerate(drawn)
+                ],
+            )
+        print(f"Stored new {kind} sample {sample_name!r} with {len(drawn)} ids (seed={seed}, stratify_by={stratify_by}).")
+        return [object_id for object_id, _ in drawn]
@@ -4,10 +4,9 @@ from typing import Dict, List, Tuple
 
 from dotenv import load_dotenv
 from benchmarking.connect import connect_to_db
+from benchmarking.metrics import METRICS_TABLE, load_metrics, missing_metrics
 
 JSON_PATH = Path("benchmarking/benchmark_results/run_20251209_095304.json")
-ZOOMS = ("z13", "z17", "z21")
-TABLE = "prototype2.trajectory_supercover_cs"
 
 
 def _collect_samples(node: Dict) -> List[int]:
@@ -46,19 +45,16 @@ def load_ids() -> Tuple[Dict, List[int]]:
     return data, sorted(ids)
 
 
-def fetch_supercover(conn, zoom: str, ids: List[int]) -> Dict[int, int]:
+def fetch_supercover(conn, ids: List[int]) -> Dict[str, Dict[int, int]]:
     if not ids:
         return {}
-    with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            SELECT trajectory_id, Cardinality(cellstring_{zoom})
-            FROM {TABLE}
-            WHERE trajectory_id = ANY(%s)
-            """,
-            (ids,),
+    missing = missing_metrics(conn, "trajectory", ids)
+    if missing:
+        raise SystemExit(
+            f"{len(missing)} of {len(ids)} trajectories have no row in {METRICS_TABLE} "
+            f"(first: {missing[:10]}). Run `python -m benchmarking.main --refresh-metrics` first."
         )
-        return {int(traj_id): int(count) for traj_id, count in cur.fetchall() if count is not None}
+    return load_metrics(conn, ids, [])["trajectory"].cardinalities.get("supercover", {})
 
 
 def embed(data: Dict, lookup_per_zoom: Dict[str, Dict[int, int]]) -> None:
@@ -75,7 +71,7 @@ if __name__ == "__main__":
         raise SystemExit("No trajectory IDs found in the report.")
     conn = connect_to_db()
     try:
-        per_zoom = {zoom: fetch_supercover(conn, zoom, ids) for zoom in ZOOMS}
+        per_zoom = fetch_supercover(conn, ids)
     finally:
         conn.close()
     embed(data, per_zoom)
@@ -0,0 +1,87 @@
+-- Hierarchical filter-and-refine intersection (z13 -> z17 -> z21)
+-- Cell IDs are hierarchical tiles, so a trajectory that does not intersect a probe at z13
+-- cannot intersect it at z17 or z21. A coarse z13 probe (small arrays, GIN friendly) narrows
+-- the candidates, and only the survivors are refined at the finer zooms.
+
+-- One stage: trajectories of traj_table whose cellstring at zoom_level intersects the probe.
+-- candidates = NULL probes the whole table, otherwise only the given trajectory ids are refined.
+CREATE OR REPLACE FUNCTION CST_Intersects_Candidates(
+    traj_table regclass,
+    zoom_level int,
+    probe cellstring,
+    candidates bigint[] DEFAULT NULL
+) RETURNS SETOF bigint
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    IF candidates IS NULL THEN
+        RETURN QUERY EXECUTE format(
+            'SELECT t.trajectory_id::bigint FROM %s AS t WHERE CST_Intersects(t.cellstring_z%s, $1)',
+            traj_table, zoom_level
+        ) USING probe;
+    ELSE
+        RETURN QUERY EXECUTE format(
+            'SELECT t.trajectory_id::bigint FROM %s AS t '
+            'WHERE t.trajectory_id = ANY($2) AND CST_Intersects(t.cellstring_z%s, $1)',
+            traj_table, zoom_level
+        ) USING probe, candidates;
+    END IF;
+END;
+$$;
+
+-- Full cascade: z13 prefilter, refined at z17, final answer at z21.
+CREATE OR REPLACE FUNCTION CST_Cascade_Intersects(
+    traj_table regclass,
+    probe_z13 cellstring,
+    probe_z17 cellstring,
+    probe_z21 cellstring
+) RETURNS SETOF bigint
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    candidates bigint[];
+BEGIN
+    candidates := ARRAY(SELECT CST_Intersects_Candidates(traj_table, 13, probe_z13));
+    IF cardinality(candidates) = 0 THEN
+        RETURN;
+    END IF;
+    candidates := ARRAY(SELECT CST_Intersects_Candidates(traj_table, 17, probe_z17, candidates));
+    IF cardinality(candidates) = 0 THEN
+        RETURN;
+    END IF;
+    RETURN QUERY SELECT CST_Intersects_Candidates(traj_table, 21, probe_z21, candidates);
+END;
+$$;
+
+
+-- Examples
+-- Trajectories intersecting area 3
+SELECT trajectory_id
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Cascade_Intersects(
+    'prototype2.trajectory_supercover_cs'::regclass,
+    area.cellstring_z13,
+    area.cellstring_z17,
+    area.cellstring_z21
+) AS trajectory_id
+WHERE area.area_id = 3;
+
+-- Via query Skagen-Storebælt-Bornholm
+SELECT trajectory_id
+FROM benchmark.crossing_cs AS c
+CROSS JOIN LATERAL CST_Cascade_Intersects(
+    'prototype2.trajectory_supercover_cs'::regclass, c.cellstring_z13, c.cellstring_z17, c.cellstring_z21
+) AS trajectory_id
+WHERE c.crossing_id = 1
+INTERSECT
+SELECT trajectory_id
+FROM benchmark.crossing_cs AS c
+CROSS JOIN LATERAL CST_Cascade_Intersects(
+    'prototype2.trajectory_supercover_cs'::regclass, c.cellstring_z13, c.cellstring_z17, c.cellstring_z21
+) AS trajectory_id
+WHERE c.crossing_id = 2
+INTERSECT
+SELECT trajectory_id
+FROM benchmark.crossing_cs AS c
+CROSS JOIN LATERAL CST_Cascade_Intersects(
+    'prototype2.trajectory_supercover_cs'::regclass, c.cellstring_z13, c.cellstring_z17, c.cellstring_z21
+) AS trajectory_id
+WHERE c.crossing_id = 4;
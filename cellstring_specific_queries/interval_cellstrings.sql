@@ -0,0 +1,197 @@
+-- Interval (range) representation of filled cellstrings: stops and areas
+-- A filled polygon at z21 is a huge cell array, but its sorted cell IDs form long runs of
+-- consecutive IDs. Storing the runs as an int8multirange of [start, end) ranges lets intersects,
+-- intersection-cardinality and coverage between two range cellstrings be computed by merging
+-- ranges: cost O(ranges), not O(cells). The multirange operators (&&, *, +) do the merging; a GiST
+-- index on the range columns serves &&. Against a plain cell array (trajectories) each cell is
+-- probed in the ranges, so CST_RangesIntersects and CST_RangesCoverage_ByMMSI cost
+-- O(trajectory cells * log(ranges)); that is independent of the area's size in cells, not O(ranges).
+
+-- Cell array -> sorted, merged [start, end) ranges of consecutive cell IDs.
+CREATE OR REPLACE FUNCTION CST_ToRanges(cells cellstring)
+RETURNS int8multirange
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT COALESCE(range_agg(int8range(run_start, run_end)), '{}'::int8multirange)
+    FROM (
+        SELECT min(cell) AS run_start, max(cell) + 1 AS run_end
+        FROM (
+            SELECT cell, cell - row_number() OVER (ORDER BY cell) AS run_id
+            FROM (SELECT DISTINCT unnest(cells)::bigint AS cell) AS distinct_cells
+        ) AS numbered
+        GROUP BY run_id
+    ) AS runs;
+$$;
+
+-- Number of cells covered by the ranges.
+CREATE OR REPLACE FUNCTION CST_RangesCardinality(ranges int8multirange)
+RETURNS bigint
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT COALESCE(sum(upper(r) - lower(r)), 0)::bigint FROM unnest(ranges) AS r;
+$$;
+
+-- Does any cell of a (non-range) cellstring fall inside the ranges? O(cells * log(ranges)).
+CREATE OR REPLACE FUNCTION CST_RangesIntersects(cells cellstring, ranges int8multirange)
+RETURNS boolean
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT EXISTS (SELECT 1 FROM unnest(cells) AS cell WHERE cell::bigint <@ ranges);
+$$;
+
+-- Cells in common between two range cellstrings.
+CREATE OR REPLACE FUNCTION CST_RangesIntersectionCardinality(a int8multirange, b int8multirange)
+RETURNS bigint
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE WHEN a && b THEN CST_RangesCardinality(a * b) ELSE 0 END;
+$$;
+
+-- Percentage of `area` covered by `covered`, rounded like CST_Coverage.
+CREATE OR REPLACE FUNCTION CST_RangesCoverage(covered int8multirange, area int8multirange)
+RETURNS numeric
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE
+        WHEN CST_RangesCardinality(area) = 0 THEN 0
+        ELSE round(100.0 * CST_RangesIntersectionCardinality(covered, area) / CST_RangesCardinality(area), 2)
+    END;
+$$;
+
+-- CST_Coverage_ByMMSI against a range area. Trajectory cells are clipped to the area ranges
+-- (O(trajectory cells * log(area ranges))) and unioned per mmsi as ranges, so the size of the
+-- area in cells never matters. `prefilter_z13` (e.g. the area's cellstring_z13) narrows the
+-- trajectories through the z13 GIN index first; cell IDs are hierarchical, so no match is lost.
+CREATE OR REPLACE FUNCTION CST_RangesCoverage_ByMMSI(
+    traj_table regclass,
+    zoom_level int,
+    area int8multirange,
+    prefilter_z13 cellstring DEFAULT NULL
+) RETURNS TABLE(mmsi bigint, coverage_percent numeric)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    RETURN QUERY EXECUTE format(
+        'WITH clipped AS ('
+        '    SELECT t.mmsi::bigint AS mmsi, cell::bigint AS cell'
+        '    FROM %1$s AS t'
+        '    CROSS JOIN LATERAL unnest(t.cellstring_z%2$s) AS cell'
+        '    WHERE ($2::cellstring IS NULL OR CST_Intersects(t.cellstring_z13, $2))'
+        '      AND cell::bigint <@ $1'
+        ') '
+        'SELECT clipped.mmsi, CST_RangesCoverage(range_agg(int8range(clipped.cell, clipped.cell + 1)), $1) '
+        'FROM clipped GROUP BY clipped.mmsi',
+        traj_table, zoom_level
+    ) USING area, prefilter_z13;
+END;
+$$;
+
+
+-- Range tables for the filled cellstrings; rerunning the script refreshes them.
+CREATE TABLE IF NOT EXISTS benchmark.area_ranges (
+    area_id bigint PRIMARY KEY,
+    name text,
+    ranges_z13 int8multirange,
+    ranges_z17 int8multirange,
+    ranges_z21 int8multirange
+);
+INSERT INTO benchmark.area_ranges (area_id, name, ranges_z13, ranges_z17, ranges_z21)
+SELECT
+    area_id,
+    name,
+    CST_ToRanges(cellstring_z13),
+    CST_ToRanges(cellstring_z17),
+    CST_ToRanges(cellstring_z21)
+FROM benchmark.area_cs
+ON CONFLICT (area_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    ranges_z13 = EXCLUDED.ranges_z13,
+    ranges_z17 = EXCLUDED.ranges_z17,
+    ranges_z21 = EXCLUDED.ranges_z21;
+
+CREATE TABLE IF NOT EXISTS prototype2.stop_ranges (
+    stop_id bigint PRIMARY KEY,
+    mmsi bigint,
+    ranges_z13 int8multirange,
+    ranges_z17 int8multirange,
+    ranges_z21 int8multirange
+);
+INSERT INTO prototype2.stop_ranges (stop_id, mmsi, ranges_z13, ranges_z17, ranges_z21)
+SELECT
+    stop_id,
+    mmsi,
+    CST_ToRanges(cellstring_z13),
+    CST_ToRanges(cellstring_z17),
+    CST_ToRanges(cellstring_z21)
+FROM prototype2.stop_cs
+ON CONFLICT (stop_id) DO UPDATE SET
+    mmsi = EXCLUDED.mmsi,
+    ranges_z13 = EXCLUDED.ranges_z13,
+    ranges_z17 = EXCLUDED.ranges_z17,
+    ranges_z21 = EXCLUDED.ranges_z21;
+CREATE INDEX IF NOT EXISTS stop_ranges_z13_gist_idx ON prototype2.stop_ranges USING gist (ranges_z13);
+CREATE INDEX IF NOT EXISTS stop_ranges_z17_gist_idx ON prototype2.stop_ranges USING gist (ranges_z17);
+CREATE INDEX IF NOT EXISTS stop_ranges_z21_gist_idx ON prototype2.stop_ranges USING gist (ranges_z21);
+
+CREATE TABLE IF NOT EXISTS prototype2.concave_stop_ranges (
+    stop_id bigint PRIMARY KEY,
+    mmsi bigint,
+    ranges_z13 int8multirange,
+    ranges_z17 int8multirange,
+    ranges_z21 int8multirange
+);
+INSERT INTO prototype2.concave_stop_ranges (stop_id, mmsi, ranges_z13, ranges_z17, ranges_z21)
+SELECT
+    stop_id,
+    mmsi,
+    CST_ToRanges(cellstring_z13),
+    CST_ToRanges(cellstring_z17),
+    CST_ToRanges(cellstring_z21)
+FROM prototype2.concave_stop_cs
+ON CONFLICT (stop_id) DO UPDATE SET
+    mmsi = EXCLUDED.mmsi,
+    ranges_z13 = EXCLUDED.ranges_z13,
+    ranges_z17 = EXCLUDED.ranges_z17,
+    ranges_z21 = EXCLUDED.ranges_z21;
+CREATE INDEX IF NOT EXISTS concave_stop_ranges_z21_gist_idx ON prototype2.concave_stop_ranges USING gist (ranges_z21);
+
+
+-- Storage: arrays vs ranges
+SELECT
+    r.name,
+    pg_column_size(cs.cellstring_z21) AS array_bytes_z21,
+    pg_column_size(r.ranges_z21) AS range_bytes_z21,
+    cardinality(cs.cellstring_z21) AS cells_z21,
+    (SELECT count(*) FROM unnest(r.ranges_z21)) AS ranges_z21
+FROM benchmark.area_cs AS cs
+JOIN benchmark.area_ranges AS r USING (area_id)
+WHERE r.name = 'Denmark-EEZ-new';
+
+SELECT
+    pg_size_pretty(sum(pg_column_size(cellstring_z21))) AS stop_array_size_z21,
+    (SELECT pg_size_pretty(sum(pg_column_size(ranges_z21))) FROM prototype2.stop_ranges) AS stop_range_size_z21
+FROM prototype2.stop_cs;
+
+
+-- Examples
+-- Coverage of area 3 by mmsi
+SELECT coverage.mmsi, coverage.coverage_percent
+FROM benchmark.area_ranges AS r
+JOIN benchmark.area_cs AS cs USING (area_id)
+CROSS JOIN LATERAL CST_RangesCoverage_ByMMSI(
+    'prototype2.trajectory_supercover_cs'::regclass, 21, r.ranges_z21, cs.cellstring_z13
+) AS coverage
+WHERE r.area_id = 3
+ORDER BY coverage.coverage_percent DESC;
+
+-- Stop intersects with stop, cartesian product (percentage overlap)
+SELECT
+    stopA.stop_id,
+    stopB.stop_id,
+    round(
+        100.0 * CST_RangesIntersectionCardinality(stopA.ranges_z21, stopB.ranges_z21)
+        / CST_RangesCardinality(stopA.ranges_z21),
+        2
+    ) AS overlap_percent
+FROM
+    prototype2.stop_ranges AS stopA,
+    prototype2.stop_ranges AS stopB
+WHERE
+    stopA.stop_id <> stopB.stop_id
+    AND stopA.mmsi <> stopB.mmsi
+    AND stopA.ranges_z21 && stopB.ranges_z21
+ORDER BY overlap_percent DESC;
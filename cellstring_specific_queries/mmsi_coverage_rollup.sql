@@ -0,0 +1,135 @@
+-- Per-MMSI union rollup of trajectory_supercover_cs for coverage queries
+-- CST_Coverage_ByMMSI intersects every trajectory with the area and unions the pieces per
+-- mmsi on each call. The rollup keeps CST_Union_Agg of all trajectories of an mmsi per zoom,
+-- so coverage of an area is one GIN-probed CST_Coverage per mmsi against its rollup row.
+-- Triggers keep it current: inserted trajectories are unioned into their mmsi's row,
+-- updated or deleted ones make their mmsi's row be rebuilt from its trajectories.
+
+CREATE TABLE IF NOT EXISTS prototype2.mmsi_supercover_rollup (
+    mmsi bigint PRIMARY KEY,
+    cellstring_z13 cellstring NOT NULL,
+    cellstring_z17 cellstring NOT NULL,
+    cellstring_z21 cellstring NOT NULL,
+    trajectory_count int NOT NULL,
+    refreshed_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Union the given trajectories into the rollup (cells only ever get added).
+CREATE OR REPLACE FUNCTION CST_Rollup_Add_Trajectories(trajectory_ids bigint[])
+RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO prototype2.mmsi_supercover_rollup AS rollup
+        (mmsi, cellstring_z13, cellstring_z17, cellstring_z21, trajectory_count)
+    SELECT
+        t.mmsi,
+        CST_Union_Agg(t.cellstring_z13),
+        CST_Union_Agg(t.cellstring_z17),
+        CST_Union_Agg(t.cellstring_z21),
+        count(*)
+    FROM prototype2.trajectory_supercover_cs AS t
+    WHERE t.trajectory_id = ANY(trajectory_ids)
+    GROUP BY t.mmsi
+    ON CONFLICT (mmsi) DO UPDATE SET
+        cellstring_z13 = CST_Union(rollup.cellstring_z13, EXCLUDED.cellstring_z13),
+        cellstring_z17 = CST_Union(rollup.cellstring_z17, EXCLUDED.cellstring_z17),
+        cellstring_z21 = CST_Union(rollup.cellstring_z21, EXCLUDED.cellstring_z21),
+        trajectory_count = rollup.trajectory_count + EXCLUDED.trajectory_count,
+        refreshed_at = now();
+$$;
+
+-- Recompute the rows of the given mmsis from scratch (after cells were removed or changed).
+CREATE OR REPLACE FUNCTION CST_Rollup_Rebuild_MMSI(mmsis bigint[])
+RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM prototype2.mmsi_supercover_rollup WHERE mmsi = ANY(mmsis);
+    INSERT INTO prototype2.mmsi_supercover_rollup
+        (mmsi, cellstring_z13, cellstring_z17, cellstring_z21, trajectory_count)
+    SELECT
+        t.mmsi,
+        CST_Union_Agg(t.cellstring_z13),
+        CST_Union_Agg(t.cellstring_z17),
+        CST_Union_Agg(t.cellstring_z21),
+        count(*)
+    FROM prototype2.trajectory_supercover_cs AS t
+    WHERE t.mmsi = ANY(mmsis)
+    GROUP BY t.mmsi;
+$$;
+
+CREATE OR REPLACE FUNCTION CST_Rollup_On_Insert()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM CST_Rollup_Add_Trajectories(ARRAY(SELECT trajectory_id FROM new_rows));
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION CST_Rollup_On_Update()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM CST_Rollup_Rebuild_MMSI(ARRAY(
+        SELECT mmsi FROM old_rows UNION SELECT mmsi FROM new_rows
+    ));
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION CST_Rollup_On_Delete()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM CST_Rollup_Rebuild_MMSI(ARRAY(SELECT DISTINCT mmsi FROM old_rows));
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS mmsi_rollup_insert ON prototype2.trajectory_supercover_cs;
+CREATE TRIGGER mmsi_rollup_insert
+AFTER INSERT ON prototype2.trajectory_supercover_cs
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION CST_Rollup_On_Insert();
+
+DROP TRIGGER IF EXISTS mmsi_rollup_update ON prototype2.trajectory_supercover_cs;
+CREATE TRIGGER mmsi_rollup_update
+AFTER UPDATE ON prototype2.trajectory_supercover_cs
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION CST_Rollup_On_Update();
+
+DROP TRIGGER IF EXISTS mmsi_rollup_delete ON prototype2.trajectory_supercover_cs;
+CREATE TRIGGER mmsi_rollup_delete
+AFTER DELETE ON prototype2.trajectory_supercover_cs
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION CST_Rollup_On_Delete();
+
+-- Coverage of `area` (%) per mmsi, from the rollup. Same output as CST_Coverage_ByMMSI.
+CREATE OR REPLACE FUNCTION CST_Coverage_ByMMSI_Rollup(zoom_level int, area cellstring)
+RETURNS TABLE(mmsi bigint, coverage_percent numeric)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    RETURN QUERY EXECUTE format(
+        'SELECT r.mmsi, CST_Coverage(r.cellstring_z%1$s, $1)::numeric '
+        'FROM prototype2.mmsi_supercover_rollup AS r '
+        'WHERE CST_Intersects(r.cellstring_z%1$s, $1)',
+        zoom_level
+    ) USING area;
+END;
+$$;
+
+
+-- Initial build (the insert trigger keeps it current afterwards)
+TRUNCATE prototype2.mmsi_supercover_rollup;
+SELECT CST_Rollup_Rebuild_MMSI(ARRAY(SELECT DISTINCT mmsi FROM prototype2.trajectory_supercover_cs));
+
+CREATE INDEX IF NOT EXISTS mmsi_supercover_rollup_z13_gin_idx ON prototype2.mmsi_supercover_rollup USING GIN (cellstring_z13);
+CREATE INDEX IF NOT EXISTS mmsi_supercover_rollup_z17_gin_idx ON prototype2.mmsi_supercover_rollup USING GIN (cellstring_z17);
+CREATE INDEX IF NOT EXISTS mmsi_supercover_rollup_z21_gin_idx ON prototype2.mmsi_supercover_rollup USING GIN (cellstring_z21);
+ANALYZE prototype2.mmsi_supercover_rollup;
+
+
+-- Example: Helsingør-Helsingborg (area 3)
+SELECT coverage.mmsi, coverage.coverage_percent
+FROM benchmark.area_cs AS area
+CROSS JOIN LATERAL CST_Coverage_ByMMSI_Rollup(13, area.cellstring_z13) AS coverage
+WHERE area.area_id = 3
+ORDER BY coverage.coverage_percent DESC;
@@ -0,0 +1,145 @@
+-- Top-k MMSI coverage of an area with upper-bound pruning
+-- Needs mmsi_coverage_rollup.sql. Every mmsi intersecting the area gets an upper bound on the
+-- number of area cells it can cover:
+--   * its total cell count at the zoom (cells_z* on the rollup)
+--   * for z17/z21, its z13 coverage weighted by the number of area cells under each z13 tile
+--     (benchmark.area_tile_counts). A fine cell on a trajectory lies in a z13 tile the
+--     trajectory's z13 supercover passes through, so this never undercounts.
+-- Candidates are visited by decreasing bound and exact coverage is computed until the next bound
+-- cannot beat the k-th best, so most mmsis never touch their fine cellstring.
+
+ALTER TABLE prototype2.mmsi_supercover_rollup
+    ADD COLUMN IF NOT EXISTS cells_z13 int GENERATED ALWAYS AS (cardinality(cellstring_z13)) STORED,
+    ADD COLUMN IF NOT EXISTS cells_z17 int GENERATED ALWAYS AS (cardinality(cellstring_z17)) STORED,
+    ADD COLUMN IF NOT EXISTS cells_z21 int GENERATED ALWAYS AS (cardinality(cellstring_z21)) STORED;
+
+-- Area cells at `zoom` per z13 cell of the area. cell_z13 is NULL for area cells whose z13 tile
+-- is not part of the area's cellstring_z13; the coarse bound is not used for such areas.
+CREATE TABLE IF NOT EXISTS benchmark.area_tile_counts (
+    area_id int NOT NULL,
+    zoom int NOT NULL,
+    cell_z13 bigint,
+    cell_count int NOT NULL
+);
+CREATE INDEX IF NOT EXISTS area_tile_counts_idx ON benchmark.area_tile_counts (area_id, zoom, cell_z13);
+
+-- Builds the tile counts of an area once per zoom. Returns whether the coarse bound is usable.
+CREATE OR REPLACE FUNCTION CST_Ensure_AreaTileCounts(target_area_id int, zoom_level int)
+RETURNS boolean
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM benchmark.area_tile_counts AS tc
+        WHERE tc.area_id = target_area_id AND tc.zoom = zoom_level
+    ) THEN
+        EXECUTE format(
+            'INSERT INTO benchmark.area_tile_counts (area_id, zoom, cell_z13, cell_count) '
+            'WITH fine AS ('
+            '    SELECT xy.tile_x >> %2$s AS tile_x, xy.tile_y >> %2$s AS tile_y, count(*) AS cell_count'
+            '    FROM benchmark.area_cs AS a'
+            '    CROSS JOIN LATERAL unnest(a.cellstring_z%1$s) AS cell'
+            '    CROSS JOIN LATERAL cst_tilexy(cell, %1$s) AS xy(tile_x, tile_y)'
+            '    WHERE a.area_id = $1'
+            '    GROUP BY 1, 2'
+            '), coarse AS ('
+            '    SELECT cell::bigint AS cell_z13, xy.tile_x, xy.tile_y'
+            '    FROM benchmark.area_cs AS a'
+            '    CROSS JOIN LATERAL unnest(a.cellstring_z13) AS cell'
+            '    CROSS JOIN LATERAL cst_tilexy(cell, 13) AS xy(tile_x, tile_y)'
+            '    WHERE a.area_id = $1'
+            ') '
+            'SELECT $1, %1$s, coarse.cell_z13, fine.cell_count '
+            'FROM fine LEFT JOIN coarse USING (tile_x, tile_y)',
+            zoom_level, zoom_level - 13
+        ) USING target_area_id;
+    END IF;
+
+    RETURN NOT EXISTS (
+        SELECT 1 FROM benchmark.area_tile_counts AS tc
+        WHERE tc.area_id = target_area_id AND tc.zoom = zoom_level AND tc.cell_z13 IS NULL
+    );
+END;
+$$;
+
+-- The k mmsis with the highest coverage of the area (%), same output as
+-- CST_Coverage_ByMMSI(...) ORDER BY coverage_percent DESC LIMIT k. Ties at the k-th place
+-- may resolve to a different mmsi.
+CREATE OR REPLACE FUNCTION CST_Coverage_ByMMSI_TopK(zoom_level int, target_area_id int, k int)
+RETURNS TABLE(mmsi bigint, coverage_percent numeric)
+LANGUAGE plpgsql AS $$
+DECLARE
+    area cellstring;
+    area_z13 cellstring;
+    area_cells bigint;
+    use_coarse boolean;
+    candidate record;
+    exact_cells bigint;
+    kth_cells bigint := 0;
+    best_mmsi bigint[] := '{}';
+    best_cells bigint[] := '{}';
+    weakest int;
+BEGIN
+    EXECUTE format(
+        'SELECT cellstring_z%s, cellstring_z13 FROM benchmark.area_cs WHERE area_id = $1', zoom_level
+    ) INTO area, area_z13 USING target_area_id;
+    area_cells := cardinality(area);
+    IF area_cells IS NULL OR area_cells = 0 OR k <= 0 THEN
+        RETURN;
+    END IF;
+    use_coarse := zoom_level > 13 AND CST_Ensure_AreaTileCounts(target_area_id, zoom_level);
+
+    FOR candidate IN EXECUTE format(
+        'SELECT r.mmsi, LEAST('
+        '    r.cells_z%1$s,'
+        '    CASE WHEN $4 THEN ('
+        '        SELECT COALESCE(sum(tc.cell_count), 0)'
+        '        FROM unnest(CST_Intersection(r.cellstring_z13, $2)) AS c(cell)'
+        '        JOIN benchmark.area_tile_counts AS tc'
+        '          ON tc.area_id = $3 AND tc.zoom = %1$s AND tc.cell_z13 = c.cell'
+        '    ) END'
+        ') AS bound '
+        'FROM prototype2.mmsi_supercover_rollup AS r '
+        'WHERE CASE WHEN $4 THEN CST_Intersects(r.cellstring_z13, $2) ELSE CST_Intersects(r.cellstring_z%1$s, $1) END '
+        'ORDER BY bound DESC',
+        zoom_level
+    ) USING area, area_z13, target_area_id, use_coarse
+    LOOP
+        EXIT WHEN candidate.bound = 0
+            OR (cardinality(best_mmsi) >= k AND candidate.bound <= kth_cells);
+
+        EXECUTE format(
+            'SELECT cardinality(CST_Intersection(r.cellstring_z%s, $1)) '
+            'FROM prototype2.mmsi_supercover_rollup AS r WHERE r.mmsi = $2',
+            zoom_level
+        ) INTO exact_cells USING area, candidate.mmsi;
+        CONTINUE WHEN COALESCE(exact_cells, 0) = 0;
+
+        IF cardinality(best_mmsi) < k THEN
+            best_mmsi := best_mmsi || candidate.mmsi;
+            best_cells := best_cells || exact_cells;
+        ELSIF exact_cells > kth_cells THEN
+            weakest := array_position(best_cells, kth_cells);
+            best_mmsi[weakest] := candidate.mmsi;
+            best_cells[weakest] := exact_cells;
+        END IF;
+        IF cardinality(best_mmsi) >= k THEN
+            SELECT min(cells) INTO kth_cells FROM unnest(best_cells) AS cells;
+        END IF;
+    END LOOP;
+
+    RETURN QUERY
+    SELECT best.mmsi, round(100.0 * best.cells / area_cells, 2)
+    FROM unnest(best_mmsi, best_cells) AS best(mmsi, cells)
+    ORDER BY best.cells DESC;
+END;
+$$;
+
+
+-- Example: top 3 in Helsingør-Helsingborg (area 3) at z21
+SELECT top.mmsi, top.coverage_percent
+FROM CST_Coverage_ByMMSI_TopK(21, 3, 3) AS top;
+
+-- Tile counts behind the z21 bound of area 3 (unmapped_tiles > 0 disables the coarse bound)
+SELECT count(*) FILTER (WHERE tc.cell_z13 IS NULL) AS unmapped_tiles, count(*) AS tiles, sum(tc.cell_count) AS cells
+FROM benchmark.area_tile_counts AS tc
+WHERE tc.area_id = 3 AND tc.zoom = 21;
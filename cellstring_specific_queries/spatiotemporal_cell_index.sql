@@ -0,0 +1,94 @@
+-- Spatio-temporal cell index: (zoom, cell, period) postings for trajectories and stops
+-- CST_Intersects + a ts_start/ts_end filter first materializes every spatially intersecting
+-- trajectory and only then drops the ones outside the time window. Here every cell of a
+-- trajectory/stop is a posting carrying the object's time span, and one GiST index over
+-- (zoom, cell_id, period) answers "same cell AND overlapping period" in a single probe per cell.
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS prototype2.cell_time_index (
+    zoom smallint NOT NULL,
+    cell_id bigint NOT NULL,
+    object_kind text NOT NULL,  -- 'trajectory' or 'stop'
+    object_id bigint NOT NULL,
+    mmsi bigint NOT NULL,
+    period tstzrange NOT NULL
+);
+
+-- (Re)build the postings of one zoom from trajectory_supercover_cs and stop_cs.
+CREATE OR REPLACE FUNCTION CST_Build_CellTimeIndex(zoom_level int)
+RETURNS bigint
+LANGUAGE plpgsql AS $$
+DECLARE
+    inserted bigint;
+BEGIN
+    DELETE FROM prototype2.cell_time_index WHERE zoom = zoom_level;
+    EXECUTE format(
+        'INSERT INTO prototype2.cell_time_index (zoom, cell_id, object_kind, object_id, mmsi, period) '
+        'SELECT %1$s, cell, ''trajectory'', t.trajectory_id, t.mmsi, tstzrange(t.ts_start, t.ts_end, ''[]'') '
+        'FROM prototype2.trajectory_supercover_cs AS t, unnest(t.cellstring_z%1$s) AS cell '
+        'UNION ALL '
+        'SELECT %1$s, cell, ''stop'', s.stop_id, s.mmsi, tstzrange(s.ts_start, s.ts_end, ''[]'') '
+        'FROM prototype2.stop_cs AS s, unnest(s.cellstring_z%1$s) AS cell',
+        zoom_level
+    );
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
+
+-- Objects of another mmsi sharing a cell with `cells` while their period overlaps `ref_period`.
+CREATE OR REPLACE FUNCTION CST_SpatioTemporal_Intersecting(
+    zoom_level int,
+    cells cellstring,
+    ref_period tstzrange,
+    exclude_mmsi bigint DEFAULT NULL
+) RETURNS TABLE(object_kind text, object_id bigint, mmsi bigint, overlap_minutes numeric)
+LANGUAGE sql STABLE AS $$
+    SELECT DISTINCT
+        ct.object_kind,
+        ct.object_id,
+        ct.mmsi,
+        ROUND(EXTRACT(EPOCH FROM (
+            LEAST(upper(ct.period), upper(ref_period)) - GREATEST(lower(ct.period), lower(ref_period))
+        )) / 60.0, 2)
+    FROM unnest(cells) AS cell
+    JOIN prototype2.cell_time_index AS ct
+      ON ct.zoom = zoom_level
+     AND ct.cell_id = cell
+     AND ct.period && ref_period
+    WHERE exclude_mmsi IS NULL OR ct.mmsi <> exclude_mmsi;
+$$;
+
+
+-- Build (per zoom) and index
+SELECT CST_Build_CellTimeIndex(13);
+SELECT CST_Build_CellTimeIndex(17);
+SELECT CST_Build_CellTimeIndex(21);
+
+CREATE INDEX IF NOT EXISTS cell_time_index_gist_idx
+ON prototype2.cell_time_index
+USING gist (zoom, cell_id, period);
+
+ANALYZE prototype2.cell_time_index;
+
+SELECT
+    zoom,
+    count(*) AS postings,
+    pg_size_pretty(pg_total_relation_size('prototype2.cell_time_index')) AS total_size
+FROM prototype2.cell_time_index
+GROUP BY zoom
+ORDER BY zoom;
+
+
+-- Example: trajectories and stops that were in the cells of stop 2267 while it lasted
+SELECT hit.*
+FROM prototype2.stop_cs AS ref
+CROSS JOIN LATERAL CST_SpatioTemporal_Intersecting(
+    21,
+    ref.cellstring_z21,
+    tstzrange(ref.ts_start, ref.ts_end, '[]'),
+    ref.mmsi
+) AS hit
+WHERE ref.stop_id = 2267
+ORDER BY hit.overlap_minutes DESC;
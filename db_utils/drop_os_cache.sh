@@ -0,0 +1,8 @@
+#!/bin/sh
+# Local stand-in for BENCHMARK_DROP_OS_CACHE_COMMAND (cache_state="cold"): flush dirty pages and
+# drop the Linux page cache of the host running PostgreSQL. Needs root (or a sudoers entry).
+# For a server in a container on this host, the host's page cache is the one to drop.
+#   export BENCHMARK_DROP_OS_CACHE_COMMAND="sudo db_utils/drop_os_cache.sh"
+set -e
+sync
+echo 3 > /proc/sys/vm/drop_caches
@@ -0,0 +1,124 @@
+-- Time-partitioned copies of trajectory_supercover_cs and stop_cs
+-- Range partitions on ts_start (one per month), optionally sub-partitioned by hash(mmsi).
+-- GIN indexes are declared on the parents, so every partition gets its own per-zoom GIN index.
+-- Queries with a time window prune to the partitions whose ts_start can overlap it:
+--     ts_start <= window_end AND ts_start >= window_start - max_duration
+-- max_duration (longest object) is kept in prototype2.cellstring_partition_bounds.
+-- Rerunning the script rebuilds the partitioned tables from the current ones.
+
+DROP TABLE IF EXISTS prototype2.trajectory_supercover_cs_part;
+DROP TABLE IF EXISTS prototype2.stop_cs_part;
+
+CREATE TABLE prototype2.trajectory_supercover_cs_part (LIKE prototype2.trajectory_supercover_cs INCLUDING DEFAULTS)
+PARTITION BY RANGE (ts_start);
+
+CREATE TABLE prototype2.stop_cs_part (LIKE prototype2.stop_cs INCLUDING DEFAULTS)
+PARTITION BY RANGE (ts_start);
+
+CREATE TABLE IF NOT EXISTS prototype2.cellstring_partition_bounds (
+    table_name text PRIMARY KEY,
+    min_ts_start timestamptz,
+    max_ts_start timestamptz,
+    max_duration interval
+);
+
+DO $$
+DECLARE
+    hash_partitions int := 0;  -- > 0: sub-partition every month by hash(mmsi)
+    source text;
+    target text;
+    month_start timestamptz;
+    last_month timestamptz;
+    partition_name text;
+    remainder int;
+BEGIN
+    FOREACH source IN ARRAY ARRAY['trajectory_supercover_cs', 'stop_cs'] LOOP
+        target := source || '_part';
+        EXECUTE format(
+            'SELECT date_trunc(''month'', min(ts_start)), date_trunc(''month'', max(ts_start)) FROM prototype2.%I',
+            source
+        ) INTO month_start, last_month;
+        CONTINUE WHEN month_start IS NULL;
+
+        WHILE month_start <= last_month LOOP
+            partition_name := format('%s_%s', target, to_char(month_start, 'YYYYMM'));
+            IF hash_partitions > 0 THEN
+                EXECUTE format(
+                    'CREATE TABLE prototype2.%I PARTITION OF prototype2.%I '
+                    'FOR VALUES FROM (%L) TO (%L) PARTITION BY HASH (mmsi)',
+                    partition_name, target, month_start, month_start + interval '1 month'
+                );
+                FOR remainder IN 0 .. hash_partitions - 1 LOOP
+                    EXECUTE format(
+                        'CREATE TABLE prototype2.%I PARTITION OF prototype2.%I '
+                        'FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+                        partition_name || '_h' || remainder, partition_name, hash_partitions, remainder
+                    );
+                END LOOP;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE prototype2.%I PARTITION OF prototype2.%I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, target, month_start, month_start + interval '1 month'
+                );
+            END IF;
+            month_start := month_start + interval '1 month';
+        END LOOP;
+
+        EXECUTE format('INSERT INTO prototype2.%I SELECT * FROM prototype2.%I', target, source);
+
+        EXECUTE format(
+            'INSERT INTO prototype2.cellstring_partition_bounds '
+            'SELECT %L, min(ts_start), max(ts_start), max(ts_end - ts_start) FROM prototype2.%I '
+            'ON CONFLICT (table_name) DO UPDATE SET min_ts_start = EXCLUDED.min_ts_start, '
+            'max_ts_start = EXCLUDED.max_ts_start, max_duration = EXCLUDED.max_duration',
+            'prototype2.' || target, source
+        );
+    END LOOP;
+END;
+$$;
+
+-- Per-partition indexes (declared once on the parent)
+CREATE INDEX trajectory_supercover_cs_part_id_idx ON prototype2.trajectory_supercover_cs_part (trajectory_id);
+CREATE INDEX trajectory_supercover_cs_part_z13_gin_idx ON prototype2.trajectory_supercover_cs_part USING GIN (cellstring_z13);
+CREATE INDEX trajectory_supercover_cs_part_z17_gin_idx ON prototype2.trajectory_supercover_cs_part USING GIN (cellstring_z17);
+CREATE INDEX trajectory_supercover_cs_part_z21_gin_idx ON prototype2.trajectory_supercover_cs_part USING GIN (cellstring_z21);
+
+CREATE INDEX stop_cs_part_id_idx ON prototype2.stop_cs_part (stop_id);
+CREATE INDEX stop_cs_part_z13_gin_idx ON prototype2.stop_cs_part USING GIN (cellstring_z13);
+CREATE INDEX stop_cs_part_z17_gin_idx ON prototype2.stop_cs_part USING GIN (cellstring_z17);
+CREATE INDEX stop_cs_part_z21_gin_idx ON prototype2.stop_cs_part USING GIN (cellstring_z21);
+
+ANALYZE prototype2.trajectory_supercover_cs_part;
+ANALYZE prototype2.stop_cs_part;
+
+
+-- Row counts and sizes per partition
+SELECT
+    parent.relname AS parent,
+    child.relname AS partition,
+    child.reltuples::bigint AS estimated_rows,
+    pg_size_pretty(pg_total_relation_size(child.oid)) AS total_size
+FROM pg_inherits
+JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname IN ('trajectory_supercover_cs_part', 'stop_cs_part')
+ORDER BY parent.relname, child.relname;
+
+
+-- Pruning check: "Subplans Removed" in the Append node shows the skipped partitions
+EXPLAIN (ANALYZE, COSTS OFF)
+WITH ref AS (
+    SELECT cellstring_z21, ts_start, ts_end, mmsi
+    FROM prototype2.stop_cs
+    WHERE stop_id = 2267
+)
+SELECT t.trajectory_id
+FROM prototype2.trajectory_supercover_cs_part AS t
+WHERE t.ts_start <= (SELECT ts_end FROM ref)
+  AND t.ts_start >= (SELECT ts_start FROM ref) - (
+      SELECT max_duration FROM prototype2.cellstring_partition_bounds
+      WHERE table_name = 'prototype2.trajectory_supercover_cs_part'
+  )
+  AND t.ts_end >= (SELECT ts_start FROM ref)
+  AND t.mmsi <> (SELECT mmsi FROM ref)
+  AND CST_Intersects(t.cellstring_z21, (SELECT cellstring_z21 FROM ref));
@@ -0,0 +1,6 @@
+-- Expression indexes on the point time (ST_M) of prototype2.points for benchmarking/incremental.py
+-- Without them, finding the points after the watermark and the last point before it scans the table.
+-- Run once before the first incremental refresh; creating them on a large table takes a while.
+
+CREATE INDEX IF NOT EXISTS points_m_idx ON prototype2.points (ST_M(geom));
+CREATE INDEX IF NOT EXISTS points_mmsi_m_idx ON prototype2.points (mmsi, ST_M(geom));
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from benchmarking.adaptive import AdaptiveRepeats, AdaptiveState, bootstrap_median_ci, repetitions, validate
+
+
+def _run(adaptive, sample):
+    values = []
+    state = AdaptiveState()
+    for index in repetitions(adaptive, values, state):
+        values.append(sample(index))
+    return values, state
+
+
+def test_constant_values_converge_at_min_repeats():
+    values, state = _run(AdaptiveRepeats(min_repeats=5, max_repeats=50), lambda i: 10.0)
+    assert len(values) == 5
+    assert state.stop_reason == "converged"
+    assert state.ci == (10.0, 10.0)
+
+
+def test_noisy_values_stop_at_max_repeats():
+    adaptive = AdaptiveRepeats(target_relative_width=0.001, min_repeats=3, max_repeats=12, resamples=200)
+    values, state = _run(adaptive, lambda i: float(1 + (i * 7919) % 13))
+    assert len(values) == 12
+    assert state.stop_reason == "max_repeats"
+
+
+def test_time_budget_stops_early():
+    def sample(index):
+        time.sleep(0.02)
+        return float(index)
+
+    values, state = _run(AdaptiveRepeats(time_budget_seconds=0.05, resamples=50), sample)
+    assert state.stop_reason == "time_budget"
+    assert len(values) == 2
+
+
+def test_bootstrap_ci_brackets_median():
+    low, high = bootstrap_median_ci([1.0, 2.0, 3.0, 4.0, 100.0], resamples=500)
+    assert low <= 3.0 <= high
+    with pytest.raises(ValueError):
+        bootstrap_median_ci([])
+
+
+def test_validate_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        validate(AdaptiveRepeats(min_repeats=10, max_repeats=5))
+    with pytest.raises(ValueError):
+        validate(AdaptiveRepeats(confidence=1.0))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from benchmarking.cellstring import (
+    as_cellstring,
+    cst_contains,
+    cst_coverage,
+    cst_difference,
+    cst_intersection,
+    cst_intersection_cardinality,
+    cst_intersects,
+    cst_union,
+    cst_union_agg,
+)
+
+
+def _random_pairs(count=50, size=40, high=120):
+    rng = np.random.default_rng(7)
+    for _ in range(count):
+        yield (
+            as_cellstring(rng.integers(0, high, rng.integers(0, size))),
+            as_cellstring(rng.integers(0, high, rng.integers(0, size))),
+        )
+
+
+@pytest.mark.parametrize("a, b", list(_random_pairs()))
+def test_set_operations_match_python_sets(a, b):
+    sa, sb = set(a.tolist()), set(b.tolist())
+    assert cst_union(a, b).tolist() == sorted(sa | sb)
+    assert cst_intersection(a, b).tolist() == sorted(sa & sb)
+    assert cst_difference(a, b).tolist() == sorted(sa - sb)
+    assert cst_intersects(a, b) == bool(sa & sb)
+    assert cst_contains(a, b) == (sb <= sa)
+    assert cst_intersection_cardinality(a, b) == len(sa & sb)
+    expected = round(100.0 * len(sa & sb) / len(sb), 2) if sb else 0.0
+    assert cst_coverage(a, b) == expected
+
+
+def test_union_agg_matches_python_sets():
+    parts = [a for a, _ in _random_pairs(count=10)]
+    assert cst_union_agg(parts).tolist() == sorted(set().union(*(p.tolist() for p in parts)))
+    assert cst_union_agg([]).size == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from benchmarking.cellstring import as_cellstring
+from benchmarking.compact_cellstring import (
+    CompactCellString,
+    _decode_varints,
+    _encode_varints,
+    compact_contains,
+    compact_difference,
+    compact_intersection,
+    compact_intersection_cardinality,
+    compact_intersects,
+    compact_union,
+    compact_union_agg,
+)
+
+
+def _random_cells(rng, size=60, high=150):
+    return as_cellstring(rng.integers(0, high, rng.integers(0, size)))
+
+
+@pytest.mark.parametrize(
+    "values",
+    [[], [0], [127, 128], [1, 300, 16383, 16384, 2**35, 2**63 - 1]],
+)
+def test_varint_round_trip(values):
+    array = np.asarray(values, dtype=np.uint64)
+    assert _decode_varints(_encode_varints(array)).tolist() == array.tolist()
+
+
+def test_varint_round_trip_random():
+    rng = np.random.default_rng(1)
+    array = rng.integers(0, 2**62, 500, dtype=np.int64)
+    assert _decode_varints(_encode_varints(array)).tolist() == array.tolist()
+
+
+def test_encode_bytes_round_trip():
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        cells = _random_cells(rng)
+        compact = CompactCellString.encode(cells)
+        assert compact.decode().tolist() == cells.tolist()
+        assert compact.cardinality == cells.size
+        assert CompactCellString.from_bytes(compact.to_bytes()).decode().tolist() == cells.tolist()
+
+
+def test_run_operations_match_python_sets():
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        a, b = _random_cells(rng), _random_cells(rng)
+        sa, sb = set(a.tolist()), set(b.tolist())
+        ca, cb = CompactCellString.encode(a), CompactCellString.encode(b)
+        assert compact_union(ca, cb).decode().tolist() == sorted(sa | sb)
+        assert compact_intersection(ca, cb).decode().tolist() == sorted(sa & sb)
+        assert compact_difference(ca, cb).decode().tolist() == sorted(sa - sb)
+        assert compact_intersects(ca, cb) == bool(sa & sb)
+        assert compact_contains(ca, cb) == (sb <= sa)
+        assert compact_intersection_cardinality(ca, cb) == len(sa & sb)
+
+
+def test_union_agg_matches_python_sets():
+    rng = np.random.default_rng(4)
+    parts = [_random_cells(rng) for _ in range(10)]
+    merged = compact_union_agg(CompactCellString.encode(p) for p in parts)
+    assert merged.decode().tolist() == sorted(set().union(*(p.tolist() for p in parts)))
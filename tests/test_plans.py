@@ -0,0 +1,43 @@
+import copy
+
+from benchmarking.plans import capture_plan
+
+
+def _explain(rows=10, time=1.5, index="points_pkey"):
+    return {
+        "Plan": {
+            "Node Type": "Nested Loop",
+            "Actual Rows": rows,
+            "Actual Total Time": time,
+            "Shared Hit Blocks": 4,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "trajectory", "Actual Rows": rows},
+                {"Node Type": "Index Scan", "Relation Name": "points", "Index Name": index, "Actual Rows": 1},
+            ],
+        },
+        "Planning Time": 0.3,
+        "Execution Time": time,
+    }
+
+
+def test_hash_ignores_actuals():
+    first = capture_plan(_explain(rows=10, time=1.5))
+    second = capture_plan(_explain(rows=999, time=42.0))
+    assert first.plan_hash == second.plan_hash
+    assert first.actuals != second.actuals
+    assert second.execution_ms == 42.0
+
+
+def test_hash_changes_with_shape():
+    assert capture_plan(_explain()).plan_hash != capture_plan(_explain(index="points_mmsi_idx")).plan_hash
+    swapped = _explain()
+    swapped["Plan"]["Plans"].reverse()
+    assert capture_plan(swapped).plan_hash != capture_plan(_explain()).plan_hash
+
+
+def test_capture_does_not_mutate_and_is_stable():
+    explain = _explain()
+    before = copy.deepcopy(explain)
+    assert capture_plan(explain).plan_hash == capture_plan(explain).plan_hash
+    assert explain == before
+    assert [node["depth"] for node in capture_plan(explain).shape] == [0, 1, 1]
@@ -0,0 +1,61 @@
+import numpy as np
+
+from benchmarking.quadtree_cellstring import (
+    MAX_ZOOM,
+    QuadtreeCellString,
+    morton_decode,
+    morton_encode,
+    qt_contains,
+    qt_coverage,
+    qt_difference,
+    qt_intersects,
+)
+
+
+def _tiles(rng, count, extent=16):
+    x = rng.integers(0, extent, count)
+    y = rng.integers(0, extent, count)
+    return x, y
+
+
+def _tile_set(x, y):
+    return set(zip(np.asarray(x).tolist(), np.asarray(y).tolist()))
+
+
+def test_morton_round_trip():
+    rng = np.random.default_rng(0)
+    x, y = _tiles(rng, 200, extent=1 << MAX_ZOOM)
+    dx, dy = morton_decode(morton_encode(x, y))
+    assert dx.tolist() == x.tolist() and dy.tolist() == y.tolist()
+
+
+def test_filled_block_compacts_to_one_cell():
+    x, y = np.meshgrid(np.arange(8, 16), np.arange(0, 8))
+    qt = QuadtreeCellString.from_tiles(x.ravel(), y.ravel(), zoom=MAX_ZOOM)
+    assert len(qt) == 1 and qt.zooms.tolist() == [MAX_ZOOM - 3]
+
+
+def test_compaction_round_trips():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        x, y = _tiles(rng, rng.integers(1, 200))
+        qt = QuadtreeCellString.from_tiles(x, y, zoom=MAX_ZOOM)
+        assert _tile_set(*qt.tiles_at(MAX_ZOOM)) == _tile_set(x, y)
+        assert qt.cardinality == len(_tile_set(x, y))
+        assert QuadtreeCellString.unpack(qt.pack()).pack().tolist() == qt.pack().tolist()
+        assert QuadtreeCellString.from_ranges(qt.to_ranges()).pack().tolist() == qt.pack().tolist()
+        assert _tile_set(*qt.tiles_at(MAX_ZOOM - 2)) == _tile_set(np.asarray(x) >> 2, np.asarray(y) >> 2)
+
+
+def test_operations_match_python_sets():
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        ax, ay = _tiles(rng, rng.integers(1, 150))
+        bx, by = _tiles(rng, rng.integers(1, 150))
+        a = QuadtreeCellString.from_tiles(ax, ay)
+        b = QuadtreeCellString.from_tiles(bx, by)
+        sa, sb = _tile_set(ax, ay), _tile_set(bx, by)
+        assert qt_intersects(a, b) == bool(sa & sb)
+        assert qt_contains(a, b) == (sb <= sa)
+        assert _tile_set(*qt_difference(a, b).tiles_at(MAX_ZOOM)) == sa - sb
+        assert qt_coverage(a, b) == round(100.0 * len(sa & sb) / len(sb), 2)
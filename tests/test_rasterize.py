@@ -0,0 +1,56 @@
+import numpy as np
+
+from benchmarking.rasterize import bresenham, supercover, tile_coordinates
+
+
+def _cells(groups, x, y):
+    return set(zip(groups.tolist(), x.tolist(), y.tolist()))
+
+
+def _dense(x, y, groups, samples=20000):
+    """Cells hit by points sampled densely along each segment."""
+    cells = set()
+    for i in range(x.size - 1):
+        if groups[i] != groups[i + 1]:
+            continue
+        t = np.linspace(0.0, 1.0, samples)
+        px = np.floor(x[i] + t * (x[i + 1] - x[i])).astype(np.int64)
+        py = np.floor(y[i] + t * (y[i + 1] - y[i])).astype(np.int64)
+        cells |= {(int(groups[i]), a, b) for a, b in zip(px.tolist(), py.tolist())}
+    return cells
+
+
+def test_supercover_matches_dense_sampling():
+    rng = np.random.default_rng(0)
+    groups = np.repeat(np.arange(5), 6)
+    x = rng.uniform(0, 12, groups.size)
+    y = rng.uniform(0, 12, groups.size)
+    cells = _cells(*supercover(x, y, groups))
+    # Dense sampling can only miss cells the segment clips at a corner; with random
+    # endpoints it hits every cell, and supercover must not add any.
+    assert cells == _dense(x, y, groups)
+
+
+def test_supercover_cell_count_per_segment():
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, 50, 2)
+    y = rng.uniform(0, 50, 2)
+    groups, cx, cy = supercover(x, y, np.zeros(2, dtype=np.int64))
+    expected = abs(int(np.floor(x[1])) - int(np.floor(x[0]))) + abs(int(np.floor(y[1])) - int(np.floor(y[0]))) + 1
+    assert cx.size == expected
+    steps = np.abs(np.diff(cx)) + np.abs(np.diff(cy))
+    assert (steps == 1).all()
+
+
+def test_single_points_and_bresenham_endpoints():
+    x = np.array([0.5, 3.2, 7.9, 2.5])
+    y = np.array([0.5, 1.1, 5.4, 2.5])
+    groups = np.array([0, 0, 0, 1])
+    cells = _cells(*bresenham(x, y, groups))
+    assert {(0, 0, 0), (0, 3, 1), (0, 7, 5), (1, 2, 2)} <= cells
+    assert (1, 2, 2) in _cells(*supercover(x, y, groups))
+
+
+def test_tile_coordinates_origin():
+    x, y = tile_coordinates(np.array([0.0]), np.array([0.0]), 1)
+    assert x.tolist() == [1.0] and y.tolist() == [1.0]